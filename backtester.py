@@ -1,5 +1,13 @@
+import numpy as np
 import pandas as pd
-from config import INITIAL_CASH, COMMISSION
+from config import INITIAL_CASH, COMMISSION, EXECUTION_MODE, INTRABAR_TIE_BREAK
+from engine import simulate_with_trades, simulate_batch, simulate_intrabar_with_trades, simulate_portfolio, TIE_BREAKS
+from engine import simulate_metrics, simulate_intrabar_metrics, METRIC_FIRST, METRIC_LAST, METRIC_PEAK, METRIC_MIN_DRAWDOWN, METRIC_COUNT
+from indicator_calculator import add_indicators
+from trade_log import TradeLog
+
+# Parámetros de los que dependen las señales de entrada (no los de gestión de riesgo).
+SIGNAL_PARAM_KEYS = ('ema_len', 'adx_len', 'macd_fast', 'macd_slow', 'macd_signal', 'adx_threshold')
 
 
 class Backtester:
@@ -17,41 +25,71 @@ class Backtester:
         initial_cash (float): Capital inicial para la simulación.
         commission (float): Costo por operación (comisión del broker).
         price_col (str): Nombre de la columna de precios a utilizar para la simulación (ej. 'close').
+        execution (str): Modo de ejecución del stop-loss/take-profit: 'close' o 'intrabar'.
+        tie_break (str): En modo 'intrabar', el nivel que se asume tocado primero
+                         cuando una vela toca ambos: 'stop_loss', 'take_profit' o 'nearest'.
+        sub_bars (SubBarIndex or None): En modo 'intrabar', velas de menor
+                                        temporalidad con las que se resuelven
+                                        las velas que tocan ambos niveles.
+        trade_log (TradeLog or None): Las operaciones de la última ejecución de run().
+        copy (bool): Si es True, 'data' es una copia propia de los datos y las
+                     señales se añaden a ella como columnas.
     """
 
-    def __init__(self, data, params):
+    def __init__(self, data, params, execution=EXECUTION_MODE, tie_break=INTRABAR_TIE_BREAK, sub_bars=None,
+                 copy=True):
         """
         Inicializa el motor de backtesting.
 
         Args:
             data (pd.DataFrame): Los datos de mercado con indicadores.
             params (dict): Los parámetros de la estrategia.
+            execution (str): Modo de ejecución: 'close' o 'intrabar'.
+            tie_break (str): Criterio de desempate del modo 'intrabar'.
+            sub_bars (SubBarIndex, optional): Velas finas del modo 'intrabar'
+                                              (ver data_loader.load_sub_bars()).
+            copy (bool): Si es False, se trabaja directamente sobre 'data' (p. ej.
+                         una vista de un segmento del Walk-Forward) sin copiarla
+                         ni modificarla.
         """
-        self.data = data.copy()
+        if execution not in ('close', 'intrabar'):
+            raise ValueError(f"Modo de ejecución no reconocido: {execution}")
+        if tie_break not in TIE_BREAKS:
+            raise ValueError(f"Criterio de desempate no reconocido: {tie_break}")
+        self.data = data.copy() if copy else data
+        self.copy = copy
         self.params = params
         self.initial_cash = INITIAL_CASH
         self.commission = COMMISSION
         self.price_col = 'close'
+        self.execution = execution
+        self.tie_break = tie_break
+        self.sub_bars = sub_bars
+        self.trade_log = None
 
-    def _generate_signals(self):
+    def _compute_signals(self, params):
         """
-        Metodo privado para generar las señales de entrada de la estrategia.
+        Metodo privado que calcula las señales de entrada para un conjunto de parámetros.
 
         Implementa una regla de "2 de 3 condiciones" para mayor robustez:
         - Condición 1: Tendencia (basada en EMA).
         - Condición 2: Fuerza de la tendencia (basada en ADX).
         - Condición 3: Momento (cruce de MACD).
 
-        Las señales se añaden como nuevas columnas ('buy_signal', 'sell_signal')
-        al DataFrame self.data.
+        Args:
+            params (dict): Los parámetros de la estrategia. Las columnas de
+                           indicadores correspondientes deben existir en self.data.
+
+        Returns:
+            tuple[pd.Series, pd.Series]: Las señales de compra y de venta (booleanas).
         """
         # --- Extraer parámetros para mayor legibilidad ---
-        adx_threshold = self.params.get('adx_threshold')
-        ema_len = self.params.get('ema_len')
-        adx_len = self.params.get('adx_len')
-        macd_fast = self.params.get('macd_fast')
-        macd_slow = self.params.get('macd_slow')
-        macd_signal = self.params.get('macd_signal')
+        adx_threshold = params.get('adx_threshold')
+        ema_len = params.get('ema_len')
+        adx_len = params.get('adx_len')
+        macd_fast = params.get('macd_fast')
+        macd_slow = params.get('macd_slow')
+        macd_signal = params.get('macd_signal')
 
         # --- Nombres de columna dinámicos basados en parámetros ---
         ema_col = f"EMA_{ema_len}"
@@ -72,20 +110,94 @@ class Backtester:
                                (self.data[macd_line_col] < self.data[macd_signal_col])
 
         # --- Lógica de "2 de 3": se genera una señal si al menos dos condiciones son verdaderas ---
-        self.data['buy_signal'] = (cond_ema_up.astype(int) +
-                                   cond_adx_strong.astype(int) +
-                                   cond_macd_cross_up.astype(int)) >= 2
+        buy_signal = (cond_ema_up.astype(int) +
+                      cond_adx_strong.astype(int) +
+                      cond_macd_cross_up.astype(int)) >= 2
+
+        sell_signal = (cond_ema_down.astype(int) +
+                       cond_adx_strong.astype(int) +
+                       cond_macd_cross_down.astype(int)) >= 2
+
+        return buy_signal, sell_signal
+
+    def _generate_signals(self):
+        """
+        Metodo privado para generar las señales de entrada de la estrategia
+        con los parámetros de la instancia.
+
+        Si el Backtester tiene su propia copia de los datos, las señales se
+        añaden además como nuevas columnas ('buy_signal', 'sell_signal') al
+        DataFrame self.data.
+
+        Returns:
+            tuple[pd.Series, pd.Series]: Las señales de compra y de venta.
+        """
+        buy_signal, sell_signal = self._compute_signals(self.params)
+        if self.copy:
+            self.data['buy_signal'], self.data['sell_signal'] = buy_signal, sell_signal
+        return buy_signal, sell_signal
+
+    def _simulate(self, kernel, intrabar_kernel):
+        """
+        Genera las señales y ejecuta un núcleo de simulación compilado.
+
+        Extrae una sola vez las columnas de precio y señales como arreglos
+        contiguos de NumPy y las pasa al núcleo del modo de ejecución: 'kernel'
+        en modo 'close' o 'intrabar_kernel' (que además recibe la apertura, el
+        máximo, el mínimo y las velas finas) en modo 'intrabar'.
+
+        Args:
+            kernel (callable): Núcleo del modo 'close' (p. ej. engine.simulate_with_trades).
+            intrabar_kernel (callable): Núcleo equivalente del modo 'intrabar'.
+
+        Returns:
+            object: El resultado del núcleo.
+        """
+        # --- Extraer parámetros de gestión de riesgo ---
+        stop_loss_pct = self.params.get('stop_loss')
+        take_profit_pct = self.params.get('take_profit')
+        n_shares = self.params.get('n_shares')  # Fracción del capital a arriesgar
 
-        self.data['sell_signal'] = (cond_ema_down.astype(int) +
-                                    cond_adx_strong.astype(int) +
-                                    cond_macd_cross_down.astype(int)) >= 2
+        buy_signal, sell_signal = self._generate_signals()
+
+        # --- Extracción de columnas como arreglos contiguos ---
+        close = np.ascontiguousarray(self.data[self.price_col].to_numpy(dtype=np.float64))
+        buy_signal = np.ascontiguousarray(buy_signal.to_numpy(dtype=np.bool_))
+        sell_signal = np.ascontiguousarray(sell_signal.to_numpy(dtype=np.bool_))
+
+        # --- Simulación compilada ---
+        if self.execution == 'intrabar':
+            open_price, high, low = (np.ascontiguousarray(self.data[col].to_numpy(dtype=np.float64))
+                                     for col in ('open', 'high', 'low'))
+            if self.sub_bars is not None:
+                sub_starts, sub_ends = self.sub_bars.ranges(self.data.index)
+                sub_open, sub_high, sub_low = self.sub_bars.open, self.sub_bars.high, self.sub_bars.low
+            else:
+                # Sin velas finas: rangos vacíos, las velas ambiguas usan el desempate.
+                sub_starts = sub_ends = np.zeros(len(close), dtype=np.int64)
+                sub_open = sub_high = sub_low = np.empty(0)
+            return intrabar_kernel(open_price, high, low, close, buy_signal, sell_signal,
+                                   float(stop_loss_pct), float(take_profit_pct), float(n_shares),
+                                   float(self.initial_cash), float(self.commission), TIE_BREAKS[self.tie_break],
+                                   sub_open, sub_high, sub_low, sub_starts, sub_ends)
+        return kernel(close, buy_signal, sell_signal,
+                      float(stop_loss_pct), float(take_profit_pct), float(n_shares),
+                      float(self.initial_cash), float(self.commission))
 
     def run(self, return_value_series=False):
         """
         Ejecuta la simulación de backtesting.
 
-        Itera a través de los datos vela por vela, aplicando la lógica de
-        apertura y cierre de posiciones.
+        El recorrido vela por vela se delega al núcleo compilado con Numba
+        (engine.simulate_with_trades), que aplica la lógica de apertura y
+        cierre de posiciones. En modo 'intrabar' se utiliza
+        engine.simulate_intrabar_with_trades, que detecta los toques de
+        stop-loss y take-profit con el máximo y el mínimo de cada vela. Si se
+        indicaron velas finas (sub_bars), el núcleo solo las consulta en las
+        velas que tocan ambos niveles.
+
+        El núcleo registra además cada operación en arreglos de NumPy, que
+        quedan disponibles como TradeLog en el atributo 'trade_log'.
 
         Args:
             return_value_series (bool): Si es True, retorna una serie de Pandas
@@ -95,68 +207,182 @@ class Backtester:
         Returns:
             pd.Series or float: La serie de tiempo del valor del portafolio o el valor final.
         """
-        # --- Extraer parámetros de gestión de riesgo ---
-        stop_loss_pct = self.params.get('stop_loss')
-        take_profit_pct = self.params.get('take_profit')
-        n_shares = self.params.get('n_shares')  # Fracción del capital a arriesgar
-
-        self._generate_signals()
-
-        # --- Inicialización de variables de la simulación ---
-        cash = self.initial_cash
-        position = 0.0  # Cantidad de activo en posesión (>0 para largo, <0 para corto)
-        entry_price = 0.0
-        portfolio_values = []
-
-        # --- Bucle principal de la simulación ---
-        for i in range(1, len(self.data)):
-            current_price = self.data[self.price_col].iloc[i]
-
-            # 1. Lógica de CIERRE de posición (por Stop-Loss o Take-Profit)
-            if position > 0:  # Si estamos en una posición larga (comprado)
-                stop_loss_price = entry_price * (1 - stop_loss_pct)
-                take_profit_price = entry_price * (1 + take_profit_pct)
-                if current_price <= stop_loss_price or current_price >= take_profit_price:
-                    cash += position * current_price * (1 - self.commission)
-                    position = 0.0
-
-            elif position < 0:  # Si estamos en una posición corta (vendido)
-                stop_loss_price = entry_price * (1 + stop_loss_pct)
-                take_profit_price = entry_price * (1 - take_profit_pct)
-                if current_price >= stop_loss_price or current_price <= take_profit_price:
-                    cash -= abs(position) * current_price * (1 + self.commission)
-                    position = 0.0
-
-            # 2. Lógica de APERTURA de posición (si no hay una posición abierta)
-            if position == 0:
-                if self.data['buy_signal'].iloc[i]:
-                    investment_amount = cash * n_shares
-                    cost = investment_amount * (1 + self.commission)
-                    if cash > cost:  # Asegurarse de tener suficiente capital
-                        cash -= cost
-                        position = investment_amount / current_price
-                        entry_price = current_price
-
-                elif self.data['sell_signal'].iloc[i]:
-                    investment_amount = cash * n_shares
-                    proceeds = investment_amount * (1 - self.commission)
-                    cash += proceeds
-                    position = - (investment_amount / current_price)
-                    entry_price = current_price
-
-            # 3. Cálculo del valor total del portafolio en el tiempo actual
-            portfolio_value = cash
-            if position > 0:
-                portfolio_value += position * current_price
-            elif position < 0:
-                # CORRECCIÓN IMPORTANTE: El valor del portafolio en una posición corta
-                # es el efectivo total MENOS el costo actual para cerrar la posición (la obligación).
-                portfolio_value = cash - (abs(position) * current_price)
-
-            portfolio_values.append(portfolio_value)
+        portfolio_values, int_fields, float_fields = self._simulate(simulate_with_trades,
+                                                                    simulate_intrabar_with_trades)
+        self.trade_log = TradeLog(self.data.index, int_fields, float_fields)
 
         # --- Retorno de resultados ---
         if return_value_series:
             return pd.Series(portfolio_values, index=self.data.index[1:])
 
-        return portfolio_values[-1] if portfolio_values else self.initial_cash
\ No newline at end of file
+        return portfolio_values[-1] if len(portfolio_values) else self.initial_cash
+
+    def run_metrics(self):
+        """
+        Ejecuta la simulación calculando solo las métricas de rendimiento en línea.
+
+        No se construye la serie de valores del portafolio ni el registro de
+        operaciones: el núcleo (engine.simulate_metrics) mantiene el primer y
+        el último valor, el máximo y el drawdown máximo con memoria constante.
+        Es la ruta rápida para el optimizador, que solo necesita el Calmar Ratio.
+
+        Returns:
+            dict: 'first_value', 'last_value', 'peak', 'max_drawdown' (positivo,
+                  como fracción del máximo), 'n_values' y las fechas 'start' y
+                  'end' del primer y el último valor (None si no hay valores).
+        """
+        metrics = self._simulate(simulate_metrics, simulate_intrabar_metrics)
+        n_values = int(metrics[METRIC_COUNT])
+        return {
+            'first_value': float(metrics[METRIC_FIRST]),
+            'last_value': float(metrics[METRIC_LAST]),
+            'peak': float(metrics[METRIC_PEAK]),
+            'max_drawdown': abs(float(metrics[METRIC_MIN_DRAWDOWN])),
+            'n_values': n_values,
+            'start': self.data.index[1] if n_values else None,
+            'end': self.data.index[-1] if n_values else None,
+        }
+
+    def run_batch(self, params_list, return_value_series=False):
+        """
+        Simula varios conjuntos de parámetros sobre los mismos datos en una sola pasada.
+
+        Construye una matriz de señales (N_parámetros x N_velas) y vectores de
+        stop_loss, take_profit y n_shares, y simula los N portafolios en paralelo
+        con el núcleo compilado (engine.simulate_batch). Cada portafolio sigue
+        exactamente la misma lógica que run().
+
+        Args:
+            params_list (list[dict]): Los conjuntos de parámetros a evaluar. self.data
+                                      debe contener las columnas de indicadores
+                                      de todos ellos.
+            return_value_series (bool): Si es True, retorna la matriz de valores del
+                                        portafolio. Si es False, retorna solo el
+                                        vector de valores finales.
+        Returns:
+            pd.DataFrame or np.ndarray: Un DataFrame (velas x parámetros) con la
+                                        evolución de cada portafolio, o un arreglo
+                                        con el valor final de cada uno.
+        """
+        n_params = len(params_list)
+        n_bars = len(self.data)
+
+        # --- Construcción de la matriz de señales y de los vectores de riesgo ---
+        buy_signals = np.zeros((n_params, n_bars), dtype=np.bool_)
+        sell_signals = np.zeros((n_params, n_bars), dtype=np.bool_)
+        stop_loss_pcts = np.empty(n_params)
+        take_profit_pcts = np.empty(n_params)
+        n_shares = np.empty(n_params)
+
+        # Las señales solo dependen de los parámetros de indicadores y del umbral
+        # de ADX, por lo que se calculan una sola vez por combinación distinta.
+        signals_cache = {}
+        for j, params in enumerate(params_list):
+            signal_key = tuple(params.get(key) for key in SIGNAL_PARAM_KEYS)
+            if signal_key not in signals_cache:
+                buy_signal, sell_signal = self._compute_signals(params)
+                signals_cache[signal_key] = (buy_signal.to_numpy(dtype=np.bool_),
+                                             sell_signal.to_numpy(dtype=np.bool_))
+            buy_signals[j], sell_signals[j] = signals_cache[signal_key]
+            stop_loss_pcts[j] = params.get('stop_loss')
+            take_profit_pcts[j] = params.get('take_profit')
+            n_shares[j] = params.get('n_shares')
+
+        close = np.ascontiguousarray(self.data[self.price_col].to_numpy(dtype=np.float64))
+
+        # --- Simulación compilada de todos los portafolios ---
+        final_values, portfolio_values = simulate_batch(close, buy_signals, sell_signals,
+                                                        stop_loss_pcts, take_profit_pcts, n_shares,
+                                                        float(self.initial_cash), float(self.commission),
+                                                        return_value_series)
+
+        # --- Retorno de resultados ---
+        if return_value_series:
+            return pd.DataFrame(portfolio_values.T, index=self.data.index[1:])
+
+        return final_values
+
+
+class PortfolioBacktester:
+    """
+    Motor de backtesting de una cartera de varios activos con capital compartido.
+
+    Aplica la misma estrategia que Backtester a todos los activos de un
+    MarketPanel: las señales de cada activo se calculan con sus propios
+    indicadores y se alinean en matrices (N_activos x N_velas), y la simulación
+    de todas las posiciones, con una única caja común, se realiza en una sola
+    pasada compilada (engine.simulate_portfolio).
+
+    Attributes:
+        panel (MarketPanel): Los datos de mercado de todos los activos.
+        params (dict): Diccionario con los parámetros de la estrategia.
+        initial_cash (float): Capital inicial de la cartera.
+        commission (float): Costo por operación (comisión del broker).
+        price_col (str): Nombre del campo de precios a utilizar (ej. 'close').
+    """
+
+    def __init__(self, panel, params):
+        """
+        Inicializa el motor de backtesting de cartera.
+
+        Args:
+            panel (MarketPanel): Los datos de mercado alineados (ver load_panel()).
+            params (dict): Los parámetros de la estrategia (indicadores y riesgo).
+        """
+        self.panel = panel
+        self.params = params
+        self.initial_cash = INITIAL_CASH
+        self.commission = COMMISSION
+        self.price_col = 'close'
+
+    def _signal_matrices(self):
+        """
+        Calcula las matrices de señales de compra y venta de todos los activos.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Las matrices (N_activos x N_velas) de
+                                           señales de compra y de venta. Las velas
+                                           sin indicadores no generan señales.
+        """
+        indicator_params = {key: self.params[key]
+                            for key in ('ema_len', 'macd_fast', 'macd_slow', 'macd_signal', 'adx_len')}
+        shape = (len(self.panel.symbols), len(self.panel.index))
+        buy_signals = np.zeros(shape, dtype=np.bool_)
+        sell_signals = np.zeros(shape, dtype=np.bool_)
+
+        for s, symbol in enumerate(self.panel.symbols):
+            data = add_indicators(self.panel.frame(symbol), **indicator_params)
+            if data is None or data.empty:
+                continue
+            buy_signal, sell_signal = Backtester(data, self.params, copy=False)._compute_signals(self.params)
+            positions = self.panel.index.get_indexer(data.index)
+            buy_signals[s, positions] = buy_signal.to_numpy(dtype=np.bool_)
+            sell_signals[s, positions] = sell_signal.to_numpy(dtype=np.bool_)
+
+        return buy_signals, sell_signals
+
+    def run(self, return_value_series=False):
+        """
+        Ejecuta la simulación de la cartera.
+
+        Args:
+            return_value_series (bool): Si es True, retorna una serie de Pandas
+                                        con el valor de la cartera en cada punto
+                                        del tiempo. Si es False, retorna solo el
+                                        valor final.
+        Returns:
+            pd.Series or float: La serie de tiempo del valor de la cartera o el valor final.
+        """
+        buy_signals, sell_signals = self._signal_matrices()
+        close = self.panel.field(self.price_col)
+
+        portfolio_values, _ = simulate_portfolio(close, buy_signals, sell_signals,
+                                                 float(self.params.get('stop_loss')),
+                                                 float(self.params.get('take_profit')),
+                                                 float(self.params.get('n_shares')),
+                                                 float(self.initial_cash), float(self.commission))
+
+        if return_value_series:
+            return pd.Series(portfolio_values, index=self.panel.index[1:])
+
+        return portfolio_values[-1] if len(portfolio_values) else self.initial_cash
\ No newline at end of file
@@ -10,10 +10,111 @@ que alterar el código fuente de los módulos principales.
 # Ruta relativa al archivo CSV que contiene los datos históricos de mercado.
 DATA_PATH = 'Binance_BTCUSDT_1h.csv'
 
+# Si es True, los datos limpios se guardan en una caché columnar (Feather) junto
+# al CSV y se reutilizan mientras el archivo de origen no cambie.
+DATA_CACHE_ENABLED = True
+
+# Formato de la caché: 'feather' (un archivo columnar Arrow) o 'npy' (un
+# directorio de arreglos .npy que varios procesos pueden mapear en memoria
+# compartiendo las mismas páginas).
+DATA_CACHE_FORMAT = 'feather'
+
+# Tipo de las columnas de precios en el almacén .npy ('float64' o 'float32').
+NPY_STORE_DTYPE = 'float64'
+
+# Número de filas que se leen por bloque al construir el almacén .npy a partir
+# del CSV (ingesta por bloques, con memoria acotada).
+INGEST_CHUNK_SIZE = 500_000
+# Número de filas por bloque al añadir velas nuevas a un almacén existente. Es
+# pequeño para que, en un CSV descendente, la lectura se detenga pronto.
+UPDATE_CHUNK_SIZE = 5_000
+
+# Patrón (glob) de los CSV de Binance que forman el panel multi-activo, y número
+# de hilos con los que se cargan en paralelo.
+PANEL_PATTERN = 'Binance_*USDT_1h.csv'
+PANEL_MAX_WORKERS = 8
+
 # --- Parámetros de la Simulación de Backtesting ---
 # Capital inicial (en USD) para todas las simulaciones.
 INITIAL_CASH = 1_000_000
 
 # Comisión por operación (porcentaje). Representa el costo de transacción
 # del broker. Ejemplo: 0.00125 equivale a 0.125%.
-COMMISSION = 0.00125
\ No newline at end of file
+COMMISSION = 0.00125
+
+# Modo de ejecución del stop-loss/take-profit: 'close' (se comprueban contra el
+# precio de cierre) o 'intrabar' (se detectan los toques con el máximo y el
+# mínimo de cada vela y se ejecutan al precio del nivel).
+EXECUTION_MODE = 'close'
+# En modo 'intrabar', qué nivel se asume tocado primero cuando una vela toca
+# ambos: 'stop_loss' (pesimista), 'take_profit' o 'nearest' (el más cercano a
+# la apertura).
+INTRABAR_TIE_BREAK = 'stop_loss'
+
+# --- Parámetros de los Indicadores ---
+# Implementación de los indicadores técnicos: 'native' (núcleos compilados con
+# Numba de native_indicators.py) o 'pandas_ta' (la librería pandas-ta).
+INDICATOR_BACKEND = 'native'
+# Tolerancia máxima (error absoluto relativo a la escala de cada serie) entre
+# el backend nativo y pandas-ta al validarlos (ver validate_native_backend()).
+INDICATOR_TOLERANCE = 1e-9
+
+# --- Parámetros de la Caché de Indicadores ---
+# Memoria máxima (en bytes) que ocupan los resultados de indicadores (por
+# indicador, longitud y datos) que se conservan para reutilizarlos entre pruebas
+# de Optuna. Con unas 44.000 velas horarias, cada serie ocupa menos de 1 MB, un
+# MACD unos 1,4 MB y la matriz de EMA unos 70 MB, por lo que el límite se
+# expresa en bytes y no en número de resultados. Al superarse se descartan los
+# menos usados recientemente (LRU).
+INDICATOR_CACHE_BYTES = 512 * 1024 ** 2
+# Rango de períodos de EMA que se precalculan en una sola matriz (EmaMatrix).
+# Cubre la EMA de tendencia (50-200) y las EMA rápida/lenta del MACD (7-50)
+# del espacio de búsqueda del optimizador.
+EMA_MATRIX_MIN_LEN = 7
+EMA_MATRIX_MAX_LEN = 200
+
+# --- Parámetros de la Optimización ---
+# Número de procesos que ejecutan pruebas de Optuna en paralelo. Con 1 la
+# optimización corre en el proceso principal.
+N_JOBS = 1
+# Número de hilos con los que se evalúan en paralelo los segmentos del
+# Walk-Forward de una misma prueba (útil con pocas pruebas sobre históricos
+# largos). El núcleo compilado libera el GIL durante la simulación.
+FOLD_WORKERS = 1
+# Estrategia de poda (pruning) de Optuna para detener pruebas poco prometedoras
+# tras los primeros segmentos del Walk-Forward. Opciones: 'median', 'halving',
+# 'hyperband' o 'none'.
+OPTUNA_PRUNER = 'median'
+# Almacenamiento persistente de los estudios de Optuna: una URL de base de
+# datos (p. ej. 'sqlite:///optuna_studies.db') o la ruta de un archivo de
+# journal (p. ej. 'optuna_journal.log'). Con None el estudio vive en memoria
+# y se pierde al terminar. Un estudio existente con el mismo nombre se reanuda.
+STUDY_STORAGE = None
+STUDY_NAME = 'estrategia_ema_macd_adx'
+# Intervalo (segundos) del latido de las pruebas en curso. Al reanudar un
+# estudio solo se marcan como fallidas las pruebas en curso cuyo último latido
+# tiene más de dos intervalos, es decir, las de procesos que ya no existen.
+STUDY_HEARTBEAT_INTERVAL = 60
+# Si es True, el valor objetivo de cada combinación de parámetros se guarda en
+# una base de datos SQLite y las repeticiones (en esta u otras ejecuciones) se
+# resuelven sin volver a simular. La clave incluye los datos, el Walk-Forward y
+# la versión del motor, por lo que los resultados obsoletos no se reutilizan.
+# Está desactivada por defecto porque crea el archivo TRIAL_CACHE_PATH
+# (relativo al directorio de trabajo).
+TRIAL_CACHE_ENABLED = False
+TRIAL_CACHE_PATH = 'trial_cache.sqlite'
+
+# --- Parámetros del Walk-Forward ---
+# Modo de los segmentos: 'rolling' (ventana de entrenamiento fija que avanza),
+# 'anchored' (entrenamiento expansivo desde el inicio) o 'purged' (anclado,
+# con purga antes de cada segmento de prueba y embargo después).
+WALK_FORWARD_MODE = 'rolling'
+# Número de segmentos de prueba en los que se evalúa cada prueba de Optuna.
+WALK_FORWARD_SPLITS = 10
+# Velas de entrenamiento (ventana del modo 'rolling' y velas reservadas antes
+# del primer segmento de prueba).
+WALK_FORWARD_TRAIN_SIZE = 0
+# En modo 'purged', velas que se eliminan del final del entrenamiento y velas
+# que se omiten tras cada segmento de prueba.
+WALK_FORWARD_PURGE = 0
+WALK_FORWARD_EMBARGO = 0
\ No newline at end of file
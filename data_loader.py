@@ -1,8 +1,25 @@
+import glob
+import hashlib
+import io
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
 import pandas as pd
-from config import DATA_PATH
+from config import DATA_PATH, DATA_CACHE_ENABLED, DATA_CACHE_FORMAT, NPY_STORE_DTYPE, INGEST_CHUNK_SIZE, UPDATE_CHUNK_SIZE
+from config import PANEL_PATTERN, PANEL_MAX_WORKERS
+
+try:
+    import pyarrow as pa
+    from pyarrow import feather
+except ImportError:  # La caché columnar es opcional.
+    pa = None
+    feather = None
 
 
-def load_data():
+def load_data(path=DATA_PATH, use_cache=DATA_CACHE_ENABLED, cache_format=DATA_CACHE_FORMAT):
     """
     Carga, limpia y valida los datos históricos de precios desde un archivo CSV.
 
@@ -17,62 +34,1235 @@ def load_data():
     - Verificación de la existencia de las columnas requeridas (OHLCV).
     - Selección final de las columnas necesarias para el análisis.
 
+    El resultado se guarda en una caché binaria junto al CSV, etiquetada con el
+    tamaño, la fecha de modificación y el hash del archivo de origen. Mientras
+    el CSV no cambie, las siguientes ejecuciones leen la caché mediante
+    memory-mapping en lugar de volver a procesar el texto. Hay dos formatos:
+    - 'feather': un archivo columnar Feather/Arrow.
+    - 'npy': un directorio de arreglos .npy (ver save_npy_store()), cuyas
+      páginas comparten todos los procesos a través de la caché del sistema
+      operativo. Se construye por bloques con ingest_csv_streaming(), por lo
+      que la memoria no crece con el tamaño del CSV, y si el CSV solo ha
+      crecido se le añaden únicamente las velas nuevas (update_npy_store()).
+
+    Efecto secundario: con la caché activada (DATA_CACHE_ENABLED, por defecto)
+    se escribe en el directorio del CSV un archivo '<nombre>.feather' o un
+    directorio '<nombre>_npy/' (ambos excluidos en '.gitignore'). Use
+    use_cache=False para no escribir nada junto al CSV.
+
+    Args:
+        path (str): Ruta del archivo CSV. Por defecto, la de 'config.py'.
+        use_cache (bool): Si es True, se utiliza (y actualiza) la caché binaria.
+        cache_format (str): Formato de la caché: 'feather' o 'npy'.
+
     Returns:
         pd.DataFrame: Un DataFrame limpio, validado y listo para el análisis.
                       Retorna None si ocurre un error durante la carga o el
                       procesamiento.
     """
     try:
-        # --- 1. Carga inicial y estandarización ---
-        df = pd.read_csv(DATA_PATH)
-        # Se normalizan los nombres de columnas a minúsculas y sin espacios.
-        df.columns = [col.strip().lower() for col in df.columns]
-
-        # --- 2. Procesamiento de la columna de fecha ---
-        # Se convierte la columna 'date' a formato datetime.
-        # 'errors=coerce' transforma cualquier formato de fecha inválido en NaT (Not a Time).
-        df['date'] = pd.to_datetime(df['date'], format='%d/%m/%Y %H:%M', errors='coerce')
-
-        # Se eliminan las filas que no pudieron ser convertidas a una fecha válida.
-        initial_rows = len(df)
-        df.dropna(subset=['date'], inplace=True)
-        final_rows = len(df)
-
-        if initial_rows > final_rows:
-            rows_dropped = initial_rows - final_rows
-            print(f"  - Información: Se eliminaron {rows_dropped} filas con formato de fecha inválido.")
-
-        # --- 3. Indexación y limpieza de duplicados ---
-        df.set_index('date', inplace=True)
-
-        if df.index.has_duplicates:
-            duplicates_count = df.index.duplicated().sum()
-            print(f"  - Información: Se encontraron y eliminaron {duplicates_count} registros duplicados.")
-            df = df[~df.index.duplicated(keep='first')]
+        if use_cache and cache_format == 'npy':
+            cached_df = _read_npy_cache(path)
+            if cached_df is None:
+                cached_df = npy_store_to_frame(_refresh_npy_cache(path))
+            return cached_df
 
-        # Se ordena el índice para asegurar la cronología de la serie de tiempo.
-        df.sort_index(inplace=True)
+        use_cache = use_cache and feather is not None
+        if use_cache:
+            cached_df = _read_feather_cache(path)
+            if cached_df is not None:
+                return cached_df
 
-        # --- 4. Validación y selección de columnas ---
-        # Se renombra 'volume usdt' a 'volume' por compatibilidad con librerías.
-        if 'volume usdt' in df.columns:
-            df.rename(columns={'volume usdt': 'volume'}, inplace=True)
+        final_df = _read_csv(path)
 
-        required_cols = ['open', 'high', 'low', 'close', 'volume']
-        if not all(col in df.columns for col in required_cols):
-            raise KeyError(f"Error de validación: Una o más columnas requeridas ({required_cols}) no se encontraron.")
-
-        # Se retorna una copia del DataFrame solo con las columnas necesarias.
-        final_df = df[required_cols].copy()
+        if use_cache:
+            _write_feather_cache(final_df, path)
 
         return final_df
 
     except FileNotFoundError:
-        print(f"  - Error Crítico: No se encontró el archivo de datos en la ruta especificada: {DATA_PATH}")
+        print(f"  - Error Crítico: No se encontró el archivo de datos en la ruta especificada: {path}")
         return None
     except KeyError as e:
         print(f"  - Error Crítico: {e}")
         return None
     except Exception as e:
         print(f"  - Error Crítico: Ocurrió un error inesperado al procesar los datos: {e}")
-        return None
\ No newline at end of file
+        return None
+
+
+# Formato fijo de las fechas de Binance: 'dd/mm/YYYY HH:MM' (16 caracteres).
+_DATE_WIDTH = 16
+_DATE_DIGITS = [0, 1, 3, 4, 6, 7, 8, 9, 11, 12, 14, 15]
+_DATE_SEPARATORS = {2: ord('/'), 5: ord('/'), 10: ord(' '), 13: ord(':')}
+_NS_PER_MINUTE = 60 * 1_000_000_000
+
+
+def _parse_dates(dates):
+    """
+    Convierte las fechas de Binance ('%d/%m/%Y %H:%M') a datetime.
+
+    Las fechas con el ancho fijo del formato se interpretan de forma vectorizada:
+    el texto se ve como una matriz de bytes, los dígitos se combinan con
+    aritmética de NumPy y el día se convierte a días desde 1970 con el algoritmo
+    'days from civil'. Las filas que no pasan la validación (otro ancho,
+    separadores o rangos inválidos) se delegan a pd.to_datetime, por lo que el
+    resultado es idéntico al de la conversión original.
+
+    Args:
+        dates (pd.Series): Columna de fechas como texto.
+
+    Returns:
+        pd.Series: Las fechas convertidas; las inválidas se convierten en NaT.
+    """
+    try:
+        # Un byte extra permite detectar los textos más largos que el formato.
+        raw = np.asarray(dates, dtype=object).astype(f'S{_DATE_WIDTH + 1}')
+    except (UnicodeEncodeError, TypeError, ValueError):
+        return pd.to_datetime(dates, format='%d/%m/%Y %H:%M', errors='coerce')
+
+    chars = raw.view(np.uint8).reshape(len(raw), _DATE_WIDTH + 1)
+    digits = chars[:, _DATE_DIGITS].astype(np.int64) - ord('0')
+
+    valid = (chars[:, _DATE_WIDTH] == 0) & ((digits >= 0) & (digits <= 9)).all(axis=1)
+    for position, separator in _DATE_SEPARATORS.items():
+        valid &= chars[:, position] == separator
+
+    day = digits[:, 0] * 10 + digits[:, 1]
+    month = digits[:, 2] * 10 + digits[:, 3]
+    year = digits[:, 4] * 1000 + digits[:, 5] * 100 + digits[:, 6] * 10 + digits[:, 7]
+    hour = digits[:, 8] * 10 + digits[:, 9]
+    minute = digits[:, 10] * 10 + digits[:, 11]
+
+    leap = ((year % 4 == 0) & (year % 100 != 0)) | (year % 400 == 0)
+    month_days = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])[np.clip(month, 1, 12) - 1]
+    month_days += (month == 2) & leap
+    valid &= (month >= 1) & (month <= 12) & (day >= 1) & (day <= month_days)
+    valid &= (hour <= 23) & (minute <= 59)
+    # Los años en los límites del rango de datetime64[ns] se dejan a Pandas.
+    valid &= (year > 1677) & (year < 2262)
+
+    # Días desde 1970-01-01 (algoritmo 'days from civil' de H. Hinnant).
+    shifted_year = year - (month <= 2)
+    era = shifted_year // 400
+    year_of_era = shifted_year - era * 400
+    day_of_year = (153 * (month + np.where(month > 2, -3, 9)) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    days = era * 146097 + day_of_era - 719468
+
+    minutes = days * 1440 + hour * 60 + minute
+    timestamps = np.where(valid, minutes * _NS_PER_MINUTE, np.iinfo(np.int64).min).view('datetime64[ns]')
+    parsed = pd.Series(timestamps, index=dates.index, name=dates.name)
+
+    if not valid.all():
+        # Las filas que no siguen el formato fijo se convierten con Pandas
+        # (o quedan como NaT si tampoco son válidas para él).
+        invalid = ~valid
+        parsed[invalid] = pd.to_datetime(dates[invalid], format='%d/%m/%Y %H:%M', errors='coerce')
+    return parsed
+
+
+def _read_csv(path):
+    """
+    Lee y limpia el archivo CSV de Binance (ver load_data()).
+
+    Args:
+        path (str): Ruta del archivo CSV.
+
+    Returns:
+        pd.DataFrame: Los datos OHLCV limpios, indexados y ordenados por fecha.
+    """
+    # --- 1. Carga inicial y estandarización ---
+    df = pd.read_csv(path)
+    # Se normalizan los nombres de columnas a minúsculas y sin espacios.
+    df.columns = [col.strip().lower() for col in df.columns]
+
+    # --- 2. Procesamiento de la columna de fecha ---
+    # Se convierte la columna 'date' a formato datetime.
+    # 'errors=coerce' transforma cualquier formato de fecha inválido en NaT (Not a Time).
+    df['date'] = _parse_dates(df['date'])
+
+    # Se eliminan las filas que no pudieron ser convertidas a una fecha válida.
+    initial_rows = len(df)
+    df.dropna(subset=['date'], inplace=True)
+    final_rows = len(df)
+
+    if initial_rows > final_rows:
+        rows_dropped = initial_rows - final_rows
+        print(f"  - Información: Se eliminaron {rows_dropped} filas con formato de fecha inválido.")
+
+    # --- 3. Indexación y limpieza de duplicados ---
+    df.set_index('date', inplace=True)
+
+    if df.index.has_duplicates:
+        duplicates_count = df.index.duplicated().sum()
+        print(f"  - Información: Se encontraron y eliminaron {duplicates_count} registros duplicados.")
+        df = df[~df.index.duplicated(keep='first')]
+
+    # Se ordena el índice para asegurar la cronología de la serie de tiempo.
+    df.sort_index(inplace=True)
+
+    # --- 4. Validación y selección de columnas ---
+    # Se renombra 'volume usdt' a 'volume' por compatibilidad con librerías.
+    if 'volume usdt' in df.columns:
+        df.rename(columns={'volume usdt': 'volume'}, inplace=True)
+
+    required_cols = ['open', 'high', 'low', 'close', 'volume']
+    if not all(col in df.columns for col in required_cols):
+        raise KeyError(f"Error de validación: Una o más columnas requeridas ({required_cols}) no se encontraron.")
+
+    # Se retorna una copia del DataFrame solo con las columnas necesarias.
+    return df[required_cols].copy()
+
+
+def _file_hash(path):
+    """
+    Calcula el hash (BLAKE2b) del contenido de un archivo, leyéndolo por bloques.
+
+    Args:
+        path (str): Ruta del archivo.
+
+    Returns:
+        str: El hash hexadecimal del archivo.
+    """
+    with open(path, 'rb') as f:
+        return _hash_bytes(f, hashlib.blake2b(digest_size=16)).hexdigest()
+
+
+def _hash_bytes(f, digest, n_bytes=None):
+    """
+    Añade a un hash los bytes de un archivo a partir de su posición actual.
+
+    Args:
+        f (io.BufferedReader): El archivo, abierto en modo binario.
+        digest (hashlib.blake2b): El hash a actualizar.
+        n_bytes (int, optional): Número de bytes a leer. Por defecto, hasta el final.
+
+    Returns:
+        hashlib.blake2b: El hash actualizado.
+    """
+    remaining = n_bytes
+    while remaining is None or remaining > 0:
+        block = f.read(1 << 20 if remaining is None else min(1 << 20, remaining))
+        if not block:
+            break
+        digest.update(block)
+        if remaining is not None:
+            remaining -= len(block)
+    return digest
+
+
+def _source_tags(path):
+    """
+    Etiquetas que identifican la versión de un archivo de origen.
+
+    Args:
+        path (str): Ruta del archivo.
+
+    Returns:
+        dict: Tamaño, fecha de modificación (ns) y hash del archivo, como texto.
+    """
+    source_stat = os.stat(path)
+    return {
+        'source_size': str(source_stat.st_size),
+        'source_mtime_ns': str(source_stat.st_mtime_ns),
+        'source_hash': _file_hash(path),
+    }
+
+
+def _source_unchanged(tags, path):
+    """
+    Indica si un archivo de origen coincide con las etiquetas guardadas en una caché.
+
+    La caché es válida si el tamaño y la fecha de modificación coinciden. Si solo
+    coincide el tamaño (p. ej. el archivo se copió o se tocó), se compara además
+    el hash del contenido.
+
+    Args:
+        tags (dict): Etiquetas guardadas (ver _source_tags()).
+        path (str): Ruta del archivo de origen.
+
+    Returns:
+        bool: True si la caché corresponde al archivo actual.
+    """
+    source_stat = os.stat(path)
+    if tags.get('source_size') != str(source_stat.st_size):
+        return False
+    if tags.get('source_mtime_ns') != str(source_stat.st_mtime_ns):
+        return tags.get('source_hash') == _file_hash(path)
+    return True
+
+
+def _source_extension(tags, path):
+    """
+    Comprueba si un archivo de origen es el etiquetado en una caché con filas añadidas.
+
+    Se admiten los dos formatos de actualización de un CSV: filas añadidas al
+    final (orden ascendente) o justo después de la cabecera (orden descendente,
+    como los exporta Binance). En ambos casos el contenido anterior se conserva
+    byte a byte, lo que se comprueba con el hash guardado en las etiquetas.
+
+    El archivo se lee una sola vez: el mismo hash que verifica el prefijo
+    anterior continúa sobre los bytes nuevos y pasa a ser la nueva etiqueta.
+    El sufijo (caso descendente) solo se verifica en paralelo si el almacén
+    no consta como ascendente ('source_order').
+
+    Args:
+        tags (dict): Etiquetas guardadas (ver _source_tags()).
+        path (str): Ruta del archivo de origen.
+
+    Returns:
+        tuple[tuple[int, int], dict] or None: El rango de bytes [inicio, fin)
+            con las filas nuevas y las etiquetas del archivo actual, o None si
+            el archivo no contiene intacto el archivo etiquetado.
+    """
+    old_size = int(tags.get('source_size', -1))
+    source_stat = os.stat(path)
+    size = source_stat.st_size
+    if 'source_hash' not in tags or old_size < 0 or size <= old_size:
+        return None
+
+    with open(path, 'rb') as f:
+        header = f.readline()
+        f.seek(0)
+        # Filas añadidas tras la cabecera: el resto del archivo anterior empieza aquí.
+        tail_start = size - (old_size - len(header))
+        check_tail = tags.get('source_order') != 'ascending' and old_size >= len(header)
+        full_digest = hashlib.blake2b(digest_size=16)
+        tail_digest = hashlib.blake2b(header, digest_size=16)
+        prefix_hash = None
+
+        boundaries = sorted({0, old_size, size} | ({tail_start} if check_tail else set()))
+        for range_start, range_stop in zip(boundaries, boundaries[1:]):
+            for block in _read_blocks(f, range_stop - range_start):
+                full_digest.update(block)
+                if check_tail and range_start >= tail_start:
+                    tail_digest.update(block)
+            if range_stop == old_size:
+                prefix_hash = full_digest.copy().hexdigest()
+
+        # Las filas añadidas al final no deben prolongar la última fila anterior.
+        f.seek(max(old_size - 1, 0))
+        edge = f.read(2)
+        prefix_ends_line = edge[:1] == b'\n' or edge[1:2] in (b'\n', b'\r')
+
+    new_tags = {'source_size': str(size), 'source_mtime_ns': str(source_stat.st_mtime_ns),
+                'source_hash': full_digest.hexdigest()}
+    if prefix_hash == tags['source_hash'] and prefix_ends_line:
+        return (old_size, size), new_tags
+    if check_tail and tail_digest.hexdigest() == tags['source_hash']:
+        return (len(header), tail_start), new_tags
+    return None
+
+
+def _read_blocks(f, n_bytes):
+    """Lee n_bytes de un archivo, a partir de su posición actual, en bloques de 1 MiB."""
+    while n_bytes > 0:
+        block = f.read(min(1 << 20, n_bytes))
+        if not block:
+            break
+        n_bytes -= len(block)
+        yield block
+
+
+def _csv_slice(path, start, stop):
+    """
+    Extrae las filas de un rango de bytes de un CSV, precedidas de su cabecera.
+
+    Args:
+        path (str): Ruta del archivo CSV.
+        start (int): Primer byte del rango (inicio de una fila).
+        stop (int): Byte siguiente al último del rango.
+
+    Returns:
+        io.BytesIO: Un CSV en memoria con la cabecera y las filas del rango.
+    """
+    with open(path, 'rb') as f:
+        header = f.readline()
+        f.seek(start)
+        rows = f.read(stop - start)
+    if not header.endswith(b'\n'):
+        header += b'\n'
+    return io.BytesIO(header + rows)
+
+
+def _feather_cache_path(path):
+    """Retorna la ruta del archivo de caché Feather asociado a un CSV."""
+    return os.path.splitext(path)[0] + '.feather'
+
+
+def _read_feather_cache(path):
+    """
+    Lee la caché Feather de un CSV si existe y sigue siendo válida.
+
+    Args:
+        path (str): Ruta del archivo CSV de origen.
+
+    Returns:
+        pd.DataFrame or None: Los datos en caché, o None si no hay una caché válida.
+    """
+    cache_path = _feather_cache_path(path)
+    if not os.path.exists(cache_path):
+        return None
+
+    try:
+        table = feather.read_table(cache_path, memory_map=True)
+    except Exception:
+        return None
+
+    metadata = {key.decode(): value.decode() for key, value in (table.schema.metadata or {}).items()
+                if key.startswith(b'source_')}
+    if not _source_unchanged(metadata, path):
+        return None
+
+    print(f"  - Información: Datos cargados desde la caché columnar {cache_path}.")
+    return table.to_pandas()
+
+
+def _write_feather_cache(df, path):
+    """
+    Guarda los datos limpios en la caché Feather (sin compresión, para poder
+    leerla mediante memory-mapping), etiquetada con los datos del CSV.
+
+    Args:
+        df (pd.DataFrame): Los datos limpios.
+        path (str): Ruta del archivo CSV de origen.
+    """
+    table = pa.Table.from_pandas(df)
+    tags = {key.encode(): value.encode() for key, value in _source_tags(path).items()}
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), **tags})
+    try:
+        feather.write_feather(table, _feather_cache_path(path), compression='uncompressed')
+    except OSError as e:
+        print(f"  - Advertencia: No se pudo escribir la caché columnar: {e}")
+
+
+def _npy_store_dir(path):
+    """Retorna el directorio del almacén .npy asociado a un CSV."""
+    return os.path.splitext(path)[0] + '_npy'
+
+
+def save_npy_store(df, directory, dtype=NPY_STORE_DTYPE, tags=None):
+    """
+    Guarda datos OHLCV como un directorio de arreglos .npy sin procesar.
+
+    Se escribe un archivo 'index.npy' (marcas de tiempo int64 en nanosegundos),
+    un archivo '<columna>.npy' por columna numérica y un 'meta.json' con la
+    descripción del almacén: columnas, número de velas y la última marca de
+    tiempo guardada ('last_timestamp', usada por update_npy_store()).
+    'meta.json' se escribe al final, por lo que su presencia indica que el
+    almacén está completo.
+
+    Args:
+        df (pd.DataFrame): Datos con índice de fechas y columnas numéricas.
+        directory (str): Directorio de destino (se crea si no existe).
+        dtype (str): Tipo de las columnas de precios: 'float64' o 'float32'.
+        tags (dict, optional): Etiquetas adicionales para 'meta.json' (p. ej.
+                               las del archivo de origen).
+    """
+    os.makedirs(directory, exist_ok=True)
+    meta_path = os.path.join(directory, 'meta.json')
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+
+    index = df.index.to_numpy(dtype='datetime64[ns]').view(np.int64)
+    np.save(os.path.join(directory, 'index.npy'), index)
+    for col in df.columns:
+        np.save(os.path.join(directory, f'{col}.npy'), np.ascontiguousarray(df[col].to_numpy(dtype=dtype)))
+
+    meta = {'columns': list(df.columns), 'dtype': dtype, 'n_bars': len(df),
+            'last_timestamp': _last_timestamp(index), **(tags or {})}
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f)
+
+
+def open_npy_store(directory):
+    """
+    Abre un almacén .npy mediante memory-mapping (np.load con mmap_mode='r').
+
+    No se lee nada del disco hasta que se accede a los datos, y varios procesos
+    que abren el mismo almacén comparten las mismas páginas de la caché del
+    sistema operativo, sin que la memoria crezca con cada proceso.
+
+    Args:
+        directory (str): Directorio del almacén.
+
+    Returns:
+        tuple[np.ndarray, dict, dict]: Las marcas de tiempo (int64, ns), un
+                                       diccionario columna -> arreglo de solo
+                                       lectura y el contenido de 'meta.json'.
+    """
+    with open(os.path.join(directory, 'meta.json')) as f:
+        meta = json.load(f)
+    # Solo se consideran las 'n_bars' velas confirmadas en 'meta.json' (una
+    # actualización interrumpida puede haber dejado filas extra al final).
+    n_bars = meta['n_bars']
+    index = np.load(os.path.join(directory, 'index.npy'), mmap_mode='r')[:n_bars]
+    columns = {col: np.load(os.path.join(directory, f'{col}.npy'), mmap_mode='r')[:n_bars]
+               for col in meta['columns']}
+    return index, columns, meta
+
+
+def npy_store_to_frame(directory):
+    """
+    Construye un DataFrame cuyas columnas apuntan directamente a un almacén .npy.
+
+    Args:
+        directory (str): Directorio del almacén.
+
+    Returns:
+        pd.DataFrame: Los datos, respaldados por los archivos mapeados en memoria.
+    """
+    index, columns, _ = open_npy_store(directory)
+    date_index = pd.DatetimeIndex(np.asarray(index).view('datetime64[ns]'), name='date')
+    return pd.DataFrame(columns, index=date_index, copy=False)
+
+
+def _read_npy_cache(path):
+    """
+    Abre el almacén .npy de un CSV si existe y sigue siendo válido.
+
+    Args:
+        path (str): Ruta del archivo CSV de origen.
+
+    Returns:
+        pd.DataFrame or None: Los datos en caché, o None si no hay un almacén válido.
+    """
+    store_dir = _npy_store_dir(path)
+    try:
+        with open(os.path.join(store_dir, 'meta.json')) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if not _source_unchanged(meta, path):
+        return None
+
+    print(f"  - Información: Datos cargados desde el almacén .npy {store_dir}.")
+    return npy_store_to_frame(store_dir)
+
+
+def _refresh_npy_cache(path):
+    """
+    Reconstruye o actualiza el almacén .npy de un CSV que ha cambiado.
+
+    Si el CSV conserva intacto el archivo a partir del cual se generó el
+    almacén y solo se le añadieron filas (ver _source_extension()), el almacén se
+    actualiza de forma incremental. En cualquier otro caso (p. ej. el CSV se
+    editó o se volvió a exportar, o no hay almacén) se construye desde cero,
+    para no añadir velas nuevas a un histórico obsoleto.
+
+    Args:
+        path (str): Ruta del archivo CSV de origen.
+
+    Returns:
+        str: El directorio del almacén.
+    """
+    store_dir = _npy_store_dir(path)
+    try:
+        with open(os.path.join(store_dir, 'meta.json')) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        meta = None
+
+    extension = _source_extension(meta, path) if meta is not None else None
+    if extension is not None:
+        new_bytes, source_tags = extension
+        update_npy_store(path, store_dir, new_bytes=new_bytes, source_tags=source_tags)
+        return store_dir
+    if meta is not None:
+        print("  - Información: El CSV cambió desde que se generó el almacén .npy; se reconstruye.")
+    # El almacén se construye por bloques, sin cargar el CSV completo en memoria.
+    return ingest_csv_streaming(path, store_dir)
+
+
+def _last_timestamp(index):
+    """Retorna la última marca de tiempo (int, ns) de un índice, o None si está vacío."""
+    return int(index[-1]) if len(index) else None
+
+
+def update_npy_store(path, store_dir=None, chunksize=UPDATE_CHUNK_SIZE, new_bytes=None, source_tags=None):
+    """
+    Añade a un almacén .npy existente las velas de un CSV posteriores a su última fecha.
+
+    El almacén guarda en 'meta.json' la última marca de tiempo ('last_timestamp'),
+    que actúa como marca de agua: del CSV solo se conservan las filas con fecha
+    válida posterior a ella, por lo que no se vuelve a ordenar ni deduplicar el
+    histórico. Las filas nuevas se deduplican entre sí (conservando la primera
+    aparición, como load_data()) y se ordenan, con un coste proporcional solo a
+    su número.
+
+    El CSV se lee por bloques. Si está en orden descendente (como los exporta
+    Binance), la lectura se detiene en el primer bloque que alcanza la marca de
+    agua, de modo que una actualización diaria solo procesa las primeras filas.
+
+    Los arreglos se amplían en el propio archivo: los datos nuevos se escriben
+    al final y se reescribe la cabecera .npy con la nueva longitud (NumPy deja
+    espacio de relleno en la cabecera para ello). 'meta.json' se actualiza al
+    final, de modo que una actualización interrumpida no altera el almacén.
+
+    Args:
+        path (str): Ruta del CSV con las velas (el histórico completo actualizado
+                    o solo las velas nuevas).
+        store_dir (str, optional): Directorio del almacén. Por defecto, el asociado
+                                   al CSV; si es ese, se actualizan también sus
+                                   etiquetas de origen.
+        chunksize (int): Número de filas por bloque.
+        new_bytes (tuple[int, int], optional): Rango de bytes del CSV que contiene
+            las filas nuevas (ver _source_extension()). Si se indica, solo se lee
+            ese rango, con un coste proporcional al número de filas nuevas.
+        source_tags (dict, optional): Etiquetas ya calculadas del CSV (evita
+                                      volver a calcular su hash).
+
+    Returns:
+        int: El número de velas añadidas.
+    """
+    store_dir = store_dir or _npy_store_dir(path)
+    own_store = os.path.abspath(store_dir) == os.path.abspath(_npy_store_dir(path))
+    meta_path = os.path.join(store_dir, 'meta.json')
+    with open(meta_path) as f:
+        meta = json.load(f)
+
+    n_bars = meta['n_bars']
+    high_water_mark = meta.get('last_timestamp')
+    if high_water_mark is None and n_bars > 0:
+        high_water_mark = int(np.load(os.path.join(store_dir, 'index.npy'), mmap_mode='r')[n_bars - 1])
+    value_cols = meta['columns']
+
+    # --- 1. Lectura de las filas posteriores a la marca de agua ---
+    source_cols = _csv_columns(path)
+    new_chunks = []
+    descending = True
+    last_ts = None
+    source = path if new_bytes is None else _csv_slice(path, *new_bytes)
+    reader = pd.read_csv(source, usecols=list(source_cols.values()), chunksize=chunksize,
+                         dtype={source_cols[col]: np.float64 for col in value_cols} | {source_cols['date']: str})
+    for chunk in reader:
+        ts = _parse_dates(chunk[source_cols['date']]).to_numpy(dtype='datetime64[ns]').view(np.int64)
+        valid = ts != np.iinfo(np.int64).min
+        valid_ts = ts[valid]
+        if len(valid_ts) == 0:
+            continue
+
+        steps = np.diff(valid_ts) if last_ts is None else np.diff(np.concatenate(([last_ts], valid_ts)))
+        descending = descending and bool((steps <= 0).all())
+        last_ts = valid_ts[-1]
+
+        is_new = valid if high_water_mark is None else valid & (ts > high_water_mark)
+        if is_new.any():
+            new_chunks.append((ts[is_new], {col: chunk[source_cols[col]].to_numpy(dtype=meta['dtype'])[is_new]
+                                            for col in value_cols}))
+        # En un archivo descendente, todo lo que sigue a la marca de agua es más antiguo.
+        if descending and high_water_mark is not None and last_ts <= high_water_mark:
+            break
+
+    if not new_chunks:
+        if own_store:
+            _write_store_meta(meta_path, meta | (source_tags or _source_tags(path)))
+        print("  - Información: El almacén .npy ya está actualizado.")
+        return 0
+
+    # --- 2. Deduplicación y orden de las filas nuevas (O(filas nuevas)) ---
+    new_ts = np.concatenate([chunk_ts for chunk_ts, _ in new_chunks])
+    new_values = {col: np.concatenate([values[col] for _, values in new_chunks]) for col in value_cols}
+    keep = ~pd.Index(new_ts).duplicated(keep='first')
+    if not keep.all():
+        print(f"  - Información: Se encontraron y eliminaron {int((~keep).sum())} registros duplicados.")
+    new_ts = new_ts[keep]
+    new_values = {col: values[keep] for col, values in new_values.items()}
+
+    steps = np.diff(new_ts)
+    if (steps < 0).all():
+        order = slice(None, None, -1)
+    elif not (steps > 0).all():
+        order = np.argsort(new_ts, kind='stable')
+    else:
+        order = slice(None)
+    new_ts = new_ts[order]
+    new_values = {col: values[order] for col, values in new_values.items()}
+
+    # --- 3. Ampliación de los arreglos en disco ---
+    _append_npy(os.path.join(store_dir, 'index.npy'), n_bars, new_ts)
+    for col in value_cols:
+        _append_npy(os.path.join(store_dir, f'{col}.npy'), n_bars, new_values[col])
+
+    meta = meta | {'n_bars': n_bars + len(new_ts), 'last_timestamp': int(new_ts[-1])}
+    if own_store:
+        meta |= source_tags or _source_tags(path)
+    _write_store_meta(meta_path, meta)
+
+    print(f"  - Información: Se añadieron {len(new_ts)} velas nuevas al almacén .npy {store_dir}.")
+    return len(new_ts)
+
+
+def _write_store_meta(meta_path, meta):
+    """Reemplaza 'meta.json' de forma atómica (se escribe aparte y se renombra)."""
+    tmp_path = meta_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, meta_path)
+
+
+def _append_npy(file_path, n_rows, values):
+    """
+    Añade valores al final de un arreglo .npy 1-D sin reescribir el archivo.
+
+    Los valores se escriben a continuación de las 'n_rows' filas confirmadas
+    (descartando cualquier resto de una actualización interrumpida) y después
+    se reescribe la cabecera con la nueva longitud. Si la nueva cabecera no
+    cupiera en el espacio de la anterior, se reescribe el archivo completo.
+
+    Args:
+        file_path (str): Ruta del archivo .npy.
+        n_rows (int): Número de filas confirmadas en el archivo.
+        values (np.ndarray): Valores a añadir.
+    """
+    with open(file_path, 'r+b') as f:
+        version = np.lib.format.read_magic(f)
+        read_header = np.lib.format.read_array_header_1_0 if version == (1, 0) else np.lib.format.read_array_header_2_0
+        _, fortran_order, dtype = read_header(f)
+        header_size = f.tell()
+
+        header = io.BytesIO()
+        write_header = np.lib.format.write_array_header_1_0 if version == (1, 0) else np.lib.format.write_array_header_2_0
+        write_header(header, {'descr': np.lib.format.dtype_to_descr(dtype),
+                              'fortran_order': fortran_order, 'shape': (n_rows + len(values),)})
+
+        if len(header.getvalue()) == header_size:
+            f.seek(header_size + n_rows * dtype.itemsize)
+            f.write(np.ascontiguousarray(values, dtype=dtype).tobytes())
+            f.truncate()
+            f.flush()
+            f.seek(0)
+            f.write(header.getvalue())
+            return
+
+    existing = np.load(file_path)[:n_rows]
+    np.save(file_path, np.concatenate([existing, values.astype(dtype)]))
+
+
+def _csv_columns(path):
+    """
+    Determina qué columnas del CSV de Binance se necesitan y cómo se llaman.
+
+    Args:
+        path (str): Ruta del archivo CSV.
+
+    Returns:
+        dict: Nombre normalizado ('date', 'open', ..., 'volume') -> nombre original.
+    """
+    header = pd.read_csv(path, nrows=0).columns
+    normalized = {col.strip().lower(): col for col in header}
+    # Se usa 'volume usdt' como 'volume' por compatibilidad con librerías.
+    if 'volume usdt' in normalized:
+        normalized['volume'] = normalized['volume usdt']
+
+    required_cols = ['date', 'open', 'high', 'low', 'close', 'volume']
+    if not all(col in normalized for col in required_cols):
+        raise KeyError(f"Error de validación: Una o más columnas requeridas ({required_cols[1:]}) no se encontraron.")
+    return {col: normalized[col] for col in required_cols}
+
+
+def ingest_csv_streaming(path, store_dir=None, chunksize=INGEST_CHUNK_SIZE, dtype=NPY_STORE_DTYPE):
+    """
+    Convierte un CSV de Binance en un almacén .npy procesándolo por bloques.
+
+    Aplica la misma limpieza que load_data() (fechas inválidas, duplicados y
+    orden cronológico) sin cargar nunca el archivo completo en memoria:
+    1. El CSV se lee en bloques de 'chunksize' filas, solo con las columnas
+       necesarias y con tipos explícitos. Cada bloque se limpia de fechas
+       inválidas y se añade a archivos binarios temporales en disco.
+    2. Durante la lectura se detecta si el archivo ya está ordenado (de forma
+       ascendente o descendente, como los exporta Binance). En ese caso los
+       duplicados son contiguos y el almacén final se escribe por bloques
+       recorriendo los temporales en el orden adecuado, con memoria acotada.
+       Solo si el archivo está desordenado se ordena la columna de marcas de
+       tiempo (16 bytes por fila, independientemente del ancho del CSV).
+    En ambos casos se conserva la primera aparición de cada fecha, igual que
+    load_data().
+
+    Args:
+        path (str): Ruta del archivo CSV.
+        store_dir (str, optional): Directorio del almacén. Por defecto, el asociado
+                                   al CSV ('<nombre>_npy').
+        chunksize (int): Número de filas por bloque.
+        dtype (str): Tipo de las columnas de precios: 'float64' o 'float32'.
+
+    Returns:
+        str: El directorio del almacén generado.
+    """
+    store_dir = store_dir or _npy_store_dir(path)
+    os.makedirs(store_dir, exist_ok=True)
+    meta_path = os.path.join(store_dir, 'meta.json')
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+
+    source_cols = _csv_columns(path)
+    value_cols = [col for col in source_cols if col != 'date']
+    tmp_paths = {col: os.path.join(store_dir, f'_tmp_{col}.bin') for col in ['index'] + value_cols}
+
+    # --- 1. Lectura por bloques hacia archivos temporales ---
+    n_rows = 0
+    invalid_rows = 0
+    adjacent_duplicates = 0
+    ascending = descending = True
+    last_ts = None
+    tmp_files = {col: open(tmp_path, 'wb') for col, tmp_path in tmp_paths.items()}
+    try:
+        reader = pd.read_csv(path, usecols=list(source_cols.values()), chunksize=chunksize,
+                             dtype={source_cols[col]: np.float64 for col in value_cols} | {source_cols['date']: str})
+        for chunk in reader:
+            dates = _parse_dates(chunk[source_cols['date']])
+            valid = dates.notna().to_numpy()
+            invalid_rows += int((~valid).sum())
+
+            ts = dates.to_numpy(dtype='datetime64[ns]')[valid].view(np.int64)
+            if len(ts) == 0:
+                continue
+            # Se sigue el orden del archivo y los duplicados contiguos entre bloques.
+            steps = np.diff(ts) if last_ts is None else np.diff(np.concatenate(([last_ts], ts)))
+            ascending = ascending and bool((steps >= 0).all())
+            descending = descending and bool((steps <= 0).all())
+            adjacent_duplicates += int((steps == 0).sum())
+            last_ts = ts[-1]
+
+            ts.tofile(tmp_files['index'])
+            for col in value_cols:
+                chunk[source_cols[col]].to_numpy(dtype=dtype)[valid].tofile(tmp_files[col])
+            n_rows += len(ts)
+    finally:
+        for tmp_file in tmp_files.values():
+            tmp_file.close()
+
+    if invalid_rows:
+        print(f"  - Información: Se eliminaron {invalid_rows} filas con formato de fecha inválido.")
+
+    # --- 2. Orden cronológico y eliminación de duplicados ---
+    raw = {col: np.memmap(tmp_path, dtype=np.int64 if col == 'index' else dtype, mode='r', shape=(n_rows,))
+           if n_rows else np.empty(0, dtype=np.int64 if col == 'index' else dtype)
+           for col, tmp_path in tmp_paths.items()}
+    raw_ts = raw['index']
+
+    if ascending or descending:
+        n_out = n_rows - adjacent_duplicates
+        order = None
+    else:
+        # Archivo desordenado: solo se ordenan las marcas de tiempo (orden estable,
+        # para conservar la primera aparición de cada fecha).
+        order = np.argsort(raw_ts, kind='stable')
+        sorted_ts = raw_ts[order]
+        keep = np.ones(n_rows, dtype=bool)
+        keep[1:] = sorted_ts[1:] != sorted_ts[:-1]
+        order = order[keep]
+        del sorted_ts, keep
+        n_out = len(order)
+
+    if n_rows > n_out:
+        print(f"  - Información: Se encontraron y eliminaron {n_rows - n_out} registros duplicados.")
+
+    out = {col: np.lib.format.open_memmap(os.path.join(store_dir, f'{col}.npy'), mode='w+',
+                                          dtype=raw[col].dtype, shape=(n_out,))
+           for col in raw}
+    written = 0
+    for positions in _output_positions(raw_ts, order, ascending, chunksize):
+        for col in raw:
+            out[col][written:written + len(positions)] = raw[col][positions]
+        written += len(positions)
+
+    for col in raw:
+        out[col].flush()
+    del out, raw, raw_ts
+    for tmp_path in tmp_paths.values():
+        os.remove(tmp_path)
+
+    last_timestamp = _last_timestamp(np.load(os.path.join(store_dir, 'index.npy'), mmap_mode='r'))
+    source_order = 'ascending' if ascending else 'descending' if descending else 'unordered'
+    meta = {'columns': value_cols, 'dtype': dtype, 'n_bars': n_out, 'last_timestamp': last_timestamp,
+            'source_order': source_order, **_source_tags(path)}
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f)
+
+    return store_dir
+
+
+def _output_positions(raw_ts, order, ascending, block_size):
+    """
+    Genera, por bloques, las posiciones de los temporales a escribir en el almacén.
+
+    Args:
+        raw_ts (np.ndarray): Marcas de tiempo en el orden del archivo.
+        order (np.ndarray or None): Posiciones ya ordenadas y sin duplicados (archivo
+                                    desordenado), o None si el archivo ya estaba ordenado.
+        ascending (bool): Si el archivo está en orden ascendente (cuando order es None).
+        block_size (int): Número de posiciones por bloque.
+
+    Yields:
+        np.ndarray: Las posiciones de cada bloque, en orden cronológico.
+    """
+    if order is not None:
+        for start in range(0, len(order), block_size):
+            yield order[start:start + block_size]
+        return
+
+    n_rows = len(raw_ts)
+    starts = range(0, n_rows, block_size)
+    for start in (starts if ascending else reversed(starts)):
+        positions = np.arange(start, min(start + block_size, n_rows))
+        # En un archivo ordenado los duplicados son contiguos: se conserva la
+        # primera aparición, es decir, la que no coincide con la fila anterior.
+        ts = raw_ts[positions]
+        previous = raw_ts[positions - 1] if start > 0 else np.concatenate(([ts[0] - 1], raw_ts[positions[1:] - 1]))
+        positions = positions[ts != previous]
+        yield positions if ascending else positions[::-1]
+
+
+class MarketPanel:
+    """
+    Datos OHLCV de varios activos alineados sobre un índice de tiempo común.
+
+    Los datos se guardan en un único arreglo contiguo de tres dimensiones
+    (activo x vela x campo), de modo que las etapas de indicadores y de
+    backtesting pueden operar sobre todos los activos a la vez. Las velas en
+    las que un activo no tiene datos (p. ej. antes de su listado) son NaN.
+
+    Attributes:
+        symbols (list[str]): Los activos, en el orden de la primera dimensión.
+        index (pd.DatetimeIndex): El índice de tiempo común (unión de todos).
+        fields (list[str]): Los campos, en el orden de la tercera dimensión.
+        values (np.ndarray): Arreglo (N_activos x N_velas x N_campos).
+    """
+
+    def __init__(self, symbols, index, fields, values):
+        """
+        Inicializa el panel.
+
+        Args:
+            symbols (list[str]): Los activos.
+            index (pd.DatetimeIndex): El índice de tiempo común.
+            fields (list[str]): Los campos.
+            values (np.ndarray): Arreglo (N_activos x N_velas x N_campos).
+        """
+        self.symbols = list(symbols)
+        self.index = index
+        self.fields = list(fields)
+        self.values = values
+
+    @classmethod
+    def from_frames(cls, frames, fields=('open', 'high', 'low', 'close', 'volume')):
+        """
+        Construye el panel alineando varios DataFrames sobre la unión de sus índices.
+
+        Args:
+            frames (dict): Activo -> DataFrame limpio (ver load_data()).
+            fields (tuple): Columnas a incluir.
+
+        Returns:
+            MarketPanel: El panel alineado.
+        """
+        symbols = list(frames)
+        index = pd.DatetimeIndex([], name='date')
+        for df in frames.values():
+            index = index.union(df.index)
+
+        values = np.full((len(symbols), len(index), len(fields)), np.nan)
+        for i, symbol in enumerate(symbols):
+            df = frames[symbol]
+            # Posición de cada vela del activo dentro del índice común.
+            positions = index.get_indexer(df.index)
+            values[i, positions] = df[list(fields)].to_numpy(dtype=np.float64)
+        return cls(symbols, index, fields, values)
+
+    def field(self, name):
+        """
+        Retorna un campo de todos los activos como matriz (N_activos x N_velas).
+
+        Args:
+            name (str): El campo (p. ej. 'close').
+
+        Returns:
+            np.ndarray: Una copia contigua de la matriz del campo.
+        """
+        return np.ascontiguousarray(self.values[:, :, self.fields.index(name)])
+
+    def frame(self, symbol):
+        """
+        Retorna los datos de un activo como DataFrame, solo con sus velas disponibles.
+
+        Args:
+            symbol (str): El activo.
+
+        Returns:
+            pd.DataFrame: Los datos del activo, con el mismo formato que load_data().
+        """
+        data = self.values[self.symbols.index(symbol)]
+        available = ~np.isnan(data).all(axis=1)
+        return pd.DataFrame(data[available], index=self.index[available], columns=self.fields)
+
+    def to_frame(self):
+        """
+        Retorna el panel como DataFrame con MultiIndex (activo, fecha).
+
+        Returns:
+            pd.DataFrame: Una fila por activo y vela del índice común.
+        """
+        multi_index = pd.MultiIndex.from_product([self.symbols, self.index], names=['symbol', 'date'])
+        flat_values = self.values.reshape(len(self.symbols) * len(self.index), len(self.fields))
+        return pd.DataFrame(flat_values, index=multi_index, columns=self.fields, copy=False)
+
+
+def _symbol_from_path(path):
+    """
+    Obtiene el activo a partir del nombre de un CSV de Binance.
+
+    Args:
+        path (str): Ruta del archivo (p. ej. 'Binance_BTCUSDT_1h.csv').
+
+    Returns:
+        str: El activo ('BTCUSDT'), o el nombre del archivo si no sigue el formato.
+    """
+    stem = os.path.splitext(os.path.basename(path))[0]
+    parts = stem.split('_')
+    return parts[1] if len(parts) == 3 and parts[0] == 'Binance' else stem
+
+
+def load_panel(source='.', pattern=PANEL_PATTERN, max_workers=PANEL_MAX_WORKERS,
+               use_cache=DATA_CACHE_ENABLED, cache_format=DATA_CACHE_FORMAT):
+    """
+    Carga varios CSV de Binance en paralelo y los alinea en un MarketPanel.
+
+    Cada archivo se procesa con load_data() (incluida su caché binaria) en un
+    grupo de hilos: la lectura de archivos y gran parte del análisis del CSV se
+    realizan fuera del GIL, por lo que los archivos se cargan de forma
+    concurrente. Los archivos que no se pueden cargar se omiten con una
+    advertencia.
+
+    Args:
+        source (str or list[str]): Un directorio, un patrón glob o una lista de rutas.
+        pattern (str): Patrón de los archivos cuando 'source' es un directorio.
+        max_workers (int): Número de hilos de carga.
+        use_cache (bool): Si es True, se utiliza la caché binaria de cada CSV.
+        cache_format (str): Formato de la caché: 'feather' o 'npy'.
+
+    Returns:
+        MarketPanel or None: El panel con todos los activos cargados, o None si
+                             no se pudo cargar ninguno.
+    """
+    if isinstance(source, (list, tuple)):
+        paths = list(source)
+    elif os.path.isdir(source):
+        paths = sorted(glob.glob(os.path.join(source, pattern)))
+    else:
+        paths = sorted(glob.glob(source))
+
+    if not paths:
+        print(f"  - Error Crítico: No se encontraron archivos de datos en: {source}")
+        return None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        loaded = list(executor.map(lambda path: load_data(path, use_cache, cache_format), paths))
+
+    frames = {}
+    for path, df in zip(paths, loaded):
+        if df is None or df.empty:
+            print(f"  - Advertencia: Se omite el archivo {path}, no se pudo cargar.")
+            continue
+        frames[_symbol_from_path(path)] = df
+
+    if not frames:
+        return None
+
+    panel = MarketPanel.from_frames(frames)
+    print(f"  - Información: Panel de {len(panel.symbols)} activos y {len(panel.index)} velas.")
+    return panel
+
+
+class SubBarIndex:
+    """
+    Índice de las velas de menor temporalidad (p. ej. 1m) contenidas en cada vela.
+
+    Las velas finas se leen de un almacén .npy mapeado en memoria: el índice
+    solo guarda, para cada vela principal, el rango [inicio, fin) de filas
+    finas que cubre, de modo que el motor accede únicamente a las filas de las
+    velas que lo necesitan y el resto nunca se lee del disco.
+
+    Attributes:
+        store_dir (str): Directorio del almacén .npy de las velas finas.
+        timestamps (np.ndarray): Marcas de tiempo de las velas finas (int64, ns).
+        open (np.ndarray): Aperturas de las velas finas (mapeadas en memoria).
+        high (np.ndarray): Máximos de las velas finas (mapeados en memoria).
+        low (np.ndarray): Mínimos de las velas finas (mapeados en memoria).
+    """
+
+    def __init__(self, store_dir):
+        """
+        Abre el almacén de velas finas sin leer sus datos.
+
+        Args:
+            store_dir (str): Directorio del almacén .npy.
+        """
+        index, columns, _ = open_npy_store(store_dir)
+        self.store_dir = store_dir
+        # np.asarray conserva el mapeo en memoria (no copia) y produce arreglos
+        # que el motor compilado acepta directamente.
+        self.timestamps = np.asarray(index)
+        self.open = np.asarray(columns['open'])
+        self.high = np.asarray(columns['high'])
+        self.low = np.asarray(columns['low'])
+
+    def ranges(self, bar_index, bar_duration=None):
+        """
+        Calcula el rango de filas finas de cada vela principal.
+
+        Args:
+            bar_index (pd.DatetimeIndex): Fechas de apertura de las velas principales.
+            bar_duration (pd.Timedelta, optional): Duración de cada vela principal.
+                                                   Por defecto, el menor intervalo
+                                                   entre velas consecutivas.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Las filas de inicio y fin (int64) de
+                                           cada vela; iguales si no hay datos finos.
+        """
+        bar_starts = np.asarray(bar_index.asi8, dtype=np.int64)
+        if bar_duration is None:
+            steps = np.diff(bar_starts)
+            steps = steps[steps > 0]
+            if len(steps) == 0:
+                raise ValueError("No se puede inferir la duración de las velas; indique 'bar_duration'.")
+            duration = int(steps.min())
+        else:
+            duration = int(pd.Timedelta(bar_duration).value)
+
+        # Búsqueda binaria sobre el índice mapeado: solo se leen las páginas visitadas.
+        starts = np.searchsorted(self.timestamps, bar_starts, side='left').astype(np.int64)
+        ends = np.searchsorted(self.timestamps, bar_starts + duration, side='left').astype(np.int64)
+        return starts, ends
+
+
+def load_sub_bars(path):
+    """
+    Prepara un CSV de velas finas (p. ej. 1m) para resolver velas ambiguas.
+
+    El CSV se convierte (o actualiza) en un almacén .npy junto al archivo, con
+    la misma ingesta por bloques que load_data(), y se abre sin cargarlo.
+
+    Args:
+        path (str): Ruta del archivo CSV de velas finas.
+
+    Returns:
+        SubBarIndex: El índice sobre el almacén de velas finas.
+    """
+    store_dir = _npy_store_dir(path)
+    try:
+        with open(os.path.join(store_dir, 'meta.json')) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        meta = None
+
+    if meta is None or not _source_unchanged(meta, path):
+        store_dir = _refresh_npy_cache(path)
+    print(f"  - Información: Velas finas disponibles en el almacén .npy {store_dir}.")
+    return SubBarIndex(store_dir)
+
+
+class SharedMarketData:
+    """
+    Publica un DataFrame OHLCV en memoria compartida (multiprocessing.shared_memory).
+
+    El índice temporal (int64 en nanosegundos) y las columnas numéricas se
+    copian una única vez a un bloque de memoria compartida. Los procesos
+    trabajadores se conectan al bloque por su nombre y reconstruyen un
+    DataFrame cuyas columnas apuntan directamente a esa memoria, sin
+    serializar (pickle) ni copiar los datos de mercado.
+
+    Attributes:
+        spec (dict): Descripción del bloque (nombre, número de velas y columnas),
+                     que es lo único que se envía a los procesos trabajadores.
+    """
+
+    def __init__(self, shm, spec, owner):
+        """
+        Inicializa el envoltorio del bloque de memoria compartida.
+
+        Args:
+            shm (shared_memory.SharedMemory): El bloque de memoria compartida.
+            spec (dict): La descripción del bloque.
+            owner (bool): True si este proceso creó el bloque y debe liberarlo.
+        """
+        self._shm = shm
+        self.spec = spec
+        self._owner = owner
+
+    @classmethod
+    def publish(cls, df):
+        """
+        Copia los datos de mercado a un nuevo bloque de memoria compartida.
+
+        Args:
+            df (pd.DataFrame): Datos de mercado con índice de fechas y columnas numéricas.
+
+        Returns:
+            SharedMarketData: El bloque publicado (propiedad de este proceso).
+        """
+        n_bars = len(df)
+        columns = list(df.columns)
+        nbytes = max(8 * n_bars * (len(columns) + 1), 1)
+        shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        spec = {'name': shm.name, 'n_bars': n_bars, 'columns': columns}
+        shared = cls(shm, spec, owner=True)
+
+        index, values = shared._views()
+        index[:] = df.index.to_numpy(dtype='datetime64[ns]').view(np.int64)
+        values[:] = df.to_numpy(dtype=np.float64).T
+        return shared
+
+    @classmethod
+    def attach(cls, spec):
+        """
+        Se conecta a un bloque publicado por otro proceso.
+
+        Args:
+            spec (dict): La descripción del bloque (atributo spec del publicador).
+
+        Returns:
+            SharedMarketData: El bloque conectado (no propietario).
+        """
+        return cls(shared_memory.SharedMemory(name=spec['name']), spec, owner=False)
+
+    def _views(self):
+        """Retorna las vistas NumPy del índice (int64) y de las columnas (columnas x velas)."""
+        n_bars = self.spec['n_bars']
+        n_cols = len(self.spec['columns'])
+        # np.frombuffer mantiene exportado el buffer, de modo que el bloque no puede
+        # cerrarse mientras exista alguna vista (se lanza BufferError en lugar de
+        # dejar punteros colgantes).
+        index = np.frombuffer(self._shm.buf, dtype=np.int64, count=n_bars)
+        values = np.frombuffer(self._shm.buf, dtype=np.float64, count=n_cols * n_bars,
+                               offset=8 * n_bars).reshape(n_cols, n_bars)
+        return index, values
+
+    def to_frame(self):
+        """
+        Construye un DataFrame cuyas columnas comparten la memoria del bloque (sin copias).
+
+        Returns:
+            pd.DataFrame: Los datos de mercado respaldados por la memoria compartida.
+        """
+        index, values = self._views()
+        # El índice se copia (8 bytes por vela) porque pandas lo comparte con las
+        # copias del DataFrame y con los resultados guardados en la caché de
+        # indicadores, que pueden sobrevivir al bloque compartido.
+        date_index = pd.DatetimeIndex(index.view('datetime64[ns]'), name='date', copy=True)
+        return pd.DataFrame(values.T, index=date_index, columns=self.spec['columns'], copy=False)
+
+    def close(self):
+        """
+        Cierra la conexión al bloque y, si este proceso es el propietario, lo libera.
+
+        Todos los DataFrames obtenidos con to_frame() deben haberse descartado antes.
+        """
+        try:
+            self._shm.close()
+        finally:
+            if self._owner:
+                self._shm.unlink()
\ No newline at end of file
@@ -0,0 +1,734 @@
+"""
+Núcleo de ejecución compilado para la simulación de backtesting.
+
+Este módulo contiene las funciones de bajo nivel, compiladas con Numba, que
+implementan la lógica de cierre por stop-loss/take-profit, apertura de
+posiciones y valoración del portafolio vela por vela. Trabajan directamente
+sobre arreglos contiguos de NumPy, por lo que la clase Backtester solo
+necesita extraer las columnas del DataFrame una vez y delegar aquí el bucle
+principal, evitando la sobrecarga de indexación de Pandas en cada vela.
+"""
+
+import numpy as np
+from numba import njit, prange
+
+# Versión de la lógica de simulación. Forma parte de la clave de la caché de
+# resultados de la optimización (trial_cache), por lo que debe incrementarse
+# con cualquier cambio que altere los valores del portafolio.
+ENGINE_VERSION = 1
+
+# --- Posiciones dentro del vector de estado de la simulación ---
+CASH = 0          # Efectivo disponible.
+POSITION = 1      # Cantidad de activo en posesión (>0 largo, <0 corto).
+ENTRY_PRICE = 2   # Precio de entrada de la posición abierta.
+EXIT_PRICE = 3    # Precio de la última salida (válido si EXIT_REASON no es nulo).
+EXIT_REASON = 4   # Motivo de la salida en la vela actual (REASON_*), 0 si no la hubo.
+STATE_SIZE = 5
+
+# --- Motivos de cierre de una operación ---
+REASON_NONE = 0          # La operación sigue abierta.
+REASON_STOP_LOSS = 1     # Cierre por stop-loss.
+REASON_TAKE_PROFIT = 2   # Cierre por take-profit.
+REASON_END = 3           # Operación abierta al final de los datos (valorada al último cierre).
+
+# --- Registro de operaciones: estructura de arreglos (una fila por campo) ---
+# Campos enteros (búfer int64).
+TRADE_ENTRY_BAR = 0      # Vela de entrada.
+TRADE_EXIT_BAR = 1       # Vela de salida.
+TRADE_SIDE = 2           # 1 larga, -1 corta.
+TRADE_REASON = 3         # Motivo de cierre (REASON_*).
+TRADE_INT_FIELDS = 4
+# Campos reales (búfer float64).
+TRADE_SIZE = 0           # Cantidad de activo (en valor absoluto).
+TRADE_ENTRY_PRICE = 1    # Precio de entrada.
+TRADE_EXIT_PRICE = 2     # Precio de salida.
+TRADE_COMMISSION = 3     # Comisiones pagadas (entrada y salida).
+TRADE_PNL = 4            # Ganancia o pérdida neta de comisiones.
+TRADE_FLOAT_FIELDS = 5
+# Capacidad inicial de los búferes (se duplica al llenarse).
+TRADE_INITIAL_CAPACITY = 64
+
+# --- Métricas en línea del valor del portafolio (ver simulate_metrics()) ---
+METRIC_FIRST = 0          # Primer valor.
+METRIC_LAST = 1           # Último valor.
+METRIC_PEAK = 2           # Máximo alcanzado.
+METRIC_MIN_DRAWDOWN = 3   # Drawdown más negativo, (valor - máximo) / máximo.
+METRIC_COUNT = 4          # Número de valores procesados.
+METRICS_SIZE = 5
+
+# --- Criterios de desempate cuando una vela toca el stop-loss y el take-profit ---
+TIE_STOP_LOSS = 0     # Se asume que se tocó primero el stop-loss (pesimista).
+TIE_TAKE_PROFIT = 1   # Se asume que se tocó primero el take-profit (optimista).
+TIE_NEAREST = 2       # Se asume que se tocó primero el nivel más cercano a la apertura.
+TIE_BREAKS = {'stop_loss': TIE_STOP_LOSS, 'take_profit': TIE_TAKE_PROFIT, 'nearest': TIE_NEAREST}
+
+# --- Resultado de la comprobación intrabar de stop-loss/take-profit ---
+EXIT_NONE = 0        # La vela no toca ningún nivel.
+EXIT_RESOLVED = 1    # La vela cierra la posición a un precio determinado.
+EXIT_AMBIGUOUS = 2   # La vela toca ambos niveles; el orden es desconocido.
+
+
+@njit(cache=True, nogil=True)
+def new_state(initial_cash):
+    """
+    Crea el vector de estado inicial de una simulación (sin posición abierta).
+
+    Args:
+        initial_cash (float): Capital inicial de la simulación.
+
+    Returns:
+        np.ndarray: Vector de estado [efectivo, posición, precio de entrada,
+                    precio y motivo de la última salida].
+    """
+    state = np.zeros(STATE_SIZE)
+    state[CASH] = initial_cash
+    return state
+
+
+@njit(cache=True, nogil=True)
+def step(state, current_price, buy_signal, sell_signal,
+         stop_loss_pct, take_profit_pct, n_shares, commission):
+    """
+    Procesa una vela: cierre por stop-loss/take-profit, apertura de posición
+    y valoración del portafolio. Modifica el vector de estado in-place.
+
+    Args:
+        state (np.ndarray): Vector de estado creado con new_state().
+        current_price (float): Precio de la vela actual.
+        buy_signal (bool): Señal de compra en la vela actual.
+        sell_signal (bool): Señal de venta en la vela actual.
+        stop_loss_pct (float): Porcentaje de stop-loss.
+        take_profit_pct (float): Porcentaje de take-profit.
+        n_shares (float): Fracción del capital a invertir en cada operación.
+        commission (float): Comisión por operación.
+
+    Returns:
+        float: El valor total del portafolio al cierre de la vela.
+    """
+    position = state[POSITION]
+    entry_price = state[ENTRY_PRICE]
+    state[EXIT_REASON] = REASON_NONE
+
+    # 1. Lógica de CIERRE de posición (por Stop-Loss o Take-Profit)
+    if position > 0:  # Si estamos en una posición larga (comprado)
+        stop_loss_price = entry_price * (1 - stop_loss_pct)
+        take_profit_price = entry_price * (1 + take_profit_pct)
+        if current_price <= stop_loss_price:
+            _close_position(state, current_price, REASON_STOP_LOSS, commission)
+        elif current_price >= take_profit_price:
+            _close_position(state, current_price, REASON_TAKE_PROFIT, commission)
+
+    elif position < 0:  # Si estamos en una posición corta (vendido)
+        stop_loss_price = entry_price * (1 + stop_loss_pct)
+        take_profit_price = entry_price * (1 - take_profit_pct)
+        if current_price >= stop_loss_price:
+            _close_position(state, current_price, REASON_STOP_LOSS, commission)
+        elif current_price <= take_profit_price:
+            _close_position(state, current_price, REASON_TAKE_PROFIT, commission)
+
+    # 2. y 3. Apertura de posición y valoración del portafolio
+    return _open_and_value(state, current_price, buy_signal, sell_signal, n_shares, commission)
+
+
+@njit(cache=True, nogil=True)
+def _close_position(state, exit_price, reason, commission):
+    """
+    Cierra la posición abierta al precio indicado. Modifica el vector de estado in-place.
+
+    Args:
+        state (np.ndarray): Vector de estado creado con new_state().
+        exit_price (float): Precio de salida.
+        reason (int): Motivo del cierre (REASON_*).
+        commission (float): Comisión por operación.
+    """
+    position = state[POSITION]
+    if position > 0:
+        state[CASH] += position * exit_price * (1 - commission)
+    elif position < 0:
+        state[CASH] -= abs(position) * exit_price * (1 + commission)
+    state[POSITION] = 0.0
+    state[EXIT_PRICE] = exit_price
+    state[EXIT_REASON] = reason
+
+
+@njit(cache=True, nogil=True)
+def _open_and_value(state, current_price, buy_signal, sell_signal, n_shares, commission):
+    """
+    Abre una posición si no hay ninguna y hay señal, y valora el portafolio al cierre.
+
+    Args:
+        state (np.ndarray): Vector de estado creado con new_state().
+        current_price (float): Precio de cierre de la vela actual.
+        buy_signal (bool): Señal de compra en la vela actual.
+        sell_signal (bool): Señal de venta en la vela actual.
+        n_shares (float): Fracción del capital a invertir en cada operación.
+        commission (float): Comisión por operación.
+
+    Returns:
+        float: El valor total del portafolio al cierre de la vela.
+    """
+    cash = state[CASH]
+    position = state[POSITION]
+    entry_price = state[ENTRY_PRICE]
+
+    # 2. Lógica de APERTURA de posición (si no hay una posición abierta)
+    if position == 0:
+        if buy_signal:
+            investment_amount = cash * n_shares
+            cost = investment_amount * (1 + commission)
+            if cash > cost:  # Asegurarse de tener suficiente capital
+                cash -= cost
+                position = investment_amount / current_price
+                entry_price = current_price
+
+        elif sell_signal:
+            investment_amount = cash * n_shares
+            proceeds = investment_amount * (1 - commission)
+            cash += proceeds
+            position = - (investment_amount / current_price)
+            entry_price = current_price
+
+    state[CASH] = cash
+    state[POSITION] = position
+    state[ENTRY_PRICE] = entry_price
+
+    # 3. Cálculo del valor total del portafolio en el tiempo actual
+    portfolio_value = cash
+    if position > 0:
+        portfolio_value += position * current_price
+    elif position < 0:
+        # En una posición corta el valor es el efectivo MENOS el costo actual
+        # para cerrar la posición (la obligación).
+        portfolio_value = cash - (abs(position) * current_price)
+
+    return portfolio_value
+
+
+@njit(cache=True, nogil=True)
+def _intrabar_fill(position, open_price, high, low, stop_loss_price, take_profit_price, tie_break):
+    """
+    Determina si una vela cierra la posición por stop-loss/take-profit y a qué precio.
+
+    - Si la vela abre más allá de un nivel (gap), la salida se ejecuta a la
+      apertura, que es el primer precio negociable.
+    - Si la vela toca un solo nivel, la salida se ejecuta al precio del nivel.
+    - Si toca ambos, la vela es ambigua: el nivel se elige con 'tie_break'.
+
+    Args:
+        position (float): Posición abierta (>0 larga, <0 corta).
+        open_price (float): Precio de apertura de la vela.
+        high (float): Precio máximo de la vela.
+        low (float): Precio mínimo de la vela.
+        stop_loss_price (float): Nivel de stop-loss.
+        take_profit_price (float): Nivel de take-profit.
+        tie_break (int): Criterio cuando se tocan ambos niveles en la vela.
+
+    Returns:
+        tuple[int, float, int]: EXIT_NONE, EXIT_RESOLVED o EXIT_AMBIGUOUS, el
+                                precio de salida y el motivo (REASON_*).
+    """
+    if position > 0:
+        gap_stop = open_price <= stop_loss_price
+        gap_profit = open_price >= take_profit_price
+        hit_stop = low <= stop_loss_price
+        hit_profit = high >= take_profit_price
+    else:
+        gap_stop = open_price >= stop_loss_price
+        gap_profit = open_price <= take_profit_price
+        hit_stop = high >= stop_loss_price
+        hit_profit = low <= take_profit_price
+
+    if gap_stop:
+        return EXIT_RESOLVED, open_price, REASON_STOP_LOSS
+    if gap_profit:
+        return EXIT_RESOLVED, open_price, REASON_TAKE_PROFIT
+    if hit_stop and hit_profit:
+        stop_first = tie_break == TIE_STOP_LOSS or (
+            tie_break == TIE_NEAREST
+            and abs(open_price - stop_loss_price) <= abs(take_profit_price - open_price))
+        if stop_first:
+            return EXIT_AMBIGUOUS, stop_loss_price, REASON_STOP_LOSS
+        return EXIT_AMBIGUOUS, take_profit_price, REASON_TAKE_PROFIT
+    if hit_stop:
+        return EXIT_RESOLVED, stop_loss_price, REASON_STOP_LOSS
+    if hit_profit:
+        return EXIT_RESOLVED, take_profit_price, REASON_TAKE_PROFIT
+    return EXIT_NONE, 0.0, REASON_NONE
+
+
+@njit(cache=True, nogil=True)
+def step_intrabar(state, open_price, high, low, close, buy_signal, sell_signal,
+                  stop_loss_pct, take_profit_pct, n_shares, commission, tie_break,
+                  sub_open, sub_high, sub_low, sub_start, sub_end):
+    """
+    Procesa una vela detectando los toques de stop-loss/take-profit dentro de ella.
+
+    A diferencia de step(), las salidas se detectan con el máximo y el mínimo de
+    la vela (ver _intrabar_fill()). Si la vela es ambigua (toca ambos niveles) y
+    se dispone de velas de menor temporalidad para ella (filas sub_start a
+    sub_end de los arreglos sub_*), estas se recorren en orden para saber qué
+    nivel se tocó primero; solo si tampoco lo resuelven se aplica 'tie_break'.
+    La apertura de posiciones y la valoración se realizan al cierre, igual que
+    en step(). Modifica el vector de estado in-place.
+
+    Args:
+        state (np.ndarray): Vector de estado creado con new_state().
+        open_price (float): Precio de apertura de la vela.
+        high (float): Precio máximo de la vela.
+        low (float): Precio mínimo de la vela.
+        close (float): Precio de cierre de la vela.
+        buy_signal (bool): Señal de compra en la vela actual.
+        sell_signal (bool): Señal de venta en la vela actual.
+        stop_loss_pct (float): Porcentaje de stop-loss.
+        take_profit_pct (float): Porcentaje de take-profit.
+        n_shares (float): Fracción del capital a invertir en cada operación.
+        commission (float): Comisión por operación.
+        tie_break (int): Criterio cuando se tocan ambos niveles en la vela.
+        sub_open (np.ndarray): Aperturas de las velas de menor temporalidad.
+        sub_high (np.ndarray): Máximos de las velas de menor temporalidad.
+        sub_low (np.ndarray): Mínimos de las velas de menor temporalidad.
+        sub_start (int): Primera fila de las velas menores de esta vela.
+        sub_end (int): Fila siguiente a la última (sub_start si no hay datos).
+
+    Returns:
+        float: El valor total del portafolio al cierre de la vela.
+    """
+    position = state[POSITION]
+    state[EXIT_REASON] = REASON_NONE
+    if position != 0:
+        entry_price = state[ENTRY_PRICE]
+        if position > 0:
+            stop_loss_price = entry_price * (1 - stop_loss_pct)
+            take_profit_price = entry_price * (1 + take_profit_pct)
+        else:
+            stop_loss_price = entry_price * (1 + stop_loss_pct)
+            take_profit_price = entry_price * (1 - take_profit_pct)
+
+        exit_kind, exit_price, reason = _intrabar_fill(position, open_price, high, low,
+                                                       stop_loss_price, take_profit_price, tie_break)
+        if exit_kind == EXIT_AMBIGUOUS:
+            # Solo las velas ambiguas consultan los datos de menor temporalidad.
+            for j in range(sub_start, sub_end):
+                sub_kind, sub_price, sub_reason = _intrabar_fill(position, sub_open[j], sub_high[j], sub_low[j],
+                                                                 stop_loss_price, take_profit_price, tie_break)
+                if sub_kind != EXIT_NONE:
+                    exit_price, reason = sub_price, sub_reason
+                    break
+        if exit_kind != EXIT_NONE:
+            _close_position(state, exit_price, reason, commission)
+
+    return _open_and_value(state, close, buy_signal, sell_signal, n_shares, commission)
+
+
+@njit(cache=True, nogil=True)
+def simulate(close, buy_signal, sell_signal, stop_loss_pct, take_profit_pct,
+             n_shares, initial_cash, commission):
+    """
+    Ejecuta la simulación completa sobre arreglos de precios y señales.
+
+    Es el punto de entrada más simple del núcleo: solo devuelve la serie de
+    valores del portafolio, sin registrar las operaciones (para ello, ver
+    simulate_with_trades(), que produce exactamente los mismos valores).
+
+    La primera vela solo sirve de referencia, igual que en el bucle original
+    de Backtester.run, por lo que el resultado tiene len(close) - 1 valores.
+
+    Args:
+        close (np.ndarray): Precios de cierre (float64, contiguo).
+        buy_signal (np.ndarray): Señales de compra (bool).
+        sell_signal (np.ndarray): Señales de venta (bool).
+        stop_loss_pct (float): Porcentaje de stop-loss.
+        take_profit_pct (float): Porcentaje de take-profit.
+        n_shares (float): Fracción del capital a invertir en cada operación.
+        initial_cash (float): Capital inicial.
+        commission (float): Comisión por operación.
+
+    Returns:
+        np.ndarray: El valor del portafolio al cierre de cada vela (desde la segunda).
+    """
+    n_bars = close.shape[0]
+    portfolio_values = np.empty(max(n_bars - 1, 0))
+    state = new_state(initial_cash)
+
+    for i in range(1, n_bars):
+        portfolio_values[i - 1] = step(state, close[i], buy_signal[i], sell_signal[i],
+                                       stop_loss_pct, take_profit_pct, n_shares, commission)
+
+    return portfolio_values
+
+
+@njit(cache=True, nogil=True)
+def simulate_intrabar(open_price, high, low, close, buy_signal, sell_signal, stop_loss_pct,
+                      take_profit_pct, n_shares, initial_cash, commission, tie_break,
+                      sub_open, sub_high, sub_low, sub_starts, sub_ends):
+    """
+    Ejecuta la simulación completa con salidas intrabar (ver step_intrabar()).
+
+    Como simulate(), solo devuelve la serie de valores del portafolio (ver
+    simulate_intrabar_with_trades() para registrar también las operaciones).
+
+    Args:
+        open_price (np.ndarray): Precios de apertura (float64, contiguo).
+        high (np.ndarray): Precios máximos (float64, contiguo).
+        low (np.ndarray): Precios mínimos (float64, contiguo).
+        close (np.ndarray): Precios de cierre (float64, contiguo).
+        buy_signal (np.ndarray): Señales de compra (bool).
+        sell_signal (np.ndarray): Señales de venta (bool).
+        stop_loss_pct (float): Porcentaje de stop-loss.
+        take_profit_pct (float): Porcentaje de take-profit.
+        n_shares (float): Fracción del capital a invertir en cada operación.
+        initial_cash (float): Capital inicial.
+        commission (float): Comisión por operación.
+        tie_break (int): Criterio cuando se tocan ambos niveles en la misma vela.
+        sub_open (np.ndarray): Aperturas de las velas de menor temporalidad
+                               (vacío si no se utilizan).
+        sub_high (np.ndarray): Máximos de las velas de menor temporalidad.
+        sub_low (np.ndarray): Mínimos de las velas de menor temporalidad.
+        sub_starts (np.ndarray): Primera fila de las velas menores de cada vela (int64).
+        sub_ends (np.ndarray): Fila siguiente a la última de cada vela (int64).
+
+    Returns:
+        np.ndarray: El valor del portafolio al cierre de cada vela (desde la segunda).
+    """
+    n_bars = close.shape[0]
+    portfolio_values = np.empty(max(n_bars - 1, 0))
+    state = new_state(initial_cash)
+
+    for i in range(1, n_bars):
+        portfolio_values[i - 1] = step_intrabar(state, open_price[i], high[i], low[i], close[i],
+                                                buy_signal[i], sell_signal[i], stop_loss_pct,
+                                                take_profit_pct, n_shares, commission, tie_break,
+                                                sub_open, sub_high, sub_low, sub_starts[i], sub_ends[i])
+
+    return portfolio_values
+
+
+@njit(cache=True, nogil=True)
+def _grow(buffer, n_used):
+    """Duplica la capacidad (columnas) de un búfer del registro de operaciones."""
+    grown = np.empty((buffer.shape[0], 2 * buffer.shape[1]), dtype=buffer.dtype)
+    grown[:, :n_used] = buffer[:, :n_used]
+    return grown
+
+
+@njit(cache=True, nogil=True)
+def _finish_trade(int_buffer, float_buffer, n_trades, bar, exit_price, reason, exit_commission):
+    """Completa la operación abierta (columna n_trades) con los datos de salida."""
+    size = float_buffer[TRADE_SIZE, n_trades]
+    entry_price = float_buffer[TRADE_ENTRY_PRICE, n_trades]
+    side = int_buffer[TRADE_SIDE, n_trades]
+    fees = float_buffer[TRADE_COMMISSION, n_trades] + size * exit_price * exit_commission
+
+    int_buffer[TRADE_EXIT_BAR, n_trades] = bar
+    int_buffer[TRADE_REASON, n_trades] = reason
+    float_buffer[TRADE_EXIT_PRICE, n_trades] = exit_price
+    float_buffer[TRADE_COMMISSION, n_trades] = fees
+    float_buffer[TRADE_PNL, n_trades] = side * size * (exit_price - entry_price) - fees
+
+
+@njit(cache=True, nogil=True)
+def _track_trades(state, bar, prev_position, int_buffer, float_buffer, n_trades, commission):
+    """
+    Registra las operaciones cerradas y abiertas en la vela que acaba de procesarse.
+
+    Se llama tras step()/step_intrabar(): la salida se detecta con el motivo
+    guardado en el vector de estado, y la entrada porque la vela termina con
+    una posición que no existía (o que se abrió tras cerrar la anterior). La
+    operación abierta ocupa la columna n_trades de los búferes, que duplican
+    su capacidad cuando se llenan.
+
+    Args:
+        state (np.ndarray): Vector de estado tras procesar la vela.
+        bar (int): Índice de la vela.
+        prev_position (float): Posición antes de procesar la vela.
+        int_buffer (np.ndarray): Búfer de campos enteros (TRADE_INT_FIELDS x capacidad).
+        float_buffer (np.ndarray): Búfer de campos reales (TRADE_FLOAT_FIELDS x capacidad).
+        n_trades (int): Número de operaciones cerradas registradas.
+        commission (float): Comisión por operación.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, int]: Los búferes (posiblemente ampliados)
+                                            y el nuevo número de operaciones cerradas.
+    """
+    exited = state[EXIT_REASON] != REASON_NONE
+    if exited:
+        _finish_trade(int_buffer, float_buffer, n_trades, bar, state[EXIT_PRICE],
+                      int(state[EXIT_REASON]), commission)
+        n_trades += 1
+
+    position = state[POSITION]
+    if position != 0 and (prev_position == 0 or exited):
+        if n_trades == int_buffer.shape[1]:
+            int_buffer = _grow(int_buffer, n_trades)
+            float_buffer = _grow(float_buffer, n_trades)
+        size = abs(position)
+        entry_price = state[ENTRY_PRICE]
+        int_buffer[TRADE_ENTRY_BAR, n_trades] = bar
+        int_buffer[TRADE_SIDE, n_trades] = 1 if position > 0 else -1
+        float_buffer[TRADE_SIZE, n_trades] = size
+        float_buffer[TRADE_ENTRY_PRICE, n_trades] = entry_price
+        float_buffer[TRADE_COMMISSION, n_trades] = size * entry_price * commission
+
+    return int_buffer, float_buffer, n_trades
+
+
+@njit(cache=True, nogil=True)
+def _close_trade_log(state, close, int_buffer, float_buffer, n_trades):
+    """
+    Cierra el registro: la operación que siga abierta se valora al último cierre
+    (sin comisión de salida, igual que el valor del portafolio) con REASON_END.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Los campos enteros y reales de las
+                                       operaciones (una columna por operación).
+    """
+    if state[POSITION] != 0:
+        last_bar = close.shape[0] - 1
+        _finish_trade(int_buffer, float_buffer, n_trades, last_bar, close[last_bar], REASON_END, 0.0)
+        n_trades += 1
+    return int_buffer[:, :n_trades].copy(), float_buffer[:, :n_trades].copy()
+
+
+@njit(cache=True, nogil=True)
+def simulate_with_trades(close, buy_signal, sell_signal, stop_loss_pct, take_profit_pct,
+                         n_shares, initial_cash, commission):
+    """
+    Igual que simulate(), pero registra además cada operación en búferes
+    preasignados de NumPy (ver _track_trades()).
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: El valor del portafolio en
+            cada vela (desde la segunda) y los campos enteros (TRADE_*) y
+            reales (TRADE_*) de las operaciones, una columna por operación.
+    """
+    n_bars = close.shape[0]
+    portfolio_values = np.empty(max(n_bars - 1, 0))
+    state = new_state(initial_cash)
+    int_buffer = np.zeros((TRADE_INT_FIELDS, TRADE_INITIAL_CAPACITY), dtype=np.int64)
+    float_buffer = np.zeros((TRADE_FLOAT_FIELDS, TRADE_INITIAL_CAPACITY))
+    n_trades = 0
+
+    for i in range(1, n_bars):
+        prev_position = state[POSITION]
+        portfolio_values[i - 1] = step(state, close[i], buy_signal[i], sell_signal[i],
+                                       stop_loss_pct, take_profit_pct, n_shares, commission)
+        int_buffer, float_buffer, n_trades = _track_trades(state, i, prev_position, int_buffer,
+                                                           float_buffer, n_trades, commission)
+
+    int_fields, float_fields = _close_trade_log(state, close, int_buffer, float_buffer, n_trades)
+    return portfolio_values, int_fields, float_fields
+
+
+@njit(cache=True, nogil=True)
+def simulate_intrabar_with_trades(open_price, high, low, close, buy_signal, sell_signal, stop_loss_pct,
+                                  take_profit_pct, n_shares, initial_cash, commission, tie_break,
+                                  sub_open, sub_high, sub_low, sub_starts, sub_ends):
+    """
+    Igual que simulate_intrabar(), pero registra además cada operación (ver
+    simulate_with_trades()).
+    """
+    n_bars = close.shape[0]
+    portfolio_values = np.empty(max(n_bars - 1, 0))
+    state = new_state(initial_cash)
+    int_buffer = np.zeros((TRADE_INT_FIELDS, TRADE_INITIAL_CAPACITY), dtype=np.int64)
+    float_buffer = np.zeros((TRADE_FLOAT_FIELDS, TRADE_INITIAL_CAPACITY))
+    n_trades = 0
+
+    for i in range(1, n_bars):
+        prev_position = state[POSITION]
+        portfolio_values[i - 1] = step_intrabar(state, open_price[i], high[i], low[i], close[i],
+                                                buy_signal[i], sell_signal[i], stop_loss_pct,
+                                                take_profit_pct, n_shares, commission, tie_break,
+                                                sub_open, sub_high, sub_low, sub_starts[i], sub_ends[i])
+        int_buffer, float_buffer, n_trades = _track_trades(state, i, prev_position, int_buffer,
+                                                           float_buffer, n_trades, commission)
+
+    int_fields, float_fields = _close_trade_log(state, close, int_buffer, float_buffer, n_trades)
+    return portfolio_values, int_fields, float_fields
+
+
+@njit(cache=True, nogil=True)
+def _new_metrics():
+    """Crea el vector de métricas en línea vacío (ver METRIC_*)."""
+    metrics = np.zeros(METRICS_SIZE)
+    metrics[METRIC_FIRST] = np.nan
+    metrics[METRIC_LAST] = np.nan
+    metrics[METRIC_PEAK] = -np.inf
+    return metrics
+
+
+@njit(cache=True, nogil=True)
+def _update_metrics(metrics, portfolio_value):
+    """
+    Incorpora un valor del portafolio a las métricas en línea, en O(1).
+
+    El drawdown se calcula con las mismas operaciones que
+    (serie - serie.cummax()) / serie.cummax(), por lo que coincide exactamente
+    con el cálculo sobre la serie completa.
+    """
+    if metrics[METRIC_COUNT] == 0:
+        metrics[METRIC_FIRST] = portfolio_value
+    metrics[METRIC_LAST] = portfolio_value
+    metrics[METRIC_COUNT] += 1
+    if portfolio_value > metrics[METRIC_PEAK]:
+        metrics[METRIC_PEAK] = portfolio_value
+    peak = metrics[METRIC_PEAK]
+    drawdown = (portfolio_value - peak) / peak
+    if drawdown < metrics[METRIC_MIN_DRAWDOWN]:
+        metrics[METRIC_MIN_DRAWDOWN] = drawdown
+
+
+@njit(cache=True, nogil=True)
+def simulate_metrics(close, buy_signal, sell_signal, stop_loss_pct, take_profit_pct,
+                     n_shares, initial_cash, commission):
+    """
+    Igual que simulate(), pero sin guardar la serie de valores del portafolio:
+    solo se mantienen las métricas en línea (primer y último valor, máximo y
+    drawdown máximo), con memoria constante.
+
+    Returns:
+        np.ndarray: El vector de métricas (ver METRIC_*).
+    """
+    state = new_state(initial_cash)
+    metrics = _new_metrics()
+    for i in range(1, close.shape[0]):
+        _update_metrics(metrics, step(state, close[i], buy_signal[i], sell_signal[i],
+                                      stop_loss_pct, take_profit_pct, n_shares, commission))
+    return metrics
+
+
+@njit(cache=True, nogil=True)
+def simulate_intrabar_metrics(open_price, high, low, close, buy_signal, sell_signal, stop_loss_pct,
+                              take_profit_pct, n_shares, initial_cash, commission, tie_break,
+                              sub_open, sub_high, sub_low, sub_starts, sub_ends):
+    """
+    Igual que simulate_intrabar(), pero solo con las métricas en línea (ver
+    simulate_metrics()).
+    """
+    state = new_state(initial_cash)
+    metrics = _new_metrics()
+    for i in range(1, close.shape[0]):
+        _update_metrics(metrics, step_intrabar(state, open_price[i], high[i], low[i], close[i],
+                                               buy_signal[i], sell_signal[i], stop_loss_pct,
+                                               take_profit_pct, n_shares, commission, tie_break,
+                                               sub_open, sub_high, sub_low, sub_starts[i], sub_ends[i]))
+    return metrics
+
+
+@njit(cache=True, nogil=True, parallel=True)
+def simulate_batch(close, buy_signals, sell_signals, stop_loss_pcts, take_profit_pcts,
+                   n_shares, initial_cash, commission, return_value_series):
+    """
+    Simula N portafolios independientes sobre la misma serie de precios.
+
+    Cada fila de las matrices de señales y cada elemento de los vectores de
+    gestión de riesgo describe un conjunto de parámetros. Los portafolios se
+    reparten entre los hilos disponibles (numba.prange) y cada uno aplica
+    exactamente la misma lógica que simulate().
+
+    Args:
+        close (np.ndarray): Precios de cierre (float64, contiguo).
+        buy_signals (np.ndarray): Matriz de señales de compra (N_parámetros x N_velas).
+        sell_signals (np.ndarray): Matriz de señales de venta (N_parámetros x N_velas).
+        stop_loss_pcts (np.ndarray): Stop-loss de cada conjunto de parámetros.
+        take_profit_pcts (np.ndarray): Take-profit de cada conjunto de parámetros.
+        n_shares (np.ndarray): Fracción del capital de cada conjunto de parámetros.
+        initial_cash (float): Capital inicial.
+        commission (float): Comisión por operación.
+        return_value_series (bool): Si es True, se guarda el valor de cada
+                                    portafolio en cada vela.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: El vector de valores finales y la matriz
+                                       (N_parámetros x N_velas-1) de valores del
+                                       portafolio (vacía si return_value_series es False).
+    """
+    n_params, n_bars = buy_signals.shape
+    final_values = np.full(n_params, initial_cash)
+    portfolio_values = np.empty((n_params, max(n_bars - 1, 0) if return_value_series else 0))
+
+    for j in prange(n_params):
+        state = new_state(initial_cash)
+        for i in range(1, n_bars):
+            portfolio_value = step(state, close[i], buy_signals[j, i], sell_signals[j, i],
+                                   stop_loss_pcts[j], take_profit_pcts[j], n_shares[j], commission)
+            if return_value_series:
+                portfolio_values[j, i - 1] = portfolio_value
+            final_values[j] = portfolio_value
+
+    return final_values, portfolio_values
+
+
+@njit(cache=True, nogil=True)
+def simulate_portfolio(close, buy_signals, sell_signals, stop_loss_pct, take_profit_pct,
+                       n_shares, initial_cash, commission):
+    """
+    Simula una cartera de varios activos que comparten una misma caja.
+
+    Cada activo tiene su propia posición y precio de entrada, y en cada vela se
+    procesan los activos en orden con la misma lógica que step(): las salidas
+    por stop-loss/take-profit y las nuevas operaciones modifican el efectivo
+    común, por lo que una operación solo se abre si queda capital suficiente.
+    El efectivo que respalda las posiciones cortas abiertas en otros activos
+    (su costo de recompra) queda reservado y no se usa para dimensionar nuevas
+    operaciones; de lo contrario, cada venta en corto ampliaría el capital
+    disponible para la siguiente y el apalancamiento crecería sin límite.
+    Mientras el efectivo disponible no sea positivo, no se abren operaciones.
+    Las velas sin precio (NaN, p. ej. antes del listado de un activo) se omiten
+    para ese activo, y sus posiciones se valoran al último precio conocido.
+
+    Con un único activo el resultado es idéntico al de simulate().
+
+    Args:
+        close (np.ndarray): Matriz de precios de cierre (N_activos x N_velas).
+        buy_signals (np.ndarray): Matriz de señales de compra (N_activos x N_velas).
+        sell_signals (np.ndarray): Matriz de señales de venta (N_activos x N_velas).
+        stop_loss_pct (float): Porcentaje de stop-loss.
+        take_profit_pct (float): Porcentaje de take-profit.
+        n_shares (float): Fracción del efectivo disponible a invertir en cada operación.
+        initial_cash (float): Capital inicial de la cartera.
+        commission (float): Comisión por operación.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: El valor de la cartera al cierre de cada vela
+                                       (desde la segunda) y la matriz
+                                       (N_activos x N_velas-1) de posiciones abiertas.
+    """
+    n_symbols, n_bars = close.shape
+    portfolio_values = np.empty(max(n_bars - 1, 0))
+    positions = np.zeros((n_symbols, max(n_bars - 1, 0)))
+    states = np.zeros((n_symbols, STATE_SIZE))
+    last_prices = np.zeros(n_symbols)
+    cash = initial_cash
+
+    for i in range(1, n_bars):
+        # Costo de recompra de las posiciones cortas abiertas.
+        short_value = 0.0
+        for s in range(n_symbols):
+            if states[s, POSITION] < 0:
+                short_value -= states[s, POSITION] * last_prices[s]
+
+        holdings_value = 0.0
+        for s in range(n_symbols):
+            current_price = close[s, i]
+            state = states[s]
+            if current_price == current_price:
+                own_short_value = -state[POSITION] * last_prices[s] if state[POSITION] < 0 else 0.0
+                reserved = short_value - own_short_value
+                # El efectivo común (sin la reserva de los cortos de otros activos)
+                # se presta al estado del activo durante el paso. Si la reserva lo
+                # agota, no se abren operaciones nuevas: con efectivo negativo una
+                # venta en corto abriría una posición larga.
+                available = cash - reserved
+                can_open = available > 0
+                state[CASH] = available
+                step(state, current_price, buy_signals[s, i] and can_open, sell_signals[s, i] and can_open,
+                     stop_loss_pct, take_profit_pct, n_shares, commission)
+                cash = state[CASH] + reserved
+                last_prices[s] = current_price
+                short_value = reserved - (state[POSITION] * current_price if state[POSITION] < 0 else 0.0)
+            holdings_value += state[POSITION] * last_prices[s]
+            positions[s, i - 1] = state[POSITION]
+        portfolio_values[i - 1] = cash + holdings_value
+
+    return portfolio_values, positions
\ No newline at end of file
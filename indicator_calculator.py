@@ -1,18 +1,198 @@
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
 import pandas as pd
 import pandas_ta as ta
+import native_indicators
+from config import INDICATOR_CACHE_BYTES, EMA_MATRIX_MIN_LEN, EMA_MATRIX_MAX_LEN
+from config import INDICATOR_BACKEND, INDICATOR_TOLERANCE
+from native_indicators import EmaMatrix
+
+
+class IndicatorBank:
+    """
+    Caché LRU, acotada en memoria, para los resultados de los indicadores técnicos.
+
+    Cada resultado se identifica por el nombre del indicador, sus parámetros
+    (longitudes) y una huella digital de los datos de mercado sobre los que se
+    calculó. Así, cuando distintas pruebas de Optuna o distintos segmentos del
+    Walk-Forward piden el mismo indicador sobre los mismos datos, se reutiliza
+    el cálculo previo en lugar de repetirlo.
+
+    Attributes:
+        max_bytes (int): Memoria máxima ocupada por los resultados almacenados.
+        nbytes (int): Memoria ocupada actualmente por los resultados almacenados.
+        hits (int): Número de consultas resueltas desde la caché.
+        misses (int): Número de consultas que requirieron calcular el indicador.
+    """
+
+    def __init__(self, max_bytes=INDICATOR_CACHE_BYTES):
+        """
+        Inicializa la caché de indicadores.
+
+        Args:
+            max_bytes (int): Memoria máxima (en bytes) de los resultados a conservar.
+        """
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def _sizeof(result):
+        """Retorna la memoria (en bytes) que ocupa un resultado, incluido su índice."""
+        if isinstance(result, (pd.DataFrame, pd.Series)):
+            return int(np.sum(result.memory_usage(index=True)))
+        if isinstance(result, EmaMatrix):
+            return result.values.nbytes
+        return int(getattr(result, 'nbytes', 0))
+
+    @staticmethod
+    def fingerprint(df):
+        """
+        Calcula una huella digital de los datos de mercado (índice y columnas OHLCV).
+
+        Args:
+            df (pd.DataFrame): Los datos de mercado.
+
+        Returns:
+            str: Un hash hexadecimal que identifica el contenido de los datos.
+        """
+        cols = [col for col in ['open', 'high', 'low', 'close', 'volume'] if col in df.columns]
+        row_hashes = pd.util.hash_pandas_object(df[cols], index=True).to_numpy()
+        return hashlib.blake2b(row_hashes.tobytes(), digest_size=16).hexdigest()
+
+    def get(self, name, params, fingerprint, compute):
+        """
+        Retorna el resultado de un indicador, calculándolo solo si no está en caché.
+
+        Args:
+            name (str): Nombre del indicador (ej. 'ema').
+            params (tuple): Parámetros del indicador (ej. (ema_len,)).
+            fingerprint (str): Huella digital de los datos (ver fingerprint()).
+            compute (callable): Función sin argumentos que calcula el indicador.
 
-def add_indicators(df, ema_len, macd_fast, macd_slow, macd_signal, adx_len):
+        Returns:
+            pd.DataFrame or pd.Series: El resultado del indicador. Se comparte entre
+                                       consultas, por lo que no debe modificarse.
+        """
+        key = (name, params, fingerprint)
+        if key in self._entries:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key][0]
+
+        self.misses += 1
+        result = compute()
+        if result is None:
+            return result
+        size = self._sizeof(result)
+        # Un resultado que no cabe por sí solo no desplaza al resto de la caché.
+        if size <= self.max_bytes:
+            self._entries[key] = (result, size)
+            self.nbytes += size
+            # Se descartan los resultados usados hace más tiempo.
+            while self.nbytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.nbytes -= evicted_size
+        return result
+
+    def clear(self):
+        """Vacía la caché y reinicia los contadores."""
+        self._entries.clear()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+
+# Caché compartida por defecto entre todas las llamadas a add_indicators.
+indicator_bank = IndicatorBank()
+
+
+def _macd_from_matrix(ema_matrix, index, macd_fast, macd_slow, macd_signal):
+    """
+    Construye las columnas del MACD (con los nombres de pandas-ta) a partir de la matriz de EMA.
+
+    Args:
+        ema_matrix (EmaMatrix): La matriz de EMA precalculada.
+        index (pd.Index): El índice de los datos de mercado.
+        macd_fast (int): El período de la EMA rápida.
+        macd_slow (int): El período de la EMA lenta.
+        macd_signal (int): El período de la línea de señal.
+
+    Returns:
+        pd.DataFrame: Las columnas MACD, MACDh y MACDs.
+    """
+    macd_line, histogram, signal_line = ema_matrix.macd(macd_fast, macd_slow, macd_signal)
+    return _macd_frame(macd_line, histogram, signal_line, index, macd_fast, macd_slow, macd_signal)
+
+
+def _macd_frame(macd_line, histogram, signal_line, index, macd_fast, macd_slow, macd_signal):
+    """Construye las columnas del MACD con los nombres de pandas-ta."""
+    if macd_slow < macd_fast:
+        # pandas-ta intercambia los períodos (y sus nombres) si slow < fast.
+        macd_fast, macd_slow = macd_slow, macd_fast
+    props = f"_{macd_fast}_{macd_slow}_{macd_signal}"
+    return pd.DataFrame({f"MACD{props}": macd_line,
+                         f"MACDh{props}": histogram,
+                         f"MACDs{props}": signal_line}, index=index)
+
+
+def _native_ema(data, ema_len):
+    """EMA del backend nativo, como Serie con el nombre de pandas-ta."""
+    return pd.Series(native_indicators.ema(data['close'].to_numpy(dtype=float), ema_len),
+                     index=data.index, name=f"EMA_{ema_len}")
+
+
+def _native_macd(data, macd_fast, macd_slow, macd_signal):
+    """MACD del backend nativo, con las columnas de pandas-ta."""
+    macd_line, histogram, signal_line = native_indicators.macd(data['close'].to_numpy(dtype=float),
+                                                               macd_fast, macd_slow, macd_signal)
+    return _macd_frame(macd_line, histogram, signal_line, data.index, macd_fast, macd_slow, macd_signal)
+
+
+def _native_adx(data, adx_len):
+    """ADX del backend nativo, con las columnas de pandas-ta."""
+    adx, adxr, dmp, dmn = native_indicators.adx(data['high'].to_numpy(dtype=float),
+                                                data['low'].to_numpy(dtype=float),
+                                                data['close'].to_numpy(dtype=float), adx_len)
+    return pd.DataFrame({f"ADX_{adx_len}": adx, f"ADXR_{adx_len}_2": adxr,
+                         f"DMP_{adx_len}": dmp, f"DMN_{adx_len}": dmn}, index=data.index)
+
+
+def add_indicators(df, ema_len, macd_fast, macd_slow, macd_signal, adx_len, bank=None,
+                   use_ema_matrix=False, backend=INDICATOR_BACKEND, fingerprint=None, copy=True):
     """
     Calcula y añade un conjunto de indicadores técnicos a un DataFrame de datos de mercado.
 
-    Utiliza la librería pandas-ta para los cálculos. Los indicadores añadidos son:
+    Los indicadores añadidos son:
     - Media Móvil Exponencial (EMA) de largo plazo.
     - Convergencia/Divergencia de Medias Móviles (MACD).
     - Índice Direccional Promedio (ADX).
 
+    Por defecto se calculan con los núcleos compilados de native_indicators
+    (backend 'native'), que operan directamente sobre los arreglos de precios y
+    reproducen los resultados de pandas-ta (ver validate_native_backend()). Con
+    backend='pandas_ta' se utiliza la librería pandas-ta. En ambos casos las
+    columnas tienen los nombres de pandas-ta.
+
+    Cada indicador se obtiene a través de una caché (IndicatorBank), por lo que
+    solo se calcula la primera vez que se pide para unos datos y longitudes dados.
+    Con 'use_ema_matrix=True', la EMA y el MACD se obtienen de una matriz de EMA
+    precalculada para todo el rango de períodos (EmaMatrix), que también se
+    guarda en la caché y se comparte entre todas las combinaciones de longitudes.
+
     Al final del proceso, se eliminan las filas iniciales que contienen valores
     NaN debido al período de cálculo de los indicadores.
 
+    Los datos de entrada nunca se modifican. Con 'copy=False' el resultado se
+    construye sin copiar las columnas OHLCV (p. ej. datos mapeados en memoria o
+    compartidos con SharedMarketData siguen sin duplicarse en cada proceso), y
+    las filas iniciales se descartan con una vista; el resultado comparte
+    entonces memoria con 'df' y con la caché, por lo que no debe modificarse.
+
     Args:
         df (pd.DataFrame): El DataFrame original con datos OHLCV.
         ema_len (int): El período para la EMA de largo plazo.
@@ -20,30 +200,126 @@ def add_indicators(df, ema_len, macd_fast, macd_slow, macd_signal, adx_len):
         macd_slow (int): El período de la EMA lenta para el MACD.
         macd_signal (int): El período de la línea de señal para el MACD.
         adx_len (int): El período para el cálculo del ADX.
+        bank (IndicatorBank, optional): La caché a utilizar. Por defecto se usa
+                                        la caché compartida del módulo.
+        use_ema_matrix (bool): Si es True, la EMA y el MACD se derivan de la matriz
+                               de EMA precalculada.
+        backend (str): Implementación de los indicadores: 'native' o 'pandas_ta'.
+        fingerprint (str, optional): Huella digital de 'df' (ver IndicatorBank.fingerprint()).
+                                     Quien llama repetidamente con los mismos datos
+                                     puede calcularla una sola vez y pasarla aquí.
+        copy (bool): Si es False, el resultado reutiliza las columnas de 'df' sin copiarlas.
 
     Returns:
-        pd.DataFrame: Un nuevo DataFrame con las columnas de los indicadores añadidas.
+        pd.DataFrame: Un DataFrame con las columnas de los indicadores añadidas.
     """
-    # Se trabaja sobre una copia para evitar la advertencia 'SettingWithCopyWarning'.
-    data = df.copy()
+    if bank is None:
+        bank = indicator_bank
+    if fingerprint is None:
+        fingerprint = bank.fingerprint(df)
+
+    # Los indicadores solo leen los datos de entrada, por lo que no hace falta copiarlos.
+    data = df
 
     # --- 1. Cálculo de Indicadores ---
-    # Se utiliza el metodo de extensión .ta de pandas-ta para añadir los indicadores.
-    # El argumento 'append=True' modifica el DataFrame 'data' directamente.
+    # Los indicadores se añaden al DataFrame en el mismo orden que con 'append=True'
+    # de pandas-ta. Cada backend usa sus propias entradas de la caché.
+    if backend not in ('native', 'pandas_ta'):
+        raise ValueError(f"Backend de indicadores no reconocido: {backend}")
+    native = backend == 'native'
+
+    if use_ema_matrix:
+        ema_matrix = bank.get('ema_matrix', (EMA_MATRIX_MIN_LEN, EMA_MATRIX_MAX_LEN), fingerprint,
+                              lambda: EmaMatrix(data['close'].to_numpy(dtype=float)))
+    else:
+        ema_matrix = None
 
     # Media Móvil Exponencial (EMA)
-    data.ta.ema(length=ema_len, append=True)
+    if ema_matrix is not None and ema_matrix.covers(ema_len):
+        ema = pd.Series(ema_matrix.ema(ema_len), index=data.index, name=f"EMA_{ema_len}")
+    elif native:
+        ema = bank.get('ema_native', (ema_len,), fingerprint,
+                       lambda: _native_ema(data, ema_len))
+    else:
+        ema = bank.get('ema', (ema_len,), fingerprint,
+                       lambda: data.ta.ema(length=ema_len))
 
     # Convergencia/Divergencia de Medias Móviles (MACD)
-    data.ta.macd(fast=macd_fast, slow=macd_slow, signal=macd_signal, append=True)
+    if ema_matrix is not None and ema_matrix.covers(macd_fast, macd_slow):
+        macd = bank.get('macd_matrix', (macd_fast, macd_slow, macd_signal), fingerprint,
+                        lambda: _macd_from_matrix(ema_matrix, data.index, macd_fast, macd_slow, macd_signal))
+    elif native:
+        macd = bank.get('macd_native', (macd_fast, macd_slow, macd_signal), fingerprint,
+                        lambda: _native_macd(data, macd_fast, macd_slow, macd_signal))
+    else:
+        macd = bank.get('macd', (macd_fast, macd_slow, macd_signal), fingerprint,
+                        lambda: data.ta.macd(fast=macd_fast, slow=macd_slow, signal=macd_signal))
 
     # Índice Direccional Promedio (ADX)
-    data.ta.adx(length=adx_len, append=True)
+    if native:
+        adx = bank.get('adx_native', (adx_len,), fingerprint,
+                       lambda: _native_adx(data, adx_len))
+    else:
+        adx = bank.get('adx', (adx_len,), fingerprint,
+                       lambda: data.ta.adx(length=adx_len))
+
+    data = pd.concat([data, ema, macd, adx], axis=1, copy=copy)
 
     # --- 2. Limpieza de Datos ---
     # Los indicadores técnicos generan valores NaN en las primeras filas
     # del DataFrame, ya que necesitan un histórico mínimo para ser calculados.
     # Estas filas se eliminan para asegurar la integridad de los datos en el backtest.
-    data.dropna(inplace=True)
+    if copy:
+        data.dropna(inplace=True)
+        return data
+
+    # Sin copia: si los NaN solo están en las filas iniciales (el caso habitual),
+    # basta con una vista a partir de la primera fila completa.
+    valid = data.notna().all(axis=1).to_numpy()
+    first_valid = int(valid.argmax()) if valid.any() else len(valid)
+    if valid[first_valid:].all():
+        return data.iloc[first_valid:]
+    return data[valid]
+
+
+def validate_native_backend(df, ema_len, macd_fast, macd_slow, macd_signal, adx_len,
+                            tolerance=INDICATOR_TOLERANCE):
+    """
+    Compara los indicadores del backend nativo con los de pandas-ta.
+
+    Para cada columna se calcula el error absoluto máximo dividido por la escala
+    de la serie de pandas-ta (su valor absoluto máximo), de modo que la misma
+    tolerancia sirve para precios, osciladores y el histograma del MACD.
+
+    Args:
+        df (pd.DataFrame): Datos OHLCV sobre los que se comparan los indicadores.
+        ema_len (int): El período para la EMA de largo plazo.
+        macd_fast (int): El período de la EMA rápida para el MACD.
+        macd_slow (int): El período de la EMA lenta para el MACD.
+        macd_signal (int): El período de la línea de señal para el MACD.
+        adx_len (int): El período para el cálculo del ADX.
+        tolerance (float): Error relativo máximo admitido.
+
+    Returns:
+        tuple[bool, pd.Series]: Si todas las columnas están dentro de la tolerancia,
+                                y el error de cada columna.
+    """
+    indicator_params = {'ema_len': ema_len, 'macd_fast': macd_fast, 'macd_slow': macd_slow,
+                        'macd_signal': macd_signal, 'adx_len': adx_len}
+    # Se usa una caché vacía para comparar cálculos nuevos de ambos backends.
+    native = add_indicators(df, **indicator_params, bank=IndicatorBank(0), backend='native')
+    reference = add_indicators(df, **indicator_params, bank=IndicatorBank(0), backend='pandas_ta')
+
+    errors = {}
+    for col in reference.columns.difference(df.columns):
+        expected = reference[col].to_numpy(dtype=float)
+        actual = native[col].reindex(reference.index).to_numpy(dtype=float)
+        scale = np.max(np.abs(expected)) if len(expected) else 0.
+        errors[col] = np.max(np.abs(actual - expected)) / scale if scale > 0 else 0.
+    errors = pd.Series(errors, dtype=float)
 
-    return data
\ No newline at end of file
+    is_valid = bool(native.index.equals(reference.index) and (errors <= tolerance).all())
+    if not is_valid:
+        print(f"  - Advertencia: El backend nativo difiere de pandas-ta más de {tolerance} en: "
+              f"{list(errors[~(errors <= tolerance)].index)}")
+    return is_valid, errors
\ No newline at end of file
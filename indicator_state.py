@@ -0,0 +1,323 @@
+"""
+Estado incremental de los indicadores técnicos para velas en tiempo real.
+
+Las clases de este módulo (EmaState, MacdState y AdxState) mantienen el
+estado de las recurrencias de la EMA, el MACD y el ADX, de modo que cada vela
+nueva se procesa en O(1) con update(bar) en lugar de recalcular todo el
+histórico. Aplican paso a paso las mismas fórmulas que los núcleos de
+native_indicators (las funciones compiladas se reutilizan en su versión de
+Python mediante '.py_func'), por lo que los valores coinciden con los de
+add_indicators(backend='native').
+
+El estado se puede guardar con to_dict() y restaurar con from_dict(), por
+ejemplo para reanudar un proceso de paper trading sin volver a procesar el
+histórico.
+"""
+
+import math
+
+import numpy as np
+from native_indicators import _ewm_update, _rma_alpha, _span_alpha
+
+# Versiones en Python de las funciones compiladas (evitan el costo de llamada a Numba).
+_ewm_step = _ewm_update.py_func
+_EPSILON = float(np.finfo(np.float64).eps)
+
+
+def _divide(numerator, denominator):
+    """División con la semántica de NumPy (x/0 = inf, 0/0 = NaN) en lugar de una excepción."""
+    if denominator != 0.:
+        return numerator / denominator
+    if numerator != numerator or numerator == 0.:
+        return math.nan
+    return math.copysign(math.inf, numerator) * math.copysign(1., denominator)
+
+
+class EmaState:
+    """
+    Estado incremental de una EMA con semilla SMA (como native_indicators.ema).
+
+    Los valores NaN iniciales se omiten; la semilla es la media de las primeras
+    'length' observaciones a partir del primer valor válido.
+
+    Attributes:
+        length (int): Período de la EMA.
+        value (float): Último valor de la EMA (NaN durante el calentamiento).
+    """
+
+    def __init__(self, length):
+        """
+        Inicializa el estado de la EMA.
+
+        Args:
+            length (int): Período de la EMA.
+        """
+        self.length = length
+        self.value = math.nan
+        self._alpha = _span_alpha.py_func(length)
+        self._old_wt = 1.
+        self._n_seen = 0      # Observaciones desde el primer valor válido (hasta la semilla).
+        self._total = 0.      # Suma de los valores válidos del período de la semilla.
+        self._count = 0       # Número de valores válidos del período de la semilla.
+
+    def update(self, bar):
+        """
+        Procesa una vela nueva.
+
+        Args:
+            bar (Mapping): La vela, con al menos el campo 'close'.
+
+        Returns:
+            float: El valor de la EMA tras la vela.
+        """
+        return self.update_value(bar['close'])
+
+    def update_value(self, value):
+        """
+        Procesa una observación nueva de la serie de entrada.
+
+        Args:
+            value (float): La observación (puede ser NaN).
+
+        Returns:
+            float: El valor de la EMA tras la observación.
+        """
+        if self._n_seen < self.length:
+            if self._n_seen == 0 and value != value:
+                return self.value
+            self._n_seen += 1
+            if value == value:
+                self._total += value
+                self._count += 1
+            if self._n_seen == self.length:
+                self.value = self._total / self._count if self._count > 0 else math.nan
+            return self.value
+
+        self.value, self._old_wt = _ewm_step(self.value, self._old_wt, value, self._alpha)
+        return self.value
+
+    def to_dict(self):
+        """Retorna el estado como diccionario serializable (p. ej. en JSON)."""
+        return {'length': self.length, 'value': self.value, 'old_wt': self._old_wt,
+                'n_seen': self._n_seen, 'total': self._total, 'count': self._count}
+
+    @classmethod
+    def from_dict(cls, state):
+        """
+        Restaura un estado guardado con to_dict().
+
+        Args:
+            state (dict): El estado guardado.
+
+        Returns:
+            EmaState: El estado restaurado.
+        """
+        ema = cls(state['length'])
+        ema.value = state['value']
+        ema._old_wt = state['old_wt']
+        ema._n_seen = state['n_seen']
+        ema._total = state['total']
+        ema._count = state['count']
+        return ema
+
+
+class MacdState:
+    """
+    Estado incremental del MACD (como native_indicators.macd).
+
+    Attributes:
+        fast (int): Período de la EMA rápida.
+        slow (int): Período de la EMA lenta.
+        signal (int): Período de la línea de señal.
+    """
+
+    def __init__(self, fast, slow, signal):
+        """
+        Inicializa el estado del MACD.
+
+        Args:
+            fast (int): Período de la EMA rápida.
+            slow (int): Período de la EMA lenta.
+            signal (int): Período de la línea de señal.
+        """
+        if slow < fast:
+            fast, slow = slow, fast
+        self.fast = fast
+        self.slow = slow
+        self.signal = signal
+        self._fast_ema = EmaState(fast)
+        self._slow_ema = EmaState(slow)
+        self._signal_ema = EmaState(signal)
+
+    def update(self, bar):
+        """
+        Procesa una vela nueva.
+
+        Args:
+            bar (Mapping): La vela, con al menos el campo 'close'.
+
+        Returns:
+            tuple[float, float, float]: La línea MACD, el histograma y la línea de señal.
+        """
+        close = bar['close']
+        macd_line = self._fast_ema.update_value(close) - self._slow_ema.update_value(close)
+        signal_line = self._signal_ema.update_value(macd_line)
+        return macd_line, macd_line - signal_line, signal_line
+
+    def to_dict(self):
+        """Retorna el estado como diccionario serializable (p. ej. en JSON)."""
+        return {'fast': self.fast, 'slow': self.slow, 'signal': self.signal,
+                'fast_ema': self._fast_ema.to_dict(), 'slow_ema': self._slow_ema.to_dict(),
+                'signal_ema': self._signal_ema.to_dict()}
+
+    @classmethod
+    def from_dict(cls, state):
+        """
+        Restaura un estado guardado con to_dict().
+
+        Args:
+            state (dict): El estado guardado.
+
+        Returns:
+            MacdState: El estado restaurado.
+        """
+        macd = cls(state['fast'], state['slow'], state['signal'])
+        macd._fast_ema = EmaState.from_dict(state['fast_ema'])
+        macd._slow_ema = EmaState.from_dict(state['slow_ema'])
+        macd._signal_ema = EmaState.from_dict(state['signal_ema'])
+        return macd
+
+
+class AdxState:
+    """
+    Estado incremental del ADX con suavizado de Wilder (como native_indicators.adx).
+
+    El procesamiento por lotes (igual que pandas-ta) suma epsilon a todos los
+    rangos máximo-mínimo si alguna vela de la serie tiene rango nulo. En tiempo
+    real no se conocen las velas futuras, por lo que aquí el ajuste se aplica a
+    partir de la primera vela con rango nulo; la diferencia es del orden de
+    epsilon y solo afecta a series con velas de rango nulo.
+
+    Attributes:
+        length (int): Período del ADX.
+    """
+
+    def __init__(self, length):
+        """
+        Inicializa el estado del ADX.
+
+        Args:
+            length (int): Período del ADX.
+        """
+        self.length = length
+        self._alpha = _rma_alpha.py_func(length)
+        self._n_bars = 0
+        self._prev_high = math.nan
+        self._prev_low = math.nan
+        self._prev_close = math.nan
+        self._zero_range = False
+        # Semilla SMA del ATR.
+        self._tr_total = 0.
+        self._tr_count = 0
+        # Promedios de Wilder: (valor, peso acumulado).
+        self._atr = [math.nan, 1.]
+        self._pos = [math.nan, 1.]
+        self._neg = [math.nan, 1.]
+        self._adx = [math.nan, 1.]
+        # ADX de las dos velas anteriores, para el ADXR.
+        self._adx_history = [math.nan, math.nan]
+
+    def _smooth(self, average, value):
+        """Aplica un paso del promedio de Wilder a 'average' ([valor, peso])."""
+        average[0], average[1] = _ewm_step(average[0], average[1], value, self._alpha)
+        return average[0]
+
+    def update(self, bar):
+        """
+        Procesa una vela nueva.
+
+        Args:
+            bar (Mapping): La vela, con los campos 'high', 'low' y 'close'.
+
+        Returns:
+            tuple[float, float, float, float]: ADX, ADXR, +DI y -DI.
+        """
+        high, low, close = bar['high'], bar['low'], bar['close']
+        i = self._n_bars
+        self._n_bars += 1
+
+        # --- Rango verdadero (NaN en la primera vela) ---
+        hl_range = high - low
+        if hl_range == 0.:
+            self._zero_range = True
+        if self._zero_range:
+            hl_range += _EPSILON
+        true_range = math.nan
+        pos = neg = math.nan
+        if i > 0:
+            for value in (abs(hl_range), abs(high - self._prev_close), abs(self._prev_close - low)):
+                if value == value and not true_range >= value:
+                    true_range = value
+            up = high - self._prev_high
+            dn = self._prev_low - low
+            if up == up and dn == dn:
+                pos = up if (up > dn and up > 0 and abs(up) >= _EPSILON) else 0.
+                neg = dn if (dn > up and dn > 0 and abs(dn) >= _EPSILON) else 0.
+        self._prev_high, self._prev_low, self._prev_close = high, low, close
+
+        # --- ATR: semilla SMA en la vela length-1 y suavizado de Wilder ---
+        if i < self.length:
+            if true_range == true_range:
+                self._tr_total += true_range
+                self._tr_count += 1
+            atr = math.nan
+            if i == self.length - 1:
+                seed = self._tr_total / self._tr_count if self._tr_count > 0 else math.nan
+                atr = self._smooth(self._atr, seed)
+        else:
+            atr = self._smooth(self._atr, true_range)
+
+        # --- Indicador direccional, DX y ADX ---
+        k = _divide(100., atr)
+        dmp = k * self._smooth(self._pos, pos)
+        dmn = k * self._smooth(self._neg, neg)
+        dx = _divide(100. * abs(dmp - dmn), dmp + dmn)
+        adx = self._smooth(self._adx, dx)
+
+        adxr = 0.5 * (adx + self._adx_history[0])
+        self._adx_history = [self._adx_history[1], adx]
+        return adx, adxr, dmp, dmn
+
+    def to_dict(self):
+        """Retorna el estado como diccionario serializable (p. ej. en JSON)."""
+        return {'length': self.length, 'n_bars': self._n_bars,
+                'prev_high': self._prev_high, 'prev_low': self._prev_low, 'prev_close': self._prev_close,
+                'zero_range': self._zero_range, 'tr_total': self._tr_total, 'tr_count': self._tr_count,
+                'atr': list(self._atr), 'pos': list(self._pos), 'neg': list(self._neg),
+                'adx': list(self._adx), 'adx_history': list(self._adx_history)}
+
+    @classmethod
+    def from_dict(cls, state):
+        """
+        Restaura un estado guardado con to_dict().
+
+        Args:
+            state (dict): El estado guardado.
+
+        Returns:
+            AdxState: El estado restaurado.
+        """
+        adx = cls(state['length'])
+        adx._n_bars = state['n_bars']
+        adx._prev_high = state['prev_high']
+        adx._prev_low = state['prev_low']
+        adx._prev_close = state['prev_close']
+        adx._zero_range = state['zero_range']
+        adx._tr_total = state['tr_total']
+        adx._tr_count = state['tr_count']
+        adx._atr = list(state['atr'])
+        adx._pos = list(state['pos'])
+        adx._neg = list(state['neg'])
+        adx._adx = list(state['adx'])
+        adx._adx_history = list(state['adx_history'])
+        return adx
\ No newline at end of file
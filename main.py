@@ -18,7 +18,7 @@ from reporting import plot_portfolio_value, generate_performance_report
 from config import INITIAL_CASH
 
 
-def print_results(phase_name, portfolio_series, initial_cash):
+def print_results(phase_name, portfolio_series, initial_cash, trade_log=None):
     """
     Imprime en consola un resumen estandarizado del rendimiento de una fase
     del backtesting.
@@ -27,6 +27,7 @@ def print_results(phase_name, portfolio_series, initial_cash):
         phase_name (str): El nombre de la fase (ej. "Entrenamiento", "Validación").
         portfolio_series (pd.Series): Serie de tiempo con el valor del portafolio.
         initial_cash (float): El capital inicial para el cálculo de retornos.
+        trade_log (TradeLog, optional): Las operaciones de la fase (ver Backtester.trade_log).
     """
     print(f"\n------ Resumen de Resultados: Fase de {phase_name} ------")
 
@@ -49,6 +50,10 @@ def print_results(phase_name, portfolio_series, initial_cash):
     print(f"Capital Final:   ${final_value:,.2f}")
     print(f"Retorno Total:   {total_return_pct:.2f}%")
     print(f"Retorno Anualizado (APR): {annualized_return_pct:.2f}%")
+    if trade_log is not None and len(trade_log):
+        print(f"Operaciones:     {len(trade_log)}")
+        print(f"Tasa de Acierto: {trade_log.win_rate() * 100:.2f}%")
+        print(f"Expectativa por Operación: ${trade_log.expectancy():,.2f}")
     print("--------------------------------------------------")
 
 
@@ -98,7 +103,7 @@ def main():
     train_data_indicators = add_indicators(train_set.copy(), **indicator_params)
     train_backtester = Backtester(train_data_indicators, champion_params)
     train_portfolio = train_backtester.run(return_value_series=True)
-    print_results("Entrenamiento (Línea Base)", train_portfolio, INITIAL_CASH)
+    print_results("Entrenamiento (Línea Base)", train_portfolio, INITIAL_CASH, train_backtester.trade_log)
     if not train_portfolio.empty:
         generate_performance_report(train_portfolio, "train_performance.html")
 
@@ -107,7 +112,7 @@ def main():
     validation_data_indicators = add_indicators(validation_set.copy(), **indicator_params)
     val_backtester = Backtester(validation_data_indicators, champion_params)
     val_portfolio = val_backtester.run(return_value_series=True)
-    print_results("Validación", val_portfolio, INITIAL_CASH)
+    print_results("Validación", val_portfolio, INITIAL_CASH, val_backtester.trade_log)
     if not val_portfolio.empty:
         generate_performance_report(val_portfolio, "validation_performance.html")
         plot_portfolio_value(val_portfolio, "validation_equity_curve.png")
@@ -117,7 +122,7 @@ def main():
     test_data_indicators = add_indicators(test_set.copy(), **indicator_params)
     test_backtester = Backtester(test_data_indicators, champion_params)
     test_portfolio = test_backtester.run(return_value_series=True)
-    print_results("Prueba Final", test_portfolio, INITIAL_CASH)
+    print_results("Prueba Final", test_portfolio, INITIAL_CASH, test_backtester.trade_log)
     if not test_portfolio.empty:
         generate_performance_report(test_portfolio, "final_test_performance.html")
         plot_portfolio_value(test_portfolio, "final_test_equity_curve.png")
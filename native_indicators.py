@@ -0,0 +1,397 @@
+"""
+Indicadores técnicos nativos compilados con Numba.
+
+Este módulo implementa sobre arreglos de NumPy las mismas recurrencias que
+utiliza pandas-ta (EMA con semilla SMA, MACD y ADX con suavizado de Wilder),
+reproduciendo la fórmula de pandas paso a paso para que los resultados
+coincidan numéricamente con la librería. Es el backend por defecto de
+indicator_calculator.add_indicators().
+
+Incluye además EmaMatrix, que calcula en una sola pasada todas las EMA del
+rango de búsqueda del optimizador, de modo que la EMA de tendencia y las
+líneas del MACD se obtienen por consulta y resta en lugar de recalcularse.
+"""
+
+import numpy as np
+from numba import njit, prange
+from config import EMA_MATRIX_MIN_LEN, EMA_MATRIX_MAX_LEN
+
+
+@njit(cache=True, nogil=True)
+def _span_alpha(span):
+    """Factor de suavizado de pandas para ewm(span=...): 1 / (1 + (span - 1) / 2)."""
+    return 1. / (1. + (span - 1) / 2)
+
+
+@njit(cache=True, nogil=True)
+def _rma_alpha(length):
+    """Factor de suavizado de Wilder (RMA) tal como lo aplica pandas para ewm(alpha=1/length)."""
+    alpha = 1. / length
+    return 1. / (1. + (1. - alpha) / alpha)
+
+
+@njit(cache=True, nogil=True)
+def _ewm_update(weighted, old_wt, cur, alpha):
+    """
+    Aplica un paso del promedio exponencial de pandas (adjust=False, ignore_na=False).
+
+    Args:
+        weighted (float): Valor promedio acumulado hasta la vela anterior.
+        old_wt (float): Peso acumulado del valor anterior.
+        cur (float): Observación actual (puede ser NaN).
+        alpha (float): Factor de suavizado.
+
+    Returns:
+        tuple[float, float]: El nuevo valor promedio y su peso acumulado.
+    """
+    if weighted == weighted:
+        old_wt *= 1. - alpha
+        if cur == cur:
+            if weighted != cur:
+                weighted = old_wt * weighted + alpha * cur
+                weighted /= (old_wt + alpha)
+            old_wt = 1.
+    elif cur == cur:
+        weighted = cur
+        old_wt = 1.
+    return weighted, old_wt
+
+
+@njit(cache=True, nogil=True)
+def _ema_1d(values, length):
+    """
+    EMA con semilla SMA (como pandas-ta con presma=True) sobre un arreglo 1-D.
+
+    Los valores NaN iniciales se omiten: la semilla es la media de las primeras
+    'length' observaciones a partir del primer valor válido.
+
+    Args:
+        values (np.ndarray): Serie de entrada (float64).
+        length (int): Período de la EMA.
+
+    Returns:
+        np.ndarray: La EMA, con NaN durante el período de calentamiento.
+    """
+    n_bars = values.shape[0]
+    out = np.full(n_bars, np.nan)
+
+    first = 0
+    while first < n_bars and values[first] != values[first]:
+        first += 1
+    seed_idx = first + length - 1
+    if seed_idx >= n_bars:
+        return out
+
+    total = 0.0
+    count = 0
+    for i in range(first, seed_idx + 1):
+        if values[i] == values[i]:
+            total += values[i]
+            count += 1
+    weighted = total / count if count > 0 else np.nan
+    old_wt = 1.
+    out[seed_idx] = weighted
+
+    alpha = _span_alpha(length)
+    for i in range(seed_idx + 1, n_bars):
+        weighted, old_wt = _ewm_update(weighted, old_wt, values[i], alpha)
+        out[i] = weighted
+
+    return out
+
+
+@njit(cache=True, nogil=True, parallel=True)
+def _ema_matrix(close, min_len, max_len):
+    """
+    Calcula en una sola llamada compilada todas las EMA de min_len a max_len.
+
+    Las semillas SMA de todos los períodos salen de una única suma acumulada,
+    y las filas se reparten entre los hilos disponibles; cada una se rellena de
+    forma contigua para aprovechar la caché del CPU.
+
+    Args:
+        close (np.ndarray): Precios de cierre (float64, sin NaN).
+        min_len (int): Período mínimo.
+        max_len (int): Período máximo (inclusive).
+
+    Returns:
+        np.ndarray: Matriz (N_longitudes x N_velas); la fila k es la EMA de
+                    período min_len + k.
+    """
+    n_bars = close.shape[0]
+    n_lengths = max_len - min_len + 1
+    out = np.full((n_lengths, n_bars), np.nan)
+
+    # Suma acumulada de los precios para obtener la semilla SMA de cada período.
+    running_sum = np.empty(n_bars)
+    total = 0.0
+    for i in range(n_bars):
+        total += close[i]
+        running_sum[i] = total
+
+    for k in prange(n_lengths):
+        length = min_len + k
+        if length > n_bars:
+            continue
+        alpha = _span_alpha(length)
+        old_wt = 1. - alpha
+        # Sin NaN el peso acumulado es constante, por lo que el divisor de pandas
+        # (old_wt + alpha) también lo es; si vale exactamente 1 se omite la división.
+        denom = old_wt + alpha
+        weighted = running_sum[length - 1] / length
+        row = out[k]
+        row[length - 1] = weighted
+        for i in range(length, n_bars):
+            cur = close[i]
+            if weighted != cur:
+                weighted = old_wt * weighted + alpha * cur
+                if denom != 1.:
+                    weighted /= denom
+            row[i] = weighted
+
+    return out
+
+
+@njit(cache=True, nogil=True)
+def _macd(close, fast, slow, signal):
+    """
+    MACD como en pandas-ta: EMA rápida menos EMA lenta y su línea de señal.
+
+    Args:
+        close (np.ndarray): Precios de cierre (float64).
+        fast (int): Período de la EMA rápida.
+        slow (int): Período de la EMA lenta.
+        signal (int): Período de la línea de señal.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: La línea MACD, el histograma
+                                                   y la línea de señal.
+    """
+    if slow < fast:
+        fast, slow = slow, fast
+    macd_line = _ema_1d(close, fast) - _ema_1d(close, slow)
+    # La señal es una EMA de la línea MACD a partir de su primer valor válido.
+    signal_line = _ema_1d(macd_line, signal)
+    return macd_line, macd_line - signal_line, signal_line
+
+
+@njit(cache=True, nogil=True)
+def _rma_from(values, start, alpha, out):
+    """
+    Aplica el suavizado de Wilder (ewm con adjust=False) desde la posición 'start'.
+
+    Args:
+        values (np.ndarray): Serie de entrada (puede contener NaN).
+        start (int): Primera posición a procesar.
+        alpha (float): Factor de suavizado.
+        out (np.ndarray): Arreglo de salida, modificado in-place.
+    """
+    weighted = np.nan
+    old_wt = 1.
+    for i in range(start, values.shape[0]):
+        weighted, old_wt = _ewm_update(weighted, old_wt, values[i], alpha)
+        out[i] = weighted
+
+
+@njit(cache=True, nogil=True, error_model='numpy')
+def _adx(high, low, close, length):
+    """
+    ADX con suavizado de Wilder, como pandas-ta (sin TA-Lib ni 'tvmode').
+
+    Reproduce cada paso de la librería: rango verdadero con la primera vela en
+    NaN, ATR con semilla SMA, movimientos direccionales (+DM/-DM) con valores
+    casi nulos redondeados a cero, +DI/-DI, DX y su media RMA (ADX), y el ADXR
+    con un desplazamiento de 2 velas. Las divisiones siguen la semántica de
+    NumPy (error_model='numpy'): un DX de 0/0 es NaN, como en pandas.
+
+    Args:
+        high (np.ndarray): Precios máximos (float64).
+        low (np.ndarray): Precios mínimos (float64).
+        close (np.ndarray): Precios de cierre (float64).
+        length (int): Período del ADX.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]: ADX, ADXR, +DI y -DI.
+    """
+    n_bars = close.shape[0]
+    eps = np.finfo(np.float64).eps
+    alpha = _rma_alpha(length)
+
+    # --- Rango verdadero ---
+    # pandas-ta suma epsilon a todo el rango máximo-mínimo si alguna vela tiene rango nulo.
+    hl_range = high - low
+    if np.any(hl_range == 0.):
+        hl_range = hl_range + eps
+    true_range = np.full(n_bars, np.nan)
+    for i in range(1, n_bars):
+        best = np.nan
+        for value in (abs(hl_range[i]), abs(high[i] - close[i - 1]), abs(close[i - 1] - low[i])):
+            if value == value and not best >= value:
+                best = value
+        true_range[i] = best
+
+    # --- ATR: semilla SMA en la vela length-1 y suavizado de Wilder ---
+    atr = np.full(n_bars, np.nan)
+    if length - 1 < n_bars:
+        total = 0.
+        count = 0
+        for i in range(length):
+            if true_range[i] == true_range[i]:
+                total += true_range[i]
+                count += 1
+        seeded = true_range[length - 1:].copy()
+        seeded[0] = total / count if count > 0 else np.nan
+        _rma_from(seeded, 0, alpha, atr[length - 1:])
+
+    # --- Movimientos direccionales ---
+    pos = np.full(n_bars, np.nan)
+    neg = np.full(n_bars, np.nan)
+    for i in range(1, n_bars):
+        up = high[i] - high[i - 1]
+        dn = low[i - 1] - low[i]
+        if up != up or dn != dn:
+            continue
+        pos[i] = up if (up > dn and up > 0 and abs(up) >= eps) else 0.
+        neg[i] = dn if (dn > up and dn > 0 and abs(dn) >= eps) else 0.
+
+    pos_rma = np.full(n_bars, np.nan)
+    neg_rma = np.full(n_bars, np.nan)
+    _rma_from(pos, 0, alpha, pos_rma)
+    _rma_from(neg, 0, alpha, neg_rma)
+
+    dmp = np.empty(n_bars)
+    dmn = np.empty(n_bars)
+    dx = np.empty(n_bars)
+    for i in range(n_bars):
+        k = 100. / atr[i]
+        dmp[i] = k * pos_rma[i]
+        dmn[i] = k * neg_rma[i]
+        dx[i] = 100. * abs(dmp[i] - dmn[i]) / (dmp[i] + dmn[i])
+
+    adx = np.full(n_bars, np.nan)
+    _rma_from(dx, 0, alpha, adx)
+
+    adxr = np.full(n_bars, np.nan)
+    for i in range(2, n_bars):
+        adxr[i] = 0.5 * (adx[i] + adx[i - 2])
+
+    return adx, adxr, dmp, dmn
+
+
+def ema(close, length):
+    """
+    EMA con semilla SMA (equivalente a pandas-ta 'ema').
+
+    Args:
+        close (np.ndarray): Serie de precios.
+        length (int): Período de la EMA.
+
+    Returns:
+        np.ndarray: La EMA, con NaN durante el período de calentamiento.
+    """
+    return _ema_1d(np.ascontiguousarray(close, dtype=np.float64), length)
+
+
+def macd(close, fast, slow, signal):
+    """
+    MACD (equivalente a pandas-ta 'macd').
+
+    Args:
+        close (np.ndarray): Precios de cierre.
+        fast (int): Período de la EMA rápida.
+        slow (int): Período de la EMA lenta.
+        signal (int): Período de la línea de señal.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: La línea MACD, el histograma
+                                                   y la línea de señal.
+    """
+    return _macd(np.ascontiguousarray(close, dtype=np.float64), fast, slow, signal)
+
+
+def adx(high, low, close, length):
+    """
+    ADX, ADXR y el indicador direccional (+DI/-DI) (equivalente a pandas-ta 'adx').
+
+    Args:
+        high (np.ndarray): Precios máximos.
+        low (np.ndarray): Precios mínimos.
+        close (np.ndarray): Precios de cierre.
+        length (int): Período del ADX.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]: ADX, ADXR, +DI y -DI.
+    """
+    return _adx(np.ascontiguousarray(high, dtype=np.float64), np.ascontiguousarray(low, dtype=np.float64),
+                np.ascontiguousarray(close, dtype=np.float64), length)
+
+
+class EmaMatrix:
+    """
+    Banco precalculado de EMA para todo el rango de períodos del optimizador.
+
+    Contiene una matriz 2-D con la EMA de cada período entre min_len y max_len,
+    calculada en una única llamada compilada. A partir de ella, la EMA de
+    tendencia y las líneas MACD/señal que necesita el Backtester se obtienen
+    por consulta de filas y restas.
+
+    Attributes:
+        min_len (int): Período mínimo incluido.
+        max_len (int): Período máximo incluido.
+        values (np.ndarray): Matriz (N_longitudes x N_velas) de valores EMA.
+    """
+
+    def __init__(self, close, min_len=EMA_MATRIX_MIN_LEN, max_len=EMA_MATRIX_MAX_LEN):
+        """
+        Calcula la matriz de EMA.
+
+        Args:
+            close (np.ndarray): Precios de cierre.
+            min_len (int): Período mínimo a precalcular.
+            max_len (int): Período máximo a precalcular.
+        """
+        self.min_len = min_len
+        self.max_len = max_len
+        close = np.ascontiguousarray(close, dtype=np.float64)
+        self.values = _ema_matrix(close, min_len, max_len)
+        # La matriz se comparte entre pruebas, por lo que se protege contra escritura.
+        self.values.flags.writeable = False
+
+    def covers(self, *lengths):
+        """Indica si todos los períodos dados están dentro de la matriz."""
+        return all(self.min_len <= length <= self.max_len for length in lengths)
+
+    def ema(self, length):
+        """
+        Retorna la EMA de un período (vista de solo lectura de la matriz).
+
+        Args:
+            length (int): El período de la EMA.
+
+        Returns:
+            np.ndarray: La serie EMA.
+        """
+        return self.values[length - self.min_len]
+
+    def macd(self, fast, slow, signal):
+        """
+        Calcula el MACD a partir de las EMA precalculadas.
+
+        Replica la convención de pandas-ta: si slow < fast se intercambian, y la
+        línea de señal es una EMA (con semilla SMA) de la línea MACD a partir de
+        su primer valor válido.
+
+        Args:
+            fast (int): Período de la EMA rápida.
+            slow (int): Período de la EMA lenta.
+            signal (int): Período de la línea de señal.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray]: La línea MACD, el histograma
+                                                       y la línea de señal.
+        """
+        if slow < fast:
+            fast, slow = slow, fast
+        macd_line = self.ema(fast) - self.ema(slow)
+        signal_line = _ema_1d(macd_line, signal)
+        return macd_line, macd_line - signal_line, signal_line
\ No newline at end of file
@@ -1,7 +1,27 @@
+import gc
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+
 import optuna
 import pandas as pd
+from optuna.storages import JournalStorage, RDBStorage
+from optuna.storages.journal import JournalFileBackend
+from optuna.trial import TrialState
 from backtester import Backtester
-from indicator_calculator import add_indicators
+from config import N_JOBS, OPTUNA_PRUNER, FOLD_WORKERS, STUDY_NAME, STUDY_STORAGE, TRIAL_CACHE_ENABLED
+from config import STUDY_HEARTBEAT_INTERVAL
+from config import INITIAL_CASH, COMMISSION, EXECUTION_MODE, INTRABAR_TIE_BREAK, INDICATOR_BACKEND
+from data_loader import SharedMarketData
+from engine import ENGINE_VERSION
+from indicator_calculator import IndicatorBank, add_indicators
+from trial_cache import TrialCache
+from walk_forward import WalkForwardSplitter
 
 
 class Optimizer:
@@ -11,53 +31,176 @@ class Optimizer:
     cruzada de tipo Walk-Forward.
     """
 
-    def __init__(self, data):
+    def __init__(self, data, pruner=OPTUNA_PRUNER, splitter=None, fold_workers=FOLD_WORKERS,
+                 use_trial_cache=TRIAL_CACHE_ENABLED, data_fingerprint=None):
         """
         Inicializa el optimizador.
 
         Args:
             data (pd.DataFrame): El conjunto de datos de mercado para la optimización.
+            pruner (str): Estrategia de poda de pruebas poco prometedoras:
+                          'median', 'halving', 'hyperband' o 'none'.
+            splitter (WalkForwardSplitter, optional): Los segmentos del Walk-Forward.
+                                                      Por defecto, los de config.py.
+            fold_workers (int): Número de hilos con los que se evalúan en paralelo
+                                los segmentos de una misma prueba.
+            use_trial_cache (bool): Si es True, los valores objetivo se guardan en
+                                    la caché persistente de pruebas (TrialCache).
+            data_fingerprint (str, optional): Huella digital de 'data' (ver
+                IndicatorBank.fingerprint()), si ya se calculó. Los datos no cambian
+                durante el estudio, por lo que se calcula una sola vez.
         """
         self.data = data
+        self.pruner = pruner
+        self.splitter = splitter if splitter is not None else WalkForwardSplitter()
+        self.fold_workers = fold_workers
+        self.trial_cache = TrialCache() if use_trial_cache else None
+        self.data_fingerprint = data_fingerprint or IndicatorBank.fingerprint(data)
 
-    def _calculate_objective_metric(self, portfolio_value_series):
+    def _build_pruner(self):
+        """
+        Construye el pruner de Optuna configurado.
+
+        Cada segmento del Walk-Forward se reporta como un paso de la prueba, por lo
+        que el pruner puede detener una prueba cuyos primeros segmentos ya son
+        claramente peores que los de las demás.
+
+        Returns:
+            optuna.pruners.BasePruner: El pruner correspondiente a self.pruner.
+        """
+        if self.pruner == 'median':
+            return optuna.pruners.MedianPruner(n_startup_trials=5, n_warmup_steps=1)
+        if self.pruner == 'halving':
+            return optuna.pruners.SuccessiveHalvingPruner()
+        if self.pruner == 'hyperband':
+            return optuna.pruners.HyperbandPruner()
+        if self.pruner in (None, 'none'):
+            return optuna.pruners.NopPruner()
+        raise ValueError(f"Pruner no reconocido: {self.pruner}")
+
+    @staticmethod
+    def _calmar_ratio(first_value, last_value, max_drawdown, n_hours):
         """
-        Calcula la métrica objetivo para la optimización (Calmar Ratio).
+        Calcula el Calmar Ratio a partir de sus componentes.
 
         El Calmar Ratio se define como el retorno anualizado dividido por el
         máximo drawdown. Este metodo está adaptado para datos con frecuencia horaria.
 
         Args:
-            portfolio_value_series (pd.Series): Serie de tiempo con el valor del
-                                               portafolio a lo largo del backtest.
+            first_value (float): Primer valor del portafolio.
+            last_value (float): Último valor del portafolio.
+            max_drawdown (float): Máximo drawdown (positivo, como fracción del máximo).
+            n_hours (float): Horas transcurridas entre el primer y el último valor.
 
         Returns:
             float: El valor calculado del Calmar Ratio. Retorna 0.0 si el cálculo
                    no es posible o si el drawdown es insignificante.
         """
-        if portfolio_value_series.empty or len(portfolio_value_series) < 2:
-            return 0.0
-
-        total_return = (portfolio_value_series.iloc[-1] / portfolio_value_series.iloc[0]) - 1
+        total_return = (last_value / first_value) - 1
 
         # Anualización basada en datos horarios (asumiendo 24/7).
         # Total de horas en un año = 365 * 24 = 8760.
-        n_hours = (portfolio_value_series.index[-1] - portfolio_value_series.index[0]).total_seconds() / 3600.0
         if n_hours < 1:
             return 0.0
         annualized_return = (1 + total_return) ** (8760.0 / n_hours) - 1
 
+        # Si el drawdown es menor al 1%, se considera insignificante y se penaliza
+        # para evitar optimizaciones basadas en un riesgo irrealmente bajo.
+        if max_drawdown < 0.01:
+            return 0.0
+
+        return annualized_return / max_drawdown
+
+    def _calculate_objective_metric(self, portfolio_value_series):
+        """
+        Calcula la métrica objetivo para la optimización (Calmar Ratio) a partir
+        de la serie de valores del portafolio.
+
+        Args:
+            portfolio_value_series (pd.Series): Serie de tiempo con el valor del
+                                               portafolio a lo largo del backtest.
+
+        Returns:
+            float: El Calmar Ratio (ver _calmar_ratio()).
+        """
+        if portfolio_value_series.empty or len(portfolio_value_series) < 2:
+            return 0.0
+
+        n_hours = (portfolio_value_series.index[-1] - portfolio_value_series.index[0]).total_seconds() / 3600.0
+
         # Cálculo del Máximo Drawdown
         cumulative_max = portfolio_value_series.cummax()
         drawdown = (portfolio_value_series - cumulative_max) / cumulative_max
         max_drawdown = abs(drawdown.min())
 
-        # Si el drawdown es menor al 1%, se considera insignificante y se penaliza
-        # para evitar optimizaciones basadas en un riesgo irrealmente bajo.
-        if max_drawdown < 0.01:
+        return self._calmar_ratio(portfolio_value_series.iloc[0], portfolio_value_series.iloc[-1],
+                                  max_drawdown, n_hours)
+
+    def _calculate_online_metric(self, metrics):
+        """
+        Calcula el Calmar Ratio a partir de las métricas en línea de
+        Backtester.run_metrics(), sin construir la serie de valores.
+
+        Args:
+            metrics (dict): Las métricas retornadas por Backtester.run_metrics().
+
+        Returns:
+            float: El Calmar Ratio (ver _calmar_ratio()).
+        """
+        if metrics['n_values'] < 2:
             return 0.0
 
-        return annualized_return / max_drawdown
+        n_hours = (metrics['end'] - metrics['start']).total_seconds() / 3600.0
+        return self._calmar_ratio(metrics['first_value'], metrics['last_value'],
+                                  metrics['max_drawdown'], n_hours)
+
+    def _evaluate_fold(self, data_with_indicators, params, fold):
+        """
+        Calcula el Calmar Ratio de un segmento del Walk-Forward.
+
+        Args:
+            data_with_indicators (pd.DataFrame): La serie completa con indicadores.
+            params (dict): Los parámetros de la estrategia.
+            fold (Fold): El segmento (posiciones sobre self.data).
+
+        Returns:
+            float: El Calmar Ratio del segmento, o -1.0 si no hay valores.
+        """
+        # Cada segmento es una vista (sin copia) de los datos con indicadores.
+        dates = data_with_indicators.index
+        start_pos = dates.searchsorted(self.data.index[fold.test_start], side='left')
+        end_pos = dates.searchsorted(self.data.index[fold.test_stop - 1], side='right')
+        chunk_with_indicators = data_with_indicators.iloc[start_pos:end_pos]
+        backtester = Backtester(chunk_with_indicators, params, copy=False)
+        # Solo se necesitan las métricas del Calmar Ratio: se usa la ruta en
+        # línea del motor, sin construir la serie de valores del portafolio.
+        metrics = backtester.run_metrics()
+
+        if metrics['n_values'] > 0:
+            return self._calculate_online_metric(metrics)
+        return -1.0  # Penalización si no se realizaron operaciones.
+
+    def _trial_cache_key(self, params, folds):
+        """
+        Construye la clave de la caché de pruebas para unos parámetros.
+
+        La clave incluye los rangos de prueba de los segmentos y no la
+        configuración del Walk-Forward: el objetivo solo evalúa esos rangos, así
+        que las configuraciones que solo difieren en el entrenamiento (modo,
+        'purge') comparten resultado.
+
+        Args:
+            params (dict): Los parámetros de la prueba.
+            folds (list[Fold]): Los segmentos del Walk-Forward.
+
+        Returns:
+            str: La clave (ver TrialCache.make_key()).
+        """
+        settings = {'engine_version': ENGINE_VERSION, 'initial_cash': INITIAL_CASH, 'commission': COMMISSION,
+                    'execution': EXECUTION_MODE, 'tie_break': INTRABAR_TIE_BREAK,
+                    'indicator_backend': INDICATOR_BACKEND}
+        return TrialCache.make_key(params, self.data_fingerprint,
+                                   [[fold.test_start, fold.test_stop] for fold in folds], settings)
 
     def objective(self, trial):
         """
@@ -98,51 +241,110 @@ class Optimizer:
             return -1.0  # Penalización alta si la condición no se cumple.
 
         # 2. Lógica de Validación Walk-Forward.
-        n_splits = 10
-        len_data = len(self.data)
-        chunk_size = len_data // n_splits
+        try:
+            folds = self.splitter.split(len(self.data))
+        except ValueError:
+            return -1.0
         objective_metrics = []
 
-        if chunk_size < 30: # Asegura que cada segmento sea suficientemente grande.
+        if folds[0].test_stop - folds[0].test_start < 30: # Asegura que cada segmento sea suficientemente grande.
             return -1.0
 
-        for i in range(n_splits):
-            start_idx = i * chunk_size
-            end_idx = (i + 1) * chunk_size
-            chunk = self.data.iloc[start_idx:end_idx]
-
-            chunk_with_indicators = add_indicators(chunk.copy(), **indicator_params)
-            backtester = Backtester(chunk_with_indicators, params)
-            portfolio_values = backtester.run(return_value_series=True)
-
-            if not portfolio_values.empty:
-                metric = self._calculate_objective_metric(portfolio_values)
-                objective_metrics.append(metric)
-            else:
-                objective_metrics.append(-1.0) # Penalización si no se realizaron operaciones.
+        # Las combinaciones ya evaluadas se resuelven desde la caché de pruebas.
+        cache_key = None
+        if self.trial_cache is not None:
+            cache_key = self._trial_cache_key(params, folds)
+            cached_value = self.trial_cache.get(cache_key)
+            if cached_value is not None:
+                trial.set_user_attr('cached', True)
+                return cached_value
+
+        # Los indicadores se calculan una sola vez sobre la serie completa (la EMA
+        # y el MACD se consultan en la matriz de EMA precalculada, compartida por
+        # todas las pruebas). Así cada segmento parte de indicadores ya calentados
+        # con el histórico previo y conserva todas sus velas; solo el primero
+        # pierde las filas iniciales sin histórico suficiente. Se pasa la huella de
+        # los datos ya calculada y el resultado reutiliza sus columnas sin copiarlas.
+        data_with_indicators = add_indicators(self.data, **indicator_params, use_ema_matrix=True,
+                                              fingerprint=self.data_fingerprint, copy=False)
+
+        def evaluate(fold):
+            return self._evaluate_fold(data_with_indicators, params, fold)
+
+        # Los segmentos se evalúan por lotes de 'fold_workers' (en paralelo si es
+        # mayor que 1). Los resultados se recogen en el orden de los segmentos y,
+        # tras cada lote, se reporta el promedio acumulado de cada segmento para
+        # que el pruner pueda detener la prueba si los primeros ya son claramente malos.
+        batch_size = max(self.fold_workers, 1)
+        executor = ThreadPoolExecutor(max_workers=batch_size) if batch_size > 1 else None
+        try:
+            for batch_start in range(0, len(folds), batch_size):
+                batch = folds[batch_start:batch_start + batch_size]
+                if executor is not None:
+                    batch_metrics = list(executor.map(evaluate, batch))
+                else:
+                    batch_metrics = [evaluate(fold) for fold in batch]
+
+                for fold, metric in zip(batch, batch_metrics):
+                    objective_metrics.append(metric)
+                    trial.report(sum(objective_metrics) / len(objective_metrics), step=fold.index)
+                if trial.should_prune():
+                    raise optuna.TrialPruned()
+        finally:
+            if executor is not None:
+                executor.shutdown()
 
         if not objective_metrics:
             return -1.0
 
         # El valor a maximizar es el promedio de la métrica en todos los splits.
-        return sum(objective_metrics) / len(objective_metrics)
+        objective_value = sum(objective_metrics) / len(objective_metrics)
+        if cache_key is not None:
+            self.trial_cache.put(cache_key, objective_value, params)
+        return objective_value
 
-    def run_optimization(self, n_trials=50):
+    def run_optimization(self, n_trials=50, n_jobs=N_JOBS, study_name=STUDY_NAME, storage=STUDY_STORAGE,
+                         warm_start=None):
         """
         Ejecuta el proceso de optimización con Optuna.
 
+        Si se indica un almacenamiento persistente, el estudio se guarda con el
+        nombre 'study_name' y, si ya existe, se reanuda: solo se ejecutan las
+        pruebas que faltan para llegar a 'n_trials'. Una interrupción con
+        Ctrl-C detiene la búsqueda sin perder las pruebas ya terminadas.
+
         Args:
             n_trials (int): El número de iteraciones que Optuna realizará para
                             buscar los mejores parámetros.
+            n_jobs (int): Número de procesos que evalúan pruebas en paralelo.
+                          Con 1 se ejecuta en el proceso actual.
+            study_name (str): Nombre del estudio dentro del almacenamiento.
+            storage (str, optional): Almacenamiento del estudio: una URL de base de
+                                     datos (p. ej. 'sqlite:///optuna.db') o la ruta
+                                     de un archivo de journal. None lo mantiene en memoria.
+            warm_start (str or dict or list[dict], optional): Pruebas iniciales de
+                un estudio nuevo: el nombre de otro estudio del mismo almacenamiento
+                (se encolan sus mejores parámetros) o uno o varios conjuntos de parámetros.
 
         Returns:
             dict: Un diccionario que contiene los mejores parámetros encontrados.
                   Retorna un diccionario vacío si no se encuentra una solución rentable.
         """
-        study = optuna.create_study(direction='maximize')
-        study.optimize(self.objective, n_trials=n_trials, show_progress_bar=True)
-
-        if study.best_value <= 0:
+        if storage is None and n_jobs > 1:
+            # Los procesos trabajadores necesitan un almacenamiento común: se usa un
+            # journal temporal y el estudio se copia a memoria al terminar.
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                journal_path = os.path.join(tmp_dir, 'optuna_journal.log')
+                study = self._optimize(n_trials, n_jobs, study_name, journal_path, warm_start)
+                memory_storage = optuna.storages.InMemoryStorage()
+                optuna.copy_study(from_study_name=study.study_name, from_storage=_open_storage(journal_path),
+                                  to_storage=memory_storage)
+                study = optuna.load_study(study_name=study.study_name, storage=memory_storage)
+        else:
+            study = self._optimize(n_trials, n_jobs, study_name, storage, warm_start)
+
+        completed = study.get_trials(deepcopy=False, states=(TrialState.COMPLETE,))
+        if not completed or study.best_value <= 0:
             print("Advertencia: No se encontró una combinación de parámetros rentable.")
             return {}
 
@@ -152,4 +354,254 @@ class Optimizer:
         for key, value in study.best_params.items():
             print(f"  - {key}: {value}")
 
-        return study.best_params
\ No newline at end of file
+        return study.best_params
+
+    def _optimize(self, n_trials, n_jobs, study_name, storage, warm_start):
+        """
+        Crea o reanuda el estudio y ejecuta las pruebas que faltan.
+
+        Args:
+            n_trials (int): El número total de pruebas del estudio.
+            n_jobs (int): El número de procesos trabajadores.
+            study_name (str): Nombre del estudio.
+            storage (str or None): Almacenamiento del estudio (ver run_optimization()).
+            warm_start (str or dict or list[dict] or None): Pruebas iniciales.
+
+        Returns:
+            optuna.Study: El estudio, con las pruebas terminadas hasta el momento.
+        """
+        study_storage = _open_storage(storage)
+        study = optuna.create_study(study_name=study_name, storage=study_storage, direction='maximize',
+                                    pruner=self._build_pruner(), load_if_exists=True)
+
+        if study.trials:
+            n_finished = _resume_study(study, study_storage)
+            print(f"  - Información: Reanudando el estudio '{study_name}' ({n_finished} pruebas terminadas).")
+        else:
+            n_finished = 0
+            for params in _warm_start_params(warm_start, study_storage):
+                study.enqueue_trial(params, skip_if_exists=True)
+
+        remaining = n_trials - n_finished
+        if remaining <= 0:
+            print(f"  - Información: El estudio '{study_name}' ya tiene {n_finished} pruebas terminadas.")
+            return study
+
+        try:
+            if n_jobs > 1:
+                self._run_parallel(study, storage, remaining, n_jobs)
+            else:
+                study.optimize(_heartbeat_objective(self.objective, study_storage), n_trials=remaining,
+                               show_progress_bar=True)
+        except KeyboardInterrupt:
+            print("  - Advertencia: Optimización interrumpida. Las pruebas terminadas se conservan"
+                  + (" y el estudio se puede reanudar." if storage is not None else "."))
+        return study
+
+    def _run_parallel(self, study, storage, n_trials, n_jobs):
+        """
+        Reparte las pruebas de Optuna entre un grupo de procesos.
+
+        Los datos de mercado se publican una sola vez en memoria compartida y
+        todos los procesos registran sus pruebas en el mismo estudio (un journal
+        local o una base de datos), de modo que el muestreador de cada proceso
+        tiene en cuenta los resultados de los demás.
+
+        Args:
+            study (optuna.Study): El estudio, ya creado en 'storage'.
+            storage (str): Almacenamiento persistente del estudio.
+            n_trials (int): El número total de pruebas a ejecutar.
+            n_jobs (int): El número de procesos trabajadores.
+        """
+        print(f"  - Información: Ejecutando {n_trials} pruebas en {n_jobs} procesos.")
+        shared_data = SharedMarketData.publish(self.data)
+        try:
+            # Se reparten las pruebas de la forma más equitativa posible.
+            base, extra = divmod(n_trials, n_jobs)
+            trials_per_worker = [base + (1 if i < extra else 0) for i in range(n_jobs)]
+
+            # Se usa 'spawn' porque los núcleos paralelos de Numba ya pueden haber
+            # iniciado hilos en este proceso, y 'fork' no es seguro en ese caso.
+            with ProcessPoolExecutor(max_workers=n_jobs,
+                                     mp_context=multiprocessing.get_context('spawn')) as executor:
+                futures = [executor.submit(_optimize_worker, shared_data.spec, storage,
+                                           study.study_name, worker_trials, self.pruner, self.splitter,
+                                           self.fold_workers, self.trial_cache is not None,
+                                           self.data_fingerprint)
+                           for worker_trials in trials_per_worker if worker_trials > 0]
+                for future in futures:
+                    future.result()
+        finally:
+            shared_data.close()
+
+
+def _open_storage(storage):
+    """
+    Construye el almacenamiento de Optuna a partir de su descripción.
+
+    Args:
+        storage (str or None): Una URL de base de datos (p. ej. 'sqlite:///optuna.db'),
+                               la ruta de un archivo de journal o None (en memoria).
+
+    Returns:
+        optuna.storages.BaseStorage or None: El almacenamiento para create_study().
+    """
+    if storage is None:
+        return None
+    if '://' in storage:
+        # Optuna marca como fallidas las pruebas cuyo latido se detiene.
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', optuna.exceptions.ExperimentalWarning)
+            return RDBStorage(storage, heartbeat_interval=STUDY_HEARTBEAT_INTERVAL)
+    return JournalStorage(JournalFileBackend(storage))
+
+
+def _resume_study(study, storage):
+    """
+    Prepara un estudio existente para reanudarlo.
+
+    Las pruebas que quedaron en curso porque su proceso terminó sin cerrarlas
+    se marcan como fallidas para que no cuenten como terminadas. Solo se
+    consideran huérfanas las que llevan más de dos intervalos sin latido, de
+    modo que las pruebas de otros procesos que siguen en marcha (trabajadores
+    de _run_parallel() u otra ejecución sobre el mismo almacenamiento) no se
+    interrumpen. Con una base de datos se usa el latido de Optuna; con un
+    journal, el que registra _trial_heartbeat().
+
+    Args:
+        study (optuna.Study): El estudio cargado.
+        storage (optuna.storages.BaseStorage): Su almacenamiento (ver _open_storage()).
+
+    Returns:
+        int: El número de pruebas terminadas (completadas o podadas).
+    """
+    if isinstance(storage, RDBStorage):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', optuna.exceptions.ExperimentalWarning)
+            optuna.storages.fail_stale_trials(study)
+    else:
+        deadline = time.time() - 2 * STUDY_HEARTBEAT_INTERVAL
+        for trial in study.get_trials(deepcopy=False, states=(TrialState.RUNNING,)):
+            last_beat = trial.user_attrs.get('heartbeat')
+            if last_beat is None and trial.datetime_start is not None:
+                last_beat = trial.datetime_start.timestamp()
+            if last_beat is not None and last_beat < deadline:
+                try:
+                    study.tell(trial.number, state=TrialState.FAIL)
+                except (ValueError, optuna.exceptions.UpdateFinishedTrialError):
+                    pass  # Otro proceso la cerró entretanto.
+    return len(study.get_trials(deepcopy=False, states=(TrialState.COMPLETE, TrialState.PRUNED)))
+
+
+@contextmanager
+def _trial_heartbeat(trial, interval):
+    """
+    Registra en la prueba un latido ('heartbeat' en user_attrs) cada 'interval'
+    segundos mientras dura el bloque, desde un hilo auxiliar.
+
+    Args:
+        trial (optuna.trial.Trial): La prueba en curso.
+        interval (float): Segundos entre latidos.
+    """
+    stop = threading.Event()
+
+    def beat():
+        while not stop.wait(interval):
+            trial.set_user_attr('heartbeat', time.time())
+
+    trial.set_user_attr('heartbeat', time.time())
+    thread = threading.Thread(target=beat, daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def _heartbeat_objective(objective, storage):
+    """
+    Añade el latido de _trial_heartbeat() a la función objetivo si el
+    almacenamiento es un journal (las bases de datos usan el latido de Optuna).
+
+    Args:
+        objective (callable): La función objetivo.
+        storage: El almacenamiento del estudio (ver _open_storage()).
+
+    Returns:
+        callable: La función objetivo que se pasa a study.optimize().
+    """
+    if not isinstance(storage, JournalStorage):
+        return objective
+
+    def objective_with_heartbeat(trial):
+        with _trial_heartbeat(trial, STUDY_HEARTBEAT_INTERVAL):
+            return objective(trial)
+
+    return objective_with_heartbeat
+
+
+def _warm_start_params(warm_start, storage):
+    """
+    Obtiene los parámetros con los que se inicia un estudio nuevo.
+
+    Args:
+        warm_start (str or dict or list[dict] or None): El nombre de un estudio
+            previo del mismo almacenamiento, o los parámetros a encolar.
+        storage: El almacenamiento (ver _open_storage()).
+
+    Returns:
+        list[dict]: Los conjuntos de parámetros a encolar.
+    """
+    if warm_start is None:
+        return []
+    if isinstance(warm_start, dict):
+        return [warm_start]
+    if isinstance(warm_start, str):
+        try:
+            previous = optuna.load_study(study_name=warm_start, storage=storage)
+        except KeyError:
+            print(f"  - Advertencia: No existe el estudio '{warm_start}' para el arranque en caliente.")
+            return []
+        if not previous.get_trials(deepcopy=False, states=(TrialState.COMPLETE,)):
+            return []
+        print(f"  - Información: Se encolan los mejores parámetros del estudio '{warm_start}'.")
+        return [previous.best_params]
+    return list(warm_start)
+
+
+def _optimize_worker(data_spec, storage, study_name, n_trials, pruner, splitter, fold_workers,
+                     use_trial_cache, data_fingerprint):
+    """
+    Punto de entrada de cada proceso trabajador de la optimización en paralelo.
+
+    Se conecta a los datos publicados en memoria compartida y al estudio común,
+    y ejecuta su parte de las pruebas.
+
+    Args:
+        data_spec (dict): La descripción del bloque de memoria compartida.
+        storage (str): Almacenamiento del estudio (URL de base de datos o ruta de journal).
+        study_name (str): Nombre del estudio de Optuna.
+        n_trials (int): Número de pruebas que ejecuta este proceso.
+        pruner (str): Estrategia de poda configurada en el proceso principal.
+        splitter (WalkForwardSplitter): Los segmentos del Walk-Forward del proceso principal.
+        fold_workers (int): Hilos por prueba para evaluar los segmentos.
+        use_trial_cache (bool): Si se usa la caché persistente de pruebas.
+        data_fingerprint (str): Huella digital de los datos, calculada en el proceso principal.
+    """
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+    shared_data = SharedMarketData.attach(data_spec)
+    optimizer = Optimizer(shared_data.to_frame(), pruner=pruner, splitter=splitter,
+                          fold_workers=fold_workers, use_trial_cache=use_trial_cache,
+                          data_fingerprint=data_fingerprint)
+    study_storage = _open_storage(storage)
+    study = optuna.load_study(study_name=study_name, storage=study_storage, pruner=optimizer._build_pruner())
+    study.optimize(_heartbeat_objective(optimizer.objective, study_storage), n_trials=n_trials)
+
+    # Se descarta el DataFrame antes de cerrar el bloque. Las pruebas podadas dejan
+    # ciclos de referencias (excepción/traceback) que también apuntan a él, por lo
+    # que se fuerza su recolección. Si la optimización falla, el bloque se libera
+    # al terminar el proceso trabajador.
+    del optimizer
+    gc.collect()
+    shared_data.close()
\ No newline at end of file
@@ -0,0 +1,248 @@
+"""
+Modo de ejecución en tiempo real (paper trading) de la estrategia.
+
+StreamingBacktester recibe las velas de una en una desde un iterador
+asíncrono, actualiza los indicadores de forma incremental (indicator_state),
+evalúa la regla de "2 de 3 condiciones" del Backtester y aplica la misma
+lógica de stop-loss, take-profit y tamaño de posición, ya que cada vela se
+procesa con engine.step(), el mismo núcleo que utiliza el backtest histórico.
+
+Sobre los mismos datos, la serie de valores del portafolio coincide con la de
+Backtester.run() tras add_indicators(backend='native').
+
+El módulo incluye dos fuentes de velas: replay(), que reproduce un DataFrame
+(en sustitución de un websocket), y tail_csv(), que sigue un archivo CSV al
+que otro proceso añade velas.
+"""
+
+import asyncio
+import csv
+import math
+import os
+from datetime import datetime
+
+import pandas as pd
+from config import INITIAL_CASH, COMMISSION
+from engine import CASH, POSITION, ENTRY_PRICE, new_state, step
+from indicator_state import EmaState, MacdState, AdxState
+
+
+class StreamingBacktester:
+    """
+    Ejecuta la estrategia vela a vela sobre un flujo de datos en tiempo real.
+
+    Igual que add_indicators() descarta las filas con indicadores incompletos y
+    Backtester.run() usa la primera fila restante solo como referencia, aquí no
+    se opera hasta la segunda vela con todos los indicadores disponibles.
+
+    Attributes:
+        params (dict): Los parámetros de la estrategia (indicadores y riesgo).
+        initial_cash (float): Capital inicial de la simulación.
+        commission (float): Costo por operación (comisión del broker).
+        state (np.ndarray): Vector de estado del núcleo (efectivo, posición,
+                            precio de entrada).
+        portfolio_value (float): Valor del portafolio tras la última vela.
+    """
+
+    def __init__(self, params, initial_cash=INITIAL_CASH, commission=COMMISSION):
+        """
+        Inicializa el backtester en tiempo real.
+
+        Args:
+            params (dict): Los parámetros de la estrategia.
+            initial_cash (float): Capital inicial.
+            commission (float): Comisión por operación.
+        """
+        self.params = params
+        self.initial_cash = initial_cash
+        self.commission = commission
+        self.state = new_state(float(initial_cash))
+        self.portfolio_value = float(initial_cash)
+
+        self._ema = EmaState(params['ema_len'])
+        self._macd = MacdState(params['macd_fast'], params['macd_slow'], params['macd_signal'])
+        self._adx = AdxState(params['adx_len'])
+        # Línea MACD y de señal de la vela anterior (para detectar cruces).
+        self._prev_macd = math.nan
+        self._prev_signal = math.nan
+        self._n_ready = 0   # Velas procesadas con todos los indicadores disponibles.
+
+    def _signals(self, close, ema, adx, macd_line, signal_line):
+        """
+        Evalúa la regla de "2 de 3 condiciones" (ver Backtester._compute_signals).
+
+        Returns:
+            tuple[bool, bool]: Las señales de compra y de venta.
+        """
+        cond_adx_strong = adx > self.params['adx_threshold']
+        cond_macd_cross_up = self._prev_macd < self._prev_signal and macd_line > signal_line
+        cond_macd_cross_down = self._prev_macd > self._prev_signal and macd_line < signal_line
+
+        buy_signal = (int(close > ema) + int(cond_adx_strong) + int(cond_macd_cross_up)) >= 2
+        sell_signal = (int(close < ema) + int(cond_adx_strong) + int(cond_macd_cross_down)) >= 2
+        return buy_signal, sell_signal
+
+    def on_bar(self, bar):
+        """
+        Procesa una vela nueva.
+
+        Args:
+            bar (Mapping): La vela, con los campos 'open', 'high', 'low', 'close'
+                           y 'volume'.
+
+        Returns:
+            float or None: El valor del portafolio tras la vela, o None mientras
+                           los indicadores están en su período de calentamiento.
+        """
+        ema = self._ema.update(bar)
+        macd_line, histogram, signal_line = self._macd.update(bar)
+        adx, adxr, dmp, dmn = self._adx.update(bar)
+
+        # Mismo criterio que el dropna() de add_indicators: la vela cuenta solo si
+        # todos sus valores (datos e indicadores) están disponibles.
+        values = (bar['open'], bar['high'], bar['low'], bar['close'], bar['volume'],
+                  ema, macd_line, histogram, signal_line, adx, adxr, dmp, dmn)
+        if any(value != value for value in values):
+            return None
+
+        buy_signal, sell_signal = self._signals(bar['close'], ema, adx, macd_line, signal_line)
+        self._prev_macd, self._prev_signal = macd_line, signal_line
+        self._n_ready += 1
+
+        # La primera vela disponible solo sirve de referencia, como en Backtester.run().
+        if self._n_ready == 1:
+            return None
+
+        self.portfolio_value = step(self.state, float(bar['close']), buy_signal, sell_signal,
+                                    float(self.params['stop_loss']), float(self.params['take_profit']),
+                                    float(self.params['n_shares']), float(self.commission))
+        return self.portfolio_value
+
+    async def run(self, bars):
+        """
+        Consume un flujo asíncrono de velas hasta que se agote.
+
+        Args:
+            bars (AsyncIterator[dict]): Las velas, cada una con su fecha en 'date'
+                                        (ver replay() y tail_csv()).
+
+        Returns:
+            pd.Series: El valor del portafolio en cada vela operada.
+        """
+        dates = []
+        values = []
+        async for bar in bars:
+            portfolio_value = self.on_bar(bar)
+            if portfolio_value is not None:
+                dates.append(bar['date'])
+                values.append(portfolio_value)
+        return pd.Series(values, index=pd.DatetimeIndex(dates, name='date'), dtype=float)
+
+    def to_dict(self):
+        """Retorna el estado completo (indicadores y portafolio) como diccionario serializable."""
+        return {'initial_cash': float(self.initial_cash), 'commission': float(self.commission),
+                'cash': float(self.state[CASH]), 'position': float(self.state[POSITION]),
+                'entry_price': float(self.state[ENTRY_PRICE]), 'portfolio_value': self.portfolio_value,
+                'ema': self._ema.to_dict(), 'macd': self._macd.to_dict(), 'adx': self._adx.to_dict(),
+                'prev_macd': self._prev_macd, 'prev_signal': self._prev_signal, 'n_ready': self._n_ready}
+
+    @classmethod
+    def from_dict(cls, params, state, commission=None):
+        """
+        Restaura un backtester guardado con to_dict().
+
+        Args:
+            params (dict): Los parámetros de la estrategia.
+            state (dict): El estado guardado.
+            commission (float, optional): Comisión por operación. Por defecto, la
+                                          guardada en el estado.
+
+        Returns:
+            StreamingBacktester: El backtester restaurado.
+        """
+        if commission is None:
+            commission = state.get('commission', COMMISSION)
+        backtester = cls(params, initial_cash=state.get('initial_cash', INITIAL_CASH), commission=commission)
+        backtester.state[CASH] = state['cash']
+        backtester.state[POSITION] = state['position']
+        backtester.state[ENTRY_PRICE] = state['entry_price']
+        backtester.portfolio_value = state['portfolio_value']
+        backtester._ema = EmaState.from_dict(state['ema'])
+        backtester._macd = MacdState.from_dict(state['macd'])
+        backtester._adx = AdxState.from_dict(state['adx'])
+        backtester._prev_macd = state['prev_macd']
+        backtester._prev_signal = state['prev_signal']
+        backtester._n_ready = state['n_ready']
+        return backtester
+
+
+async def replay(df, delay=0.0):
+    """
+    Reproduce un DataFrame de velas como flujo asíncrono (sustituto de un websocket).
+
+    Args:
+        df (pd.DataFrame): Datos OHLCV indexados por fecha (ver load_data()).
+        delay (float): Segundos de espera entre velas.
+
+    Yields:
+        dict: Cada vela, con su fecha en 'date'.
+    """
+    columns = ['open', 'high', 'low', 'close', 'volume']
+    for date, row in zip(df.index, df[columns].itertuples(index=False, name=None)):
+        bar = dict(zip(columns, row))
+        bar['date'] = date
+        yield bar
+        await asyncio.sleep(delay)
+
+
+async def tail_csv(path, poll_interval=1.0, from_start=False, idle_timeout=None):
+    """
+    Sigue un archivo CSV con formato de Binance y emite cada vela que se le añade.
+
+    Se espera que otro proceso añada las velas nuevas al final del archivo, en
+    orden cronológico. Las líneas incompletas se retienen hasta recibir el
+    salto de línea, y las filas con fecha inválida se omiten.
+
+    Args:
+        path (str): Ruta del archivo CSV.
+        poll_interval (float): Segundos de espera entre consultas al archivo.
+        from_start (bool): Si es True, se emiten también las velas ya existentes.
+        idle_timeout (float, optional): Si se indica, el flujo termina tras ese
+                                        número de segundos sin velas nuevas.
+
+    Yields:
+        dict: Cada vela, con su fecha en 'date'.
+    """
+    with open(path, newline='') as f:
+        header = [col.strip().lower() for col in next(csv.reader([f.readline()]))]
+        # Se usa 'volume usdt' como 'volume' por compatibilidad con librerías.
+        if 'volume usdt' in header:
+            header[header.index('volume usdt')] = 'volume'
+        if not from_start:
+            f.seek(0, os.SEEK_END)
+
+        pending = ''
+        idle_time = 0.0
+        while True:
+            line = f.readline()
+            if not line:
+                if idle_timeout is not None and idle_time >= idle_timeout:
+                    return
+                await asyncio.sleep(poll_interval)
+                idle_time += poll_interval
+                continue
+
+            pending += line
+            if not pending.endswith('\n'):
+                continue
+            row = dict(zip(header, next(csv.reader([pending]))))
+            pending = ''
+            idle_time = 0.0
+
+            try:
+                bar = {col: float(row[col]) for col in ['open', 'high', 'low', 'close', 'volume']}
+                bar['date'] = pd.Timestamp(datetime.strptime(row['date'].strip(), '%d/%m/%Y %H:%M'))
+            except (KeyError, ValueError):
+                print(f"  - Advertencia: Se omite una fila inválida de {path}.")
+                continue
+            yield bar
\ No newline at end of file
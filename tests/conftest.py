@@ -0,0 +1,33 @@
+"""
+Configuración común de las pruebas: el proyecto usa una estructura plana de
+módulos, por lo que se añade la raíz del repositorio a la ruta de importación.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import numpy as np
+import pandas as pd
+import pytest
+
+# Parámetros de la estrategia usados en las pruebas de equivalencia.
+STRATEGY_PARAMS = {'ema_len': 50, 'macd_fast': 12, 'macd_slow': 26, 'macd_signal': 9, 'adx_len': 14,
+                   'adx_threshold': 20, 'stop_loss': 0.02, 'take_profit': 0.03, 'n_shares': 0.5}
+INDICATOR_KEYS = ('ema_len', 'macd_fast', 'macd_slow', 'macd_signal', 'adx_len')
+
+
+@pytest.fixture
+def ohlcv():
+    """Velas horarias OHLCV aleatorias y reproducibles, con el formato de load_data()."""
+    rng = np.random.default_rng(42)
+    n_bars = 3000
+    close = 30000 * np.exp(np.cumsum(rng.normal(0, 0.01, n_bars)))
+    open_price = np.concatenate(([close[0]], close[:-1]))
+    spread = np.abs(rng.normal(0, 0.004, n_bars)) * close
+    index = pd.date_range('2023-01-01', periods=n_bars, freq='h', name='date')
+    return pd.DataFrame({'open': open_price,
+                         'high': np.maximum(open_price, close) + spread,
+                         'low': np.minimum(open_price, close) - spread,
+                         'close': close,
+                         'volume': rng.uniform(10, 100, n_bars)}, index=index)
\ No newline at end of file
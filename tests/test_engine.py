@@ -0,0 +1,137 @@
+"""
+Pruebas del núcleo de ejecución: sus puntos de entrada sobre arreglos y la
+equivalencia de Backtester con el bucle original vela a vela.
+"""
+
+import numpy as np
+import pandas as pd
+
+from backtester import Backtester
+from conftest import STRATEGY_PARAMS, INDICATOR_KEYS
+from config import INITIAL_CASH, COMMISSION
+from indicator_calculator import add_indicators
+from engine import (simulate, simulate_intrabar, simulate_with_trades, simulate_intrabar_with_trades,
+                    TIE_STOP_LOSS)
+
+
+def _random_market(n_bars=2000, seed=7):
+    """Genera precios OHLC y señales aleatorias reproducibles."""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n_bars)))
+    open_price = np.concatenate(([close[0]], close[:-1]))
+    spread = np.abs(rng.normal(0, 0.005, n_bars)) * close
+    high = np.maximum(open_price, close) + spread
+    low = np.minimum(open_price, close) - spread
+    buy_signal = rng.random(n_bars) < 0.05
+    sell_signal = ~buy_signal & (rng.random(n_bars) < 0.05)
+    return open_price, high, low, close, buy_signal, sell_signal
+
+
+def test_simulate_matches_simulate_with_trades():
+    _, _, _, close, buy_signal, sell_signal = _random_market()
+    args = (close, buy_signal, sell_signal, 0.02, 0.04, 0.5, 10000.0, 0.001)
+
+    portfolio_values = simulate(*args)
+    expected_values, _, float_fields = simulate_with_trades(*args)
+
+    assert len(portfolio_values) == len(close) - 1
+    np.testing.assert_array_equal(portfolio_values, expected_values)
+    assert float_fields.shape[1] > 0
+
+
+def test_simulate_intrabar_matches_simulate_intrabar_with_trades():
+    open_price, high, low, close, buy_signal, sell_signal = _random_market()
+    n_bars = len(close)
+    no_sub_bars = np.empty(0)
+    sub_bounds = np.zeros(n_bars, dtype=np.int64)
+    args = (open_price, high, low, close, buy_signal, sell_signal, 0.02, 0.04, 0.5, 10000.0, 0.001,
+            TIE_STOP_LOSS, no_sub_bars, no_sub_bars, no_sub_bars, sub_bounds, sub_bounds)
+
+    portfolio_values = simulate_intrabar(*args)
+    expected_values, _, _ = simulate_intrabar_with_trades(*args)
+
+    np.testing.assert_array_equal(portfolio_values, expected_values)
+
+def _reference_run(data, params):
+    """
+    Bucle vela a vela con Pandas de la versión original de Backtester.run()
+    (anterior al núcleo compilado), usado como referencia.
+    """
+    data = data.copy()
+    ema_col = f"EMA_{params['ema_len']}"
+    adx_col = f"ADX_{params['adx_len']}"
+    macd_props = f"{params['macd_fast']}_{params['macd_slow']}_{params['macd_signal']}"
+    macd_line_col = f"MACD_{macd_props}"
+    macd_signal_col = f"MACDs_{macd_props}"
+
+    cond_ema_up = data['close'] > data[ema_col]
+    cond_ema_down = data['close'] < data[ema_col]
+    cond_adx_strong = data[adx_col] > params['adx_threshold']
+    cond_macd_cross_up = (data[macd_line_col].shift(1) < data[macd_signal_col].shift(1)) & \
+                         (data[macd_line_col] > data[macd_signal_col])
+    cond_macd_cross_down = (data[macd_line_col].shift(1) > data[macd_signal_col].shift(1)) & \
+                           (data[macd_line_col] < data[macd_signal_col])
+    data['buy_signal'] = (cond_ema_up.astype(int) + cond_adx_strong.astype(int) +
+                          cond_macd_cross_up.astype(int)) >= 2
+    data['sell_signal'] = (cond_ema_down.astype(int) + cond_adx_strong.astype(int) +
+                           cond_macd_cross_down.astype(int)) >= 2
+
+    stop_loss_pct = params['stop_loss']
+    take_profit_pct = params['take_profit']
+    n_shares = params['n_shares']
+    cash = INITIAL_CASH
+    position = 0.0
+    entry_price = 0.0
+    portfolio_values = []
+
+    for i in range(1, len(data)):
+        current_price = data['close'].iloc[i]
+
+        if position > 0:
+            stop_loss_price = entry_price * (1 - stop_loss_pct)
+            take_profit_price = entry_price * (1 + take_profit_pct)
+            if current_price <= stop_loss_price or current_price >= take_profit_price:
+                cash += position * current_price * (1 - COMMISSION)
+                position = 0.0
+        elif position < 0:
+            stop_loss_price = entry_price * (1 + stop_loss_pct)
+            take_profit_price = entry_price * (1 - take_profit_pct)
+            if current_price >= stop_loss_price or current_price <= take_profit_price:
+                cash -= abs(position) * current_price * (1 + COMMISSION)
+                position = 0.0
+
+        if position == 0:
+            if data['buy_signal'].iloc[i]:
+                investment_amount = cash * n_shares
+                cost = investment_amount * (1 + COMMISSION)
+                if cash > cost:
+                    cash -= cost
+                    position = investment_amount / current_price
+                    entry_price = current_price
+            elif data['sell_signal'].iloc[i]:
+                investment_amount = cash * n_shares
+                proceeds = investment_amount * (1 - COMMISSION)
+                cash += proceeds
+                position = - (investment_amount / current_price)
+                entry_price = current_price
+
+        portfolio_value = cash
+        if position > 0:
+            portfolio_value += position * current_price
+        elif position < 0:
+            portfolio_value = cash - (abs(position) * current_price)
+        portfolio_values.append(portfolio_value)
+
+    return pd.Series(portfolio_values, index=data.index[1:])
+
+
+def test_backtester_matches_reference_loop(ohlcv):
+    params = STRATEGY_PARAMS
+    data = add_indicators(ohlcv, **{key: params[key] for key in INDICATOR_KEYS})
+
+    portfolio_values = Backtester(data, params).run(return_value_series=True)
+    expected = _reference_run(data, params)
+
+    assert portfolio_values.nunique() > 1  # Hubo operaciones.
+    pd.testing.assert_series_equal(portfolio_values, expected, check_exact=True, check_names=False,
+                                   check_freq=False)
\ No newline at end of file
@@ -0,0 +1,44 @@
+"""
+Pruebas de equivalencia del backend nativo de indicadores con pandas-ta.
+"""
+
+import numpy as np
+import pandas as pd
+import pandas_ta as ta
+import pytest
+
+from config import INDICATOR_TOLERANCE
+from indicator_calculator import IndicatorBank, validate_native_backend
+from native_indicators import EmaMatrix
+
+
+@pytest.mark.parametrize('ema_len, macd_fast, macd_slow, macd_signal, adx_len', [
+    (50, 12, 26, 9, 14),
+    (200, 5, 60, 20, 7),
+    (10, 30, 15, 5, 30),  # slow < fast: pandas-ta intercambia los períodos.
+])
+def test_native_backend_matches_pandas_ta(ohlcv, ema_len, macd_fast, macd_slow, macd_signal, adx_len):
+    is_valid, errors = validate_native_backend(ohlcv, ema_len, macd_fast, macd_slow, macd_signal, adx_len)
+    assert is_valid, errors.to_dict()
+    assert (errors <= INDICATOR_TOLERANCE).all()
+
+def test_ema_matrix_matches_ta_ema(ohlcv):
+    matrix = EmaMatrix(ohlcv['close'].to_numpy(), min_len=7, max_len=200)
+    for length in (7, 12, 26, 50, 123, 200):
+        expected = ta.ema(ohlcv['close'], length=length).to_numpy()
+        actual = matrix.ema(length)
+        assert np.array_equal(np.isnan(actual), np.isnan(expected))
+        valid = ~np.isnan(expected)
+        assert np.max(np.abs(actual[valid] - expected[valid])) <= INDICATOR_TOLERANCE * np.max(expected[valid])
+
+def test_indicator_bank_is_bounded_by_bytes(ohlcv):
+    series_bytes = int(ohlcv['close'].memory_usage(index=True))
+    bank = IndicatorBank(max_bytes=3 * series_bytes)
+    for length in range(10, 20):
+        bank.get('ema', (length,), 'fp', lambda length=length: ta.ema(ohlcv['close'], length=length))
+
+    assert len(bank._entries) == 3
+    assert bank.nbytes == 3 * series_bytes
+    # Un resultado mayor que el límite se retorna sin desplazar a los demás.
+    bank.get('ohlcv', (), 'fp', lambda: pd.concat([ohlcv, ohlcv], axis=1))
+    assert len(bank._entries) == 3
\ No newline at end of file
@@ -0,0 +1,25 @@
+"""
+Pruebas de la simulación de cartera con caja compartida (engine.simulate_portfolio).
+"""
+
+import numpy as np
+
+from engine import simulate_portfolio
+
+
+def test_no_entries_while_shorts_reserve_all_cash():
+    # El activo 0 abre un corto grande y su precio se dispara: el costo de
+    # recompra reservado supera el efectivo común.
+    close = np.array([[1.0, 1.0, 2.5, 2.5],
+                      [10.0, 10.0, 10.0, 10.0]])
+    buy_signals = np.zeros_like(close, dtype=np.bool_)
+    sell_signals = np.zeros_like(close, dtype=np.bool_)
+    sell_signals[0, 1] = True
+    sell_signals[1, 2:] = True  # Venta en el activo 1 sin efectivo disponible.
+
+    portfolio_values, positions = simulate_portfolio(close, buy_signals, sell_signals, 10.0, 10.0,
+                                                     0.9, 10000.0, 0.0)
+
+    np.testing.assert_array_equal(positions[0], [-9000.0, -9000.0, -9000.0])
+    np.testing.assert_array_equal(positions[1], [0.0, 0.0, 0.0])
+    np.testing.assert_allclose(portfolio_values, [10000.0, 19000.0 - 22500.0, 19000.0 - 22500.0])
\ No newline at end of file
@@ -0,0 +1,90 @@
+"""
+Pruebas de equivalencia del modo en tiempo real con los cálculos por lotes.
+"""
+
+import asyncio
+import json
+
+import numpy as np
+
+import native_indicators
+from backtester import Backtester
+from conftest import STRATEGY_PARAMS, INDICATOR_KEYS
+from indicator_calculator import add_indicators
+from indicator_state import EmaState, MacdState, AdxState
+from streaming import StreamingBacktester, replay
+
+
+def _bars(df):
+    """Convierte un DataFrame OHLCV en la lista de velas que consume el modo en tiempo real."""
+    return [dict(row, date=date) for date, row in zip(df.index, df.to_dict('records'))]
+
+
+def _assert_close(actual, expected, tolerance=1e-9):
+    """Compara dos series con los mismos NaN y un error relativo máximo."""
+    actual = np.asarray(actual, dtype=float)
+    expected = np.asarray(expected, dtype=float)
+    assert np.array_equal(np.isnan(actual), np.isnan(expected))
+    valid = ~np.isnan(expected)
+    scale = max(np.max(np.abs(expected[valid])), 1.)
+    assert np.max(np.abs(actual[valid] - expected[valid])) <= tolerance * scale
+
+
+def test_indicator_states_match_native_backend(ohlcv):
+    bars = _bars(ohlcv)
+    close = ohlcv['close'].to_numpy()
+    ema_state, macd_state, adx_state = EmaState(50), MacdState(12, 26, 9), AdxState(14)
+
+    _assert_close([ema_state.update(bar) for bar in bars], native_indicators.ema(close, 50))
+    for actual, expected in zip(zip(*[macd_state.update(bar) for bar in bars]),
+                                native_indicators.macd(close, 12, 26, 9)):
+        _assert_close(actual, expected)
+    for actual, expected in zip(zip(*[adx_state.update(bar) for bar in bars]),
+                                native_indicators.adx(ohlcv['high'].to_numpy(), ohlcv['low'].to_numpy(),
+                                                      close, 14)):
+        _assert_close(actual, expected)
+
+
+def test_indicator_states_resume_from_dict(ohlcv):
+    bars = _bars(ohlcv)
+    split = len(bars) // 2
+    states = [EmaState(50), MacdState(12, 26, 9), AdxState(14)]
+    uninterrupted = [EmaState(50), MacdState(12, 26, 9), AdxState(14)]
+    for bar in bars[:split]:
+        for state, reference in zip(states, uninterrupted):
+            state.update(bar)
+            reference.update(bar)
+
+    states = [type(state).from_dict(state.to_dict()) for state in states]
+    for bar in bars[split:]:
+        for state, reference in zip(states, uninterrupted):
+            assert state.update(bar) == reference.update(bar)
+
+def test_replay_matches_backtester(ohlcv):
+    data = add_indicators(ohlcv, **{key: STRATEGY_PARAMS[key] for key in INDICATOR_KEYS})
+    expected = Backtester(data, STRATEGY_PARAMS).run(return_value_series=True)
+
+    portfolio_values = asyncio.run(StreamingBacktester(STRATEGY_PARAMS).run(replay(ohlcv)))
+
+    assert portfolio_values.nunique() > 1  # Hubo operaciones.
+    np.testing.assert_array_equal(portfolio_values.index, expected.index)
+    np.testing.assert_array_equal(portfolio_values.to_numpy(), expected.to_numpy())
+
+
+def test_checkpoint_restore_matches_uninterrupted_run(ohlcv):
+    initial_cash, commission = 250_000., 0.001
+    bars = _bars(ohlcv)
+    split = len(bars) // 2
+
+    uninterrupted = StreamingBacktester(STRATEGY_PARAMS, initial_cash=initial_cash, commission=commission)
+    expected = [uninterrupted.on_bar(bar) for bar in bars]
+
+    first = StreamingBacktester(STRATEGY_PARAMS, initial_cash=initial_cash, commission=commission)
+    values = [first.on_bar(bar) for bar in bars[:split]]
+    # El estado se guarda en JSON, como al reanudar un proceso de paper trading.
+    restored = StreamingBacktester.from_dict(STRATEGY_PARAMS, json.loads(json.dumps(first.to_dict())))
+    values += [restored.on_bar(bar) for bar in bars[split:]]
+
+    assert restored.initial_cash == initial_cash
+    assert restored.commission == commission
+    assert values == expected
\ No newline at end of file
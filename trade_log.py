@@ -0,0 +1,144 @@
+"""
+Registro de las operaciones de una simulación de backtesting.
+
+El núcleo de ejecución (engine.simulate_with_trades y su variante intrabar)
+registra cada operación en búferes de NumPy con una fila por campo
+(estructura de arreglos), que se amplían duplicando su capacidad. TradeLog
+envuelve esos arreglos sin convertirlos en objetos de Python y calcula las
+estadísticas de las operaciones de forma vectorizada.
+"""
+
+import numpy as np
+import pandas as pd
+from engine import (TRADE_ENTRY_BAR, TRADE_EXIT_BAR, TRADE_SIDE, TRADE_REASON, TRADE_SIZE,
+                    TRADE_ENTRY_PRICE, TRADE_EXIT_PRICE, TRADE_COMMISSION, TRADE_PNL,
+                    REASON_STOP_LOSS, REASON_TAKE_PROFIT, REASON_END)
+
+# Nombres de los motivos de cierre, para los informes.
+REASON_NAMES = {REASON_STOP_LOSS: 'stop_loss', REASON_TAKE_PROFIT: 'take_profit', REASON_END: 'open'}
+
+
+class TradeLog:
+    """
+    Operaciones de una simulación, como arreglos de NumPy (uno por campo).
+
+    La operación que sigue abierta al final de los datos se incluye con el
+    motivo 'open', valorada al último cierre y sin comisión de salida (igual
+    que el valor final del portafolio).
+
+    Attributes:
+        entry_bar (np.ndarray): Índice de la vela de entrada de cada operación.
+        exit_bar (np.ndarray): Índice de la vela de salida.
+        entry_time (pd.DatetimeIndex): Fecha de entrada.
+        exit_time (pd.DatetimeIndex): Fecha de salida.
+        side (np.ndarray): 1 para operaciones largas, -1 para cortas.
+        exit_reason (np.ndarray): Motivo de cierre (engine.REASON_*).
+        size (np.ndarray): Cantidad de activo operada.
+        entry_price (np.ndarray): Precio de entrada.
+        exit_price (np.ndarray): Precio de salida.
+        commission (np.ndarray): Comisiones pagadas (entrada y salida).
+        pnl (np.ndarray): Ganancia o pérdida neta de comisiones.
+    """
+
+    def __init__(self, index, int_fields, float_fields):
+        """
+        Construye el registro a partir de los búferes del núcleo de ejecución.
+
+        Args:
+            index (pd.DatetimeIndex): Fechas de las velas de la simulación.
+            int_fields (np.ndarray): Campos enteros (TRADE_* x operaciones).
+            float_fields (np.ndarray): Campos reales (TRADE_* x operaciones).
+        """
+        self.entry_bar = int_fields[TRADE_ENTRY_BAR]
+        self.exit_bar = int_fields[TRADE_EXIT_BAR]
+        self.side = int_fields[TRADE_SIDE]
+        self.exit_reason = int_fields[TRADE_REASON]
+        self.size = float_fields[TRADE_SIZE]
+        self.entry_price = float_fields[TRADE_ENTRY_PRICE]
+        self.exit_price = float_fields[TRADE_EXIT_PRICE]
+        self.commission = float_fields[TRADE_COMMISSION]
+        self.pnl = float_fields[TRADE_PNL]
+        self.entry_time = index[self.entry_bar]
+        self.exit_time = index[self.exit_bar]
+
+    def __len__(self):
+        return len(self.pnl)
+
+    @property
+    def returns(self):
+        """np.ndarray: Retorno neto de cada operación sobre el capital invertido."""
+        return self.pnl / (self.size * self.entry_price)
+
+    @property
+    def holding_bars(self):
+        """np.ndarray: Número de velas que permaneció abierta cada operación."""
+        return self.exit_bar - self.entry_bar
+
+    @property
+    def holding_times(self):
+        """pd.TimedeltaIndex: Duración de cada operación."""
+        return self.exit_time - self.entry_time
+
+    def win_rate(self):
+        """Retorna la fracción de operaciones con ganancia (NaN si no hay operaciones)."""
+        return float(np.mean(self.pnl > 0)) if len(self) else np.nan
+
+    def expectancy(self):
+        """
+        Retorna la ganancia esperada por operación.
+
+        Equivale a tasa de acierto x ganancia media - tasa de fallo x pérdida
+        media, es decir, a la media del resultado neto de las operaciones.
+        """
+        return float(np.mean(self.pnl)) if len(self) else np.nan
+
+    def holding_time_histogram(self, bins=10):
+        """
+        Calcula el histograma de la duración de las operaciones (en velas).
+
+        Args:
+            bins (int or Sequence[int]): Número de intervalos o sus límites
+                                         (ver np.histogram).
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Las frecuencias y los límites de los intervalos.
+        """
+        return np.histogram(self.holding_bars, bins=bins)
+
+    def summary(self):
+        """
+        Retorna un resumen de las operaciones.
+
+        Returns:
+            dict: Número de operaciones, tasa de acierto, expectativa, ganancia
+                  y pérdida medias y duración media (en velas).
+        """
+        wins = self.pnl[self.pnl > 0]
+        losses = self.pnl[self.pnl <= 0]
+        return {
+            'n_trades': len(self),
+            'win_rate': self.win_rate(),
+            'expectancy': self.expectancy(),
+            'avg_win': float(wins.mean()) if len(wins) else np.nan,
+            'avg_loss': float(losses.mean()) if len(losses) else np.nan,
+            'avg_holding_bars': float(self.holding_bars.mean()) if len(self) else np.nan,
+        }
+
+    def to_frame(self):
+        """
+        Convierte el registro en un DataFrame (una fila por operación).
+
+        Returns:
+            pd.DataFrame: Las operaciones, con el motivo de cierre por nombre.
+        """
+        return pd.DataFrame({
+            'entry_time': self.entry_time,
+            'exit_time': self.exit_time,
+            'side': self.side,
+            'size': self.size,
+            'entry_price': self.entry_price,
+            'exit_price': self.exit_price,
+            'commission': self.commission,
+            'pnl': self.pnl,
+            'exit_reason': [REASON_NAMES[reason] for reason in self.exit_reason],
+        })
\ No newline at end of file
@@ -0,0 +1,150 @@
+"""
+Caché persistente de los resultados de las pruebas de optimización.
+
+El muestreador de Optuna vuelve a sugerir a menudo la misma combinación de
+parámetros, ya que todos son enteros o reales con paso fijo. TrialCache guarda
+el valor objetivo de cada combinación en una base de datos SQLite local, de
+modo que una repetición (en la misma ejecución o en otra posterior) se
+resuelve sin volver a simular los segmentos del Walk-Forward.
+
+La clave combina los parámetros en forma canónica, la huella digital de los
+datos de mercado, los rangos de prueba del Walk-Forward y la versión del motor de
+simulación (engine.ENGINE_VERSION), junto con los ajustes de config.py que
+afectan al resultado. Si cualquiera de ellos cambia, la clave es otra.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+from config import TRIAL_CACHE_PATH
+
+
+class TrialCache:
+    """
+    Resultados de pruebas guardados en SQLite, indexados por una clave canónica.
+
+    Cada consulta abre su propia conexión, por lo que varios procesos de una
+    optimización en paralelo pueden compartir el mismo archivo.
+
+    Attributes:
+        path (str): Ruta del archivo SQLite.
+        hits (int): Número de consultas resueltas desde la caché.
+        misses (int): Número de consultas sin resultado guardado.
+    """
+
+    def __init__(self, path=TRIAL_CACHE_PATH):
+        """
+        Abre (o crea) la caché.
+
+        Args:
+            path (str): Ruta del archivo SQLite.
+        """
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as connection:
+            connection.execute("CREATE TABLE IF NOT EXISTS trial_results ("
+                               "key TEXT PRIMARY KEY, value REAL NOT NULL, "
+                               "params TEXT NOT NULL, created REAL NOT NULL)")
+
+    @contextmanager
+    def _connect(self):
+        """Abre una conexión en una transacción (espera si otro proceso la bloquea)."""
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    @staticmethod
+    def canonical_params(params):
+        """
+        Normaliza los parámetros de una prueba.
+
+        Los reales se redondean para que, p. ej., 0.30000000000000004 y 0.3
+        den la misma clave, y las claves se ordenan.
+
+        Args:
+            params (dict): Los parámetros de la prueba.
+
+        Returns:
+            dict: Los parámetros normalizados.
+        """
+        canonical = {}
+        for name in sorted(params):
+            value = params[name]
+            if isinstance(value, float):
+                value = round(value, 10)
+            elif hasattr(value, 'item'):  # Escalares de NumPy.
+                value = value.item()
+            canonical[name] = value
+        return canonical
+
+    @classmethod
+    def make_key(cls, params, data_fingerprint, walk_forward, settings):
+        """
+        Construye la clave de una prueba.
+
+        Args:
+            params (dict): Los parámetros de la prueba.
+            data_fingerprint (str): Huella digital de los datos de mercado.
+            walk_forward (list): Los rangos de prueba [inicio, fin) de los segmentos
+                                 del Walk-Forward.
+            settings (dict): Versión del motor y demás ajustes que afectan al resultado.
+
+        Returns:
+            str: Un hash hexadecimal que identifica la prueba.
+        """
+        payload = json.dumps({'params': cls.canonical_params(params), 'data': data_fingerprint,
+                              'walk_forward': walk_forward, 'settings': settings},
+                             sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key):
+        """
+        Retorna el valor objetivo guardado para una clave.
+
+        Args:
+            key (str): La clave (ver make_key()).
+
+        Returns:
+            float or None: El valor guardado, o None si no existe.
+        """
+        with self._connect() as connection:
+            row = connection.execute("SELECT value FROM trial_results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0]
+
+    def put(self, key, value, params=None):
+        """
+        Guarda el valor objetivo de una prueba. Los valores no finitos se omiten.
+
+        Args:
+            key (str): La clave (ver make_key()).
+            value (float): El valor objetivo.
+            params (dict, optional): Los parámetros, que se guardan como referencia.
+        """
+        value = float(value)
+        if value != value or value in (float('inf'), float('-inf')):
+            return
+        params_json = json.dumps(self.canonical_params(params or {}), sort_keys=True)
+        with self._connect() as connection:
+            connection.execute("INSERT OR REPLACE INTO trial_results (key, value, params, created) "
+                               "VALUES (?, ?, ?, ?)", (key, value, params_json, time.time()))
+
+    def clear(self):
+        """Elimina todos los resultados guardados y reinicia los contadores."""
+        with self._connect() as connection:
+            connection.execute("DELETE FROM trial_results")
+        self.hits = 0
+        self.misses = 0
\ No newline at end of file
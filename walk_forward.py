@@ -0,0 +1,173 @@
+"""
+Planificador de segmentos (folds) para la validación Walk-Forward.
+
+WalkForwardSplitter divide una serie de N velas en segmentos de evaluación
+consecutivos, cada uno con su rango de entrenamiento asociado. Solo emite
+rangos de posiciones (inicio, fin), nunca copias de los datos: quien los usa
+extrae cada segmento como una vista (p. ej. con df.iloc[inicio:fin]).
+
+Modos disponibles:
+- 'rolling': ventana de entrenamiento de tamaño fijo que avanza con cada segmento.
+- 'anchored': ventana de entrenamiento anclada al inicio de la serie (expansiva).
+- 'purged': como 'anchored', pero se eliminan ('purge') las velas del
+  entrenamiento inmediatamente anteriores a cada segmento de prueba y se deja
+  un hueco ('embargo') tras cada segmento de prueba antes del siguiente, para
+  que la autocorrelación de la serie no filtre información entre segmentos.
+
+Los rangos de entrenamiento son para quien ajuste algo en cada segmento. El
+optimizador no tiene una fase de ajuste (Optuna fija los parámetros de cada
+prueba) y calcula los indicadores una sola vez sobre la serie completa, por
+lo que solo evalúa los rangos de prueba: en él, el modo y 'purge' no alteran
+el resultado, mientras que 'train_size', 'test_size' y 'embargo' sí.
+"""
+
+from typing import NamedTuple
+
+from config import WALK_FORWARD_MODE, WALK_FORWARD_SPLITS, WALK_FORWARD_TRAIN_SIZE
+from config import WALK_FORWARD_PURGE, WALK_FORWARD_EMBARGO
+
+WALK_FORWARD_MODES = ('rolling', 'anchored', 'purged')
+
+
+class Fold(NamedTuple):
+    """
+    Un segmento del Walk-Forward, como rangos de posiciones [inicio, fin).
+
+    Attributes:
+        index (int): Número del segmento (desde 0).
+        train_start (int): Primera vela del entrenamiento.
+        train_stop (int): Vela siguiente a la última del entrenamiento.
+        test_start (int): Primera vela de la prueba.
+        test_stop (int): Vela siguiente a la última de la prueba.
+    """
+    index: int
+    train_start: int
+    train_stop: int
+    test_start: int
+    test_stop: int
+
+    @property
+    def train(self):
+        """slice: El rango de entrenamiento (para usar con iloc)."""
+        return slice(self.train_start, self.train_stop)
+
+    @property
+    def test(self):
+        """slice: El rango de prueba (para usar con iloc)."""
+        return slice(self.test_start, self.test_stop)
+
+
+class WalkForwardSplitter:
+    """
+    Genera los segmentos de una validación Walk-Forward.
+
+    Los segmentos de prueba son consecutivos, del mismo tamaño y empiezan tras
+    las primeras 'train_size' velas, separados por 'embargo' velas en el modo
+    'purged'. Con los valores por defecto ('rolling', sin entrenamiento
+    inicial) la serie se divide en n_splits segmentos iguales y contiguos.
+
+    Attributes:
+        n_splits (int): Número de segmentos.
+        mode (str): 'rolling', 'anchored' o 'purged'.
+        train_size (int): Velas de entrenamiento (tamaño de la ventana en modo
+                          'rolling' y velas reservadas antes del primer segmento).
+        test_size (int or None): Velas de cada segmento de prueba. Si es None, se
+                                 reparte la serie entre los n_splits segmentos.
+        purge (int): En modo 'purged', velas eliminadas del final del entrenamiento.
+        embargo (int): En modo 'purged', velas omitidas tras cada segmento de prueba.
+    """
+
+    def __init__(self, n_splits=WALK_FORWARD_SPLITS, mode=WALK_FORWARD_MODE, train_size=WALK_FORWARD_TRAIN_SIZE,
+                 test_size=None, purge=WALK_FORWARD_PURGE, embargo=WALK_FORWARD_EMBARGO):
+        """
+        Inicializa el planificador.
+
+        Args:
+            n_splits (int): Número de segmentos.
+            mode (str): 'rolling', 'anchored' o 'purged'.
+            train_size (int): Velas de entrenamiento.
+            test_size (int, optional): Velas de cada segmento de prueba.
+            purge (int): Velas eliminadas del final del entrenamiento ('purged').
+            embargo (int): Velas omitidas tras cada segmento de prueba ('purged').
+        """
+        if mode not in WALK_FORWARD_MODES:
+            raise ValueError(f"Modo de Walk-Forward no reconocido: {mode}")
+        if n_splits < 1:
+            raise ValueError(f"El número de segmentos debe ser positivo: {n_splits}")
+        if min(train_size, purge, embargo) < 0:
+            raise ValueError("train_size, purge y embargo no pueden ser negativos.")
+        self.n_splits = n_splits
+        self.mode = mode
+        self.train_size = train_size
+        self.test_size = test_size
+        self.purge = purge if mode == 'purged' else 0
+        self.embargo = embargo if mode == 'purged' else 0
+
+    def to_dict(self):
+        """Retorna la configuración como diccionario serializable (p. ej. en JSON)."""
+        return {'n_splits': self.n_splits, 'mode': self.mode, 'train_size': self.train_size,
+                'test_size': self.test_size, 'purge': self.purge, 'embargo': self.embargo}
+
+    def fold_size(self, n_bars):
+        """
+        Calcula el tamaño de cada segmento de prueba para una serie de n_bars velas.
+
+        Args:
+            n_bars (int): Número de velas de la serie.
+
+        Returns:
+            int: El número de velas de cada segmento de prueba.
+        """
+        if self.test_size is not None:
+            return self.test_size
+        available = n_bars - self.train_size - (self.n_splits - 1) * self.embargo
+        return max(available // self.n_splits, 0)
+
+    def split(self, n_bars):
+        """
+        Genera los segmentos de una serie de n_bars velas.
+
+        Args:
+            n_bars (int): Número de velas de la serie.
+
+        Returns:
+            list[Fold]: Los segmentos, en orden cronológico.
+
+        Raises:
+            ValueError: Si la serie no alcanza para los segmentos pedidos.
+        """
+        test_size = self.fold_size(n_bars)
+        last_stop = self.train_size + self.n_splits * test_size + (self.n_splits - 1) * self.embargo
+        if test_size < 1 or last_stop > n_bars:
+            raise ValueError(f"La serie de {n_bars} velas no alcanza para {self.n_splits} segmentos.")
+
+        folds = []
+        for i in range(self.n_splits):
+            test_start = self.train_size + i * (test_size + self.embargo)
+            if self.mode == 'rolling':
+                train_start = max(test_start - self.train_size, 0)
+            else:
+                train_start = 0
+            train_stop = max(test_start - self.purge, train_start)
+            folds.append(Fold(i, train_start, train_stop, test_start, test_start + test_size))
+        return folds
+
+    def map(self, func, n_bars, executor=None):
+        """
+        Aplica una función a cada segmento, opcionalmente en paralelo.
+
+        Args:
+            func (callable): Función que recibe un Fold. Con un grupo de procesos
+                             debe poder serializarse (definida a nivel de módulo).
+            n_bars (int): Número de velas de la serie.
+            executor (concurrent.futures.Executor, optional): Grupo de hilos o de
+                procesos en el que se evalúan los segmentos. Si es None, se
+                evalúan en secuencia en el hilo actual.
+
+        Returns:
+            list: Los resultados, en el orden de los segmentos.
+        """
+        folds = self.split(n_bars)
+        if executor is None:
+            return [func(fold) for fold in folds]
+        return list(executor.map(func, folds))
\ No newline at end of file